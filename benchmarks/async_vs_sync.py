@@ -0,0 +1,164 @@
+"""
+Mixed read workload: sync services on a thread pool vs the async services on one event loop.
+
+Both sides run against the same throwaway database (DATABASE_URL is
+pointed at a temp file before the services are imported) and issue the
+same request mix — title searches, top-rated, recommendations and
+notifications. `--concurrency` is the number of threads for the sync run
+and the number of in-flight coroutines for the async run.
+
+Redis is used if it is running; pass --flush-cache to empty it first.
+
+Usage:
+    python -m benchmarks.async_vs_sync
+    python -m benchmarks.async_vs_sync --requests 5000 --concurrency 64
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_async_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'bench.db')}"
+
+from database.db import SessionLocal, initialize_db                     # noqa: E402
+from database.models import User, Media, MediaType, Review, Favorite    # noqa: E402
+from database.async_db import async_engine                              # noqa: E402
+from cache.redis_client import flush_all_cache                          # noqa: E402
+from cache import async_redis_client                                    # noqa: E402
+from services import async_service                                      # noqa: E402
+from services.media_service import search_by_title                      # noqa: E402
+from services.review_service import get_top_rated, get_recommendations  # noqa: E402
+from services.stats_service import rebuild_media_stats                  # noqa: E402
+from patterns.observer import notifications_query                       # noqa: E402
+
+GENRES    = ["Action", "Drama", "Comedy", "Sci-Fi", "Pop", "Rock", "Thriller", "Horror"]
+LAST_SEEN = "2000-01-01T00:00:00"
+
+
+def seed(users: int, media: int, reviews_per_user: int):
+    rng = random.Random(42)
+    db  = SessionLocal()
+    try:
+        db.add_all(
+            User(name=f"Bench User {i}", email=f"bench{i}@bench.local", password="x")
+            for i in range(users)
+        )
+        types = list(MediaType)
+        db.add_all(
+            Media(title=f"Bench Title {i}", media_type=types[i % len(types)],
+                  genre=GENRES[i % len(GENRES)], release_year=1980 + i % 45, creator=f"Creator {i % 97}")
+            for i in range(media)
+        )
+        db.flush()
+        for user_id in range(1, users + 1):
+            for media_id in rng.sample(range(1, media + 1), reviews_per_user):
+                db.add(Review(user_id=user_id, media_id=media_id,
+                              rating=round(rng.uniform(1.0, 10.0), 1), comment="bench"))
+            for media_id in rng.sample(range(1, media + 1), 3):
+                db.add(Favorite(user_id=user_id, media_id=media_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+def sync_notifications(user_id: int):
+    """The query part of get_notifications — the CLI version also rewrites the session file."""
+    db = SessionLocal()
+    try:
+        return db.execute(notifications_query(user_id, datetime.fromisoformat(LAST_SEEN))).all()
+    finally:
+        db.close()
+
+
+def make_workload(requests: int, users: int, media: int) -> list:
+    rng  = random.Random(7)
+    jobs = []
+    for _ in range(requests):
+        choice = rng.random()
+        if choice < 0.4:
+            jobs.append(("search", f"Title {rng.randint(1, media)}"))
+        elif choice < 0.6:
+            jobs.append(("top_rated", 5))
+        elif choice < 0.8:
+            jobs.append(("recommendations", rng.randint(1, users)))
+        else:
+            jobs.append(("notifications", rng.randint(1, users)))
+    return jobs
+
+
+SYNC_CALLS = {
+    "search":          search_by_title,
+    "top_rated":       get_top_rated,
+    "recommendations": get_recommendations,
+    "notifications":   sync_notifications,
+}
+
+ASYNC_CALLS = {
+    "search":          async_service.search_by_title,
+    "top_rated":       async_service.get_top_rated,
+    "recommendations": async_service.get_recommendations,
+    "notifications":   lambda user_id: async_service.get_notifications(user_id, LAST_SEEN),
+}
+
+
+def run_sync(jobs: list, concurrency: int) -> float:
+    start = time.perf_counter()
+    # The CLI services print their tables — keep that out of the timing output
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda job: SYNC_CALLS[job[0]](job[1]), jobs))
+    return time.perf_counter() - start
+
+
+async def run_async(jobs: list, concurrency: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(job):
+        async with gate:
+            return await ASYNC_CALLS[job[0]](job[1])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(job) for job in jobs))
+    elapsed = time.perf_counter() - start
+    await async_engine.dispose()
+    await async_redis_client.aclose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync threads vs asyncio for mixed reads")
+    parser.add_argument("--requests",    type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users",       type=int, default=200)
+    parser.add_argument("--media",       type=int, default=2000)
+    parser.add_argument("--reviews",     type=int, default=10, help="reviews per user")
+    parser.add_argument("--flush-cache", action="store_true")
+    args = parser.parse_args()
+
+    initialize_db()
+    seed(args.users, args.media, args.reviews)
+    with contextlib.redirect_stdout(io.StringIO()):
+        rebuild_media_stats()
+    jobs = make_workload(args.requests, args.users, args.media)
+
+    print(f"\n🏁 {args.requests} requests, concurrency {args.concurrency}, database in {_TMP_DIR}\n")
+    print(f"{'Runner':<14} {'Seconds':>9} {'Req/sec':>10}")
+    print("-" * 35)
+    for name, runner in (("sync threads", lambda: run_sync(jobs, args.concurrency)),
+                         ("asyncio",      lambda: asyncio.run(run_async(jobs, args.concurrency)))):
+        if args.flush_cache:
+            with contextlib.redirect_stdout(io.StringIO()):
+                flush_all_cache()
+        elapsed = runner()
+        print(f"{name:<14} {elapsed:>9.3f} {args.requests / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Time --bulk-review on a generated CSV for each bulk mode.
+
+Runs against a throwaway database (DATABASE_URL is pointed at a temp file
+before the services are imported) seeded with one user and one media item
+per CSV row, so every row is a valid, distinct review.
+
+Usage:
+    python -m benchmarks.bulk_review                     # 100k rows, every mode
+    python -m benchmarks.bulk_review --modes pool set --batch-size 1000
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_bulk_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'bench.db')}"
+
+from database.db import SessionLocal, initialize_db          # noqa: E402
+from database.models import User, Media, MediaType, Review, MediaStats   # noqa: E402
+from services.review_service import BULK_MODES, bulk_submit_reviews      # noqa: E402
+
+
+def seed(rows: int) -> int:
+    db = SessionLocal()
+    try:
+        user = User(name="Bench User", email="bench@bench.local", password="x")
+        db.add(user)
+        db.bulk_save_objects(
+            Media(title=f"Bench Title {i}", media_type=MediaType.MOVIE, genre="Drama",
+                  release_year=2000 + i % 25, creator="Bench")
+            for i in range(rows)
+        )
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def reset_reviews():
+    db = SessionLocal()
+    try:
+        db.query(Review).delete(synchronize_session=False)
+        db.query(MediaStats).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def write_csv(rows: int) -> str:
+    path = os.path.join(_TMP_DIR, "reviews.csv")
+    rng  = random.Random(42)
+    with open(path, "w") as f:
+        f.write("media_id,rating,comment\n")
+        for media_id in range(1, rows + 1):
+            f.write(f"{media_id},{round(rng.uniform(1.0, 10.0), 1)},bench row {media_id}\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark --bulk-review modes")
+    parser.add_argument("--rows",       type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--modes",      nargs="+", default=list(BULK_MODES), choices=list(BULK_MODES))
+    args = parser.parse_args()
+
+    initialize_db()
+    user_id  = seed(args.rows)
+    csv_path = write_csv(args.rows)
+
+    print(f"\n🏁 {args.rows} rows, database in {_TMP_DIR}\n")
+    print(f"{'Mode':<8} {'Seconds':>9} {'Rows/sec':>10} {'Commits':>8}")
+    print("-" * 38)
+    for mode in args.modes:
+        reset_reviews()
+        out   = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            bulk_submit_reviews(csv_path, user_id, batch_size=args.batch_size,
+                                mode=mode)
+        elapsed = time.perf_counter() - start
+        commits = next(
+            (line.split(":")[1].strip() for line in out.getvalue().splitlines() if "Commits" in line),
+            "?"
+        )
+        print(f"{mode:<8} {elapsed:>9.3f} {args.rows / elapsed:>10.0f} {commits:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Bytes stored and decode time: plain JSON vs cache/codec.py on cached result sets.
+
+The rows have the shape the services cache — format_media() for searches,
+format_top_rated() for rankings — with realistic titles and creators.
+No database or Redis is needed.
+
+Usage:
+    python -m benchmarks.cache_codec
+    python -m benchmarks.cache_codec --rows 10 100 2000 --repeat 500
+"""
+import argparse
+import json
+import random
+import time
+
+from cache import codec
+
+GENRES = ["Action", "Drama", "Comedy", "Sci-Fi", "Pop", "Rock", "Thriller", "Horror"]
+TYPES  = ["movie", "web_show", "song"]
+WORDS  = ["Midnight", "Empire", "Silent", "River", "Echoes", "Crown", "Last", "Garden",
+          "Storm", "Letters", "Paper", "Kingdom", "Neon", "Harbor", "Winter", "Signal"]
+
+
+def search_rows(count: int, rng: random.Random) -> list:
+    return [
+        {
+            "id":           rng.randint(1, 100000),
+            "title":        " ".join(rng.sample(WORDS, rng.randint(1, 4))),
+            "media_type":   rng.choice(TYPES),
+            "genre":        rng.choice(GENRES),
+            "release_year": rng.randint(1960, 2025),
+            "creator":      f"{rng.choice(WORDS)} {rng.choice(WORDS)}son",
+        }
+        for _ in range(count)
+    ]
+
+
+def top_rated_rows(count: int, rng: random.Random) -> list:
+    return [
+        {
+            "title":       " ".join(rng.sample(WORDS, rng.randint(1, 4))),
+            "media_type":  rng.choice(TYPES),
+            "avg_rating":  round(rng.uniform(1, 10), 2),
+            "total_votes": rng.randint(1, 5000),
+        }
+        for _ in range(count)
+    ]
+
+
+ENCODERS = {
+    "json":          (lambda v: json.dumps(v).encode(), json.loads),
+    "codec (raw)":   (lambda v: codec.encode(v, compression="none"), codec.decode),
+    "codec (zlib)":  (lambda v: codec.encode(v, compression="zlib"), codec.decode),
+}
+if codec.lz4_frame is not None:
+    ENCODERS["codec (lz4)"] = (lambda v: codec.encode(v, compression="lz4"), codec.decode)
+
+
+def decode_micros(decode, data: bytes, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decode(data)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cache value encodings")
+    parser.add_argument("--rows",   type=int, nargs="+", default=[5, 50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"\n{'Result set':<18} {'Encoding':<14} {'Bytes':>9} {'vs JSON':>8} {'Decode µs':>10}")
+    print("-" * 63)
+    for shape, make in (("search", search_rows), ("top_rated", top_rated_rows)):
+        for count in args.rows:
+            value    = make(count, rng)
+            baseline = None
+            for name, (encode, decode) in ENCODERS.items():
+                data = encode(value)
+                assert decode(data) == value
+                baseline = baseline or len(data)
+                print(f"{shape + ' x' + str(count):<18} {name:<14} {len(data):>9} "
+                      f"{len(data) / baseline:>7.0%} {decode_micros(decode, data, args.repeat):>10.1f}")
+            print()
+
+
+if __name__ == "__main__":
+    main()
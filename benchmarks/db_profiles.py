@@ -0,0 +1,152 @@
+"""
+Mixed read/write throughput for each SQLite engine profile.
+
+Every profile gets a fresh database file seeded with the same data, then
+a pool of threads replays the CLI workload against it: top-rated
+aggregates, title searches, media lookups and review inserts.
+
+Usage:
+    python -m benchmarks.db_profiles
+    python -m benchmarks.db_profiles --threads 16 --ops 500 --write-ratio 0.3
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database.db import Base, ENGINE_PROFILES, create_db_engine
+from database.models import User, Media, MediaType, Review
+
+GENRES = ["Action", "Drama", "Comedy", "Sci-Fi", "Pop", "Rock", "Thriller", "Horror"]
+
+
+def seed(Session, users: int, media: int):
+    db = Session()
+    try:
+        db.add_all(
+            User(name=f"Bench User {i}", email=f"bench{i}@bench.local", password="x")
+            for i in range(users)
+        )
+        types = list(MediaType)
+        db.add_all(
+            Media(
+                title=f"Bench Title {i}",
+                media_type=types[i % len(types)],
+                genre=GENRES[i % len(GENRES)],
+                release_year=1980 + i % 45,
+                creator=f"Creator {i % 97}",
+            )
+            for i in range(media)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def worker(Session, ops: int, write_ratio: float, users: int, media: int, counters: dict, lock):
+    rng = random.Random(threading.get_ident())
+    reads = writes = errors = 0
+
+    for _ in range(ops):
+        db = Session()
+        try:
+            if rng.random() < write_ratio:
+                db.add(Review(
+                    user_id=rng.randint(1, users),
+                    media_id=rng.randint(1, media),
+                    rating=round(rng.uniform(1.0, 10.0), 1),
+                    comment="bench",
+                ))
+                db.commit()
+                writes += 1
+            else:
+                choice = rng.random()
+                if choice < 0.4:
+                    (db.query(Media.id, func.avg(Review.rating))
+                       .join(Review, Media.id == Review.media_id)
+                       .group_by(Media.id)
+                       .order_by(func.avg(Review.rating).desc())
+                       .limit(5).all())
+                elif choice < 0.8:
+                    db.query(Media).filter(Media.title.ilike(f"%Title {rng.randint(1, media)}%")).all()
+                else:
+                    db.query(Media).filter(Media.id == rng.randint(1, media)).first()
+                reads += 1
+        except IntegrityError:
+            # Duplicate (user, media) pair — still a completed write round trip
+            db.rollback()
+            writes += 1
+        except OperationalError:
+            # "database is locked" and friends
+            db.rollback()
+            errors += 1
+        finally:
+            db.close()
+
+    with lock:
+        counters["reads"]  += reads
+        counters["writes"] += writes
+        counters["errors"] += errors
+
+
+def run_profile(profile: str, threads: int, ops: int, write_ratio: float, users: int, media: int):
+    tmp_dir = tempfile.mkdtemp(prefix=f"bench_{profile}_")
+    url     = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    engine  = create_db_engine(url, profile, pool_size=threads, max_overflow=0)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    Base.metadata.create_all(bind=engine)
+    seed(Session, users, media)
+
+    counters = {"reads": 0, "writes": 0, "errors": 0}
+    lock     = threading.Lock()
+    pool     = [
+        threading.Thread(target=worker, args=(Session, ops, write_ratio, users, media, counters, lock))
+        for _ in range(threads)
+    ]
+
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    engine.dispose()
+    completed = counters["reads"] + counters["writes"]
+    return {
+        "profile": profile,
+        "elapsed": elapsed,
+        "ops_sec": completed / elapsed if elapsed else 0.0,
+        **counters,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite engine profiles")
+    parser.add_argument("--threads",     type=int,   default=8)
+    parser.add_argument("--ops",         type=int,   default=300, help="operations per thread")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--users",       type=int,   default=200)
+    parser.add_argument("--media",       type=int,   default=2000)
+    parser.add_argument("--profiles",    nargs="+",  default=list(ENGINE_PROFILES.keys()),
+                        choices=list(ENGINE_PROFILES.keys()))
+    args = parser.parse_args()
+
+    print(f"\n🏁 {args.threads} threads × {args.ops} ops, {args.write_ratio:.0%} writes\n")
+    print(f"{'Profile':<10} {'Ops/sec':>10} {'Reads':>8} {'Writes':>8} {'Locked':>8} {'Seconds':>9}")
+    print("-" * 58)
+    for profile in args.profiles:
+        r = run_profile(profile, args.threads, args.ops, args.write_ratio, args.users, args.media)
+        print(f"{r['profile']:<10} {r['ops_sec']:>10.1f} {r['reads']:>8} {r['writes']:>8} "
+              f"{r['errors']:>8} {r['elapsed']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Title search latency: ILIKE '%term%' scan vs the FTS5 index, as the catalog grows.
+
+One throwaway database is grown to each size in turn (10k, 100k, 1M titles
+by default); inserts go through the FTS triggers like add_media's do. At
+each size the same random word-prefix terms are run both ways, fetching
+the first page of 20 results.
+
+Usage:
+    python -m benchmarks.search_fts
+    python -m benchmarks.search_fts --sizes 10000 100000 --queries 200
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import select
+
+from database.db import Base, create_db_engine
+from database.fts import ensure_fts, match_expression, apply_match
+from database.models import Media, MediaType
+
+PAGE      = 20
+SYLLABLES = ["ka", "lo", "mi", "ne", "ra", "su", "ti", "vo", "ze", "da", "fi", "gu", "ho", "ja", "pe", "wu"]
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(words)
+
+
+def grow(engine, start: int, end: int, vocabulary: list, rng: random.Random):
+    types = [t.name for t in MediaType]
+    rows  = (
+        {
+            "title":      f"{' '.join(rng.sample(vocabulary, 3))} {i}",
+            "media_type": types[i % len(types)],
+            "creator":    f"{rng.choice(vocabulary)} {rng.choice(vocabulary)}",
+        }
+        for i in range(start, end)
+    )
+    batch = []
+    with engine.begin() as conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) == 10000:
+                conn.execute(Media.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Media.__table__.insert(), batch)
+
+
+def ilike_query(term: str):
+    return select(Media.id).where(Media.title.ilike(f"%{term}%")).order_by(Media.id).limit(PAGE)
+
+
+def fts_query(term: str):
+    return apply_match(select(Media.id), Media, match_expression(term)).limit(PAGE)
+
+
+def time_queries(engine, make_query, terms: list) -> list:
+    timings = []
+    with engine.connect() as conn:
+        for term in terms:
+            started = time.perf_counter()
+            conn.execute(make_query(term)).all()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ILIKE vs FTS5 title search")
+    parser.add_argument("--sizes",   type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--words",   type=int, default=20000, help="vocabulary size")
+    args = parser.parse_args()
+
+    rng        = random.Random(42)
+    vocabulary = make_vocabulary(args.words, rng)
+    path       = os.path.join(tempfile.mkdtemp(prefix="bench_fts_"), "bench.db")
+    engine     = create_db_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    if not ensure_fts(engine):
+        return
+
+    # Whole words, and words with the last letters not typed yet
+    words = rng.choices(vocabulary, k=args.queries)
+    terms = [word if i % 2 else word[:max(4, len(word) - 2)] for i, word in enumerate(words)]
+
+    print(f"\n🏁 First page ({PAGE}) of {args.queries} searches, database in {path}\n")
+    print(f"{'Titles':>9} {'Insert s':>9} {'ILIKE p50':>10} {'ILIKE p95':>10} {'FTS p50':>9} {'FTS p95':>9}")
+    print("-" * 62)
+    current = 0
+    for size in sorted(args.sizes):
+        started = time.perf_counter()
+        grow(engine, current, size, vocabulary, rng)
+        inserted = time.perf_counter() - started
+        current  = size
+
+        results = []
+        for make_query in (ilike_query, fts_query):
+            timings = sorted(time_queries(engine, make_query, terms))
+            results += [statistics.median(timings), timings[int(len(timings) * 0.95) - 1]]
+        print(f"{size:>9} {inserted:>9.1f} {results[0]:>8.2f}ms {results[1]:>8.2f}ms "
+              f"{results[2]:>7.2f}ms {results[3]:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
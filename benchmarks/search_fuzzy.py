@@ -0,0 +1,91 @@
+"""
+Fuzzy title search: trigram index build, snapshot and query latency as the catalog grows.
+
+Titles are 1–4 words drawn from a vocabulary of made-up words; queries are
+real titles with one typo inside a word (a letter dropped, doubled, swapped or replaced).
+No database is needed — the index is built from the generated rows
+directly, then saved and loaded again from a temp snapshot.
+
+Usage:
+    python -m benchmarks.search_fuzzy
+    python -m benchmarks.search_fuzzy --sizes 10000 100000 --queries 200
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import tempfile
+import time
+
+from services.fuzzy_index import TrigramIndex
+
+VOWELS     = "aeiou"
+CONSONANTS = "bcdfghjklmnprstvwyz"
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    words = set()
+    while len(words) < size:
+        length = rng.randint(4, 9)
+        words.add("".join(rng.choice(CONSONANTS if i % 2 == 0 else VOWELS) if rng.random() < 0.8
+                          else rng.choice(string.ascii_lowercase) for i in range(length)).capitalize())
+    return sorted(words)
+
+
+def make_titles(count: int, vocabulary: list, rng: random.Random) -> list:
+    return [(i, " ".join(rng.sample(vocabulary, rng.randint(1, 4)))) for i in range(1, count + 1)]
+
+
+def typo(text: str, rng: random.Random) -> str:
+    i = rng.choice([i for i in range(1, len(text) - 1) if text[i] != " " and text[i - 1] != " "] or [1])
+    return rng.choice([
+        text[:i] + text[i + 1:],                          # dropped
+        text[:i] + text[i] + text[i:],                    # doubled
+        text[:i - 1] + text[i] + text[i - 1] + text[i + 1:],  # swapped
+        text[:i] + rng.choice(string.ascii_lowercase) + text[i + 1:],  # replaced
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trigram fuzzy title index")
+    parser.add_argument("--sizes",   type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--words",   type=int, default=50000, help="vocabulary size")
+    args = parser.parse_args()
+
+    rng        = random.Random(42)
+    vocabulary = make_vocabulary(args.words, rng)
+    path       = os.path.join(tempfile.mkdtemp(prefix="bench_fuzzy_"), "index.trgm")
+
+    print(f"\n🏁 {args.queries} one-typo searches per size, snapshot in {path}\n")
+    print(f"{'Titles':>9} {'Build s':>8} {'Snap MB':>8} {'Load s':>7} {'p50':>8} {'p95':>8} {'Top-1':>6}")
+    print("-" * 60)
+    for size in sorted(args.sizes):
+        titles = make_titles(size, vocabulary, rng)
+
+        started = time.perf_counter()
+        index   = TrigramIndex.build(titles)
+        built   = time.perf_counter() - started
+        index.save(path)
+        started = time.perf_counter()
+        index   = TrigramIndex.load(path)
+        loaded  = time.perf_counter() - started
+
+        # Small vocabularies repeat titles — any copy of the right title counts
+        targets = rng.sample(titles, args.queries)
+        timings, found = [], 0
+        for _, title in targets:
+            query   = typo(title, rng)
+            started = time.perf_counter()
+            results = index.search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+            found  += bool(results) and titles[results[0][0] - 1][1] == title
+        timings.sort()
+        print(f"{size:>9} {built:>8.1f} {os.path.getsize(path) / 1e6:>8.1f} {loaded:>7.2f} "
+              f"{statistics.median(timings):>6.2f}ms {timings[int(len(timings) * 0.95) - 1]:>6.2f}ms "
+              f"{found / len(targets):>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Autocomplete: suggestion index build, snapshot and per-keystroke latency as the catalog grows.
+
+Every prefix of a random title is looked up, as if typed one key at a
+time, so short prefixes (served from the precomputed lists) and long
+ones (ranked on the spot) are both measured. Titles come from the fuzzy
+benchmark's generator; review counts and ratings are random. No database
+is needed.
+
+Usage:
+    python -m benchmarks.suggest
+    python -m benchmarks.suggest --sizes 10000 100000 --queries 200
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.search_fuzzy import make_vocabulary, make_titles
+from services.suggest_index import SuggestIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the prefix suggestion index")
+    parser.add_argument("--sizes",   type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200, help="titles typed per size")
+    parser.add_argument("--words",   type=int, default=50000, help="vocabulary size")
+    args = parser.parse_args()
+
+    rng        = random.Random(42)
+    vocabulary = make_vocabulary(args.words, rng)
+    path       = os.path.join(tempfile.mkdtemp(prefix="bench_suggest_"), "index.suggest")
+
+    print(f"\n🏁 Every prefix of {args.queries} titles per size, snapshot in {path}\n")
+    print(f"{'Titles':>9} {'Build s':>8} {'Snap MB':>8} {'Load s':>7} {'Lookups':>8} {'p50 µs':>8} {'p95 µs':>8}")
+    print("-" * 62)
+    for size in sorted(args.sizes):
+        rows = [(media_id, title, rng.randint(0, 500), round(rng.uniform(1, 10), 2))
+                for media_id, title in make_titles(size, vocabulary, rng)]
+
+        started = time.perf_counter()
+        index   = SuggestIndex.build(rows)
+        built   = time.perf_counter() - started
+        index.save(path)
+        started = time.perf_counter()
+        index   = SuggestIndex.load(path)
+        loaded  = time.perf_counter() - started
+
+        timings = []
+        for _, title, _, _ in rng.sample(rows, args.queries):
+            for n in range(1, len(title) + 1):
+                started = time.perf_counter()
+                index.suggest(title[:n])
+                timings.append((time.perf_counter() - started) * 1e6)
+        timings.sort()
+        print(f"{size:>9} {built:>8.1f} {os.path.getsize(path) / 1e6:>8.1f} {loaded:>7.2f} "
+              f"{len(timings):>8} {statistics.median(timings):>8.1f} {timings[int(len(timings) * 0.95) - 1]:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+import asyncio
+import time
+import uuid
+import redis
+import redis.asyncio as aioredis
+from cache import codec, metrics as cache_metrics, redis_client
+from cache.redis_client import (
+    REDIS_HOST, REDIS_PORT, REDIS_TIMEOUT, CACHE_BACKEND, INVALIDATION_CHANNEL, L1_CACHE_TTL,
+    LOCK_TTL_MS, LOCK_WAIT, LOCK_POLL, EARLY_BETA,
+    ns_key, tag_key, lock_key, should_refresh_early, compute_seconds, _RELEASE_LOCK,
+    queue_search_term, queue_versioned_get, read_versioned, local_versioned_keys, fallback_versioned_keys,
+)
+from cache.sqlite_cache import AsyncSQLiteCache
+
+# ──────────────────────────────────────────────
+# Connection (opened lazily, guarded by the sync client's circuit breaker)
+# ──────────────────────────────────────────────
+
+# Same server, keys and value codec as the sync client, so both paths
+# share one cache — and one breaker, since they share one server.
+# An asyncio client is tied to the event loop it first ran on, so each live
+# loop keeps its own: switching loops never abandons a pool that is still
+# in use. Clients of closed loops are dropped on the next lookup — nothing
+# can run on them any more. A WeakKeyDictionary would not do: a connected
+# client refers back to its loop, so the entry would never go away.
+_client  = None     # the SQLite adapter — not tied to a loop
+_clients = {}       # event loop → redis.asyncio client
+
+
+def get_client():
+    """The Redis client for the running event loop, created on first use."""
+    global _client
+    if CACHE_BACKEND == "sqlite":
+        # Not tied to a loop — wraps the sync client's store
+        if _client is None:
+            _client = AsyncSQLiteCache(redis_client.get_client())
+        return _client
+
+    loop   = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        for closed in [other for other in _clients if other.is_closed()]:
+            del _clients[closed]
+        client = _clients[loop] = aioredis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=0,
+            decode_responses=False,
+            socket_connect_timeout=REDIS_TIMEOUT,
+            socket_timeout=REDIS_TIMEOUT
+        )
+    return client
+
+
+async def aclose():
+    """Close the running loop's Redis client and its pool — await it before the loop stops."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def _run(operation):
+    """Async twin of redis_client._run() — returns (ok, result)."""
+    breaker = redis_client.breaker   # looked up per call, so both clients always share one
+    if not breaker.allow():
+        return False, None
+    try:
+        result = await operation(get_client())
+    except (redis.ConnectionError, redis.TimeoutError):
+        breaker.record_failure()
+        return False, None
+    except Exception:
+        breaker.record_success()
+        return False, None
+    breaker.record_success()
+    redis_client._ensure_listener()
+    return True, result
+
+
+# ──────────────────────────────────────────────
+# Core helpers
+# ──────────────────────────────────────────────
+
+# The L1 tier is the sync client's LocalCache — it is thread-safe and never
+# blocks on I/O, so the event loop can use it directly.
+
+async def get_cache(key: str):
+    """Get a value from the L1 cache, falling back to Redis."""
+    local_cache = redis_client.local_cache
+    if local_cache is not None:
+        found, value = redis_client.l1_get(key)
+        if found:
+            return value
+
+    async def fetch(client):
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.pttl(key)
+            return await pipe.execute()
+
+    started    = time.perf_counter()
+    ok, result = await _run(fetch)
+    elapsed    = time.perf_counter() - started
+    if not ok:
+        redis_client.record_call("get", [key], elapsed, ok=False)
+        return None
+    decoded, ttl_ms = codec.decode(result[0]), result[1]
+
+    if decoded is None:
+        redis_client.redis_misses += 1
+        redis_client.record_call("get", [key], elapsed, ok=True)
+        return None
+    redis_client.redis_hits += 1
+    redis_client.record_call("get", [key], elapsed, ok=True, sizes={key: len(result[0])})
+    if local_cache is not None and ttl_ms > 0:
+        local_cache.set(key, decoded, ttl_ms / 1000)
+    return decoded
+
+
+async def set_cache(key: str, value, ttl: int):
+    """Store a value in the L1 cache and in Redis with expiry time."""
+    if redis_client.local_cache is not None:
+        redis_client.local_cache.set(key, value, ttl)
+    data    = codec.encode(value)
+    started = time.perf_counter()
+    ok, _   = await _run(lambda client: client.setex(key, ttl, data))
+    redis_client.record_call("set", [key], time.perf_counter() - started, ok=ok,
+                             sizes={key: len(data)} if ok else None)
+
+
+async def delete_cache(*keys: str):
+    """Delete one or more cache keys everywhere (L1s included) in a single round trip."""
+    if redis_client.local_cache is not None:
+        redis_client.local_cache.delete(*keys)
+    if not keys:
+        return
+
+    async def delete(client):
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.delete(*keys)
+            for key in keys:
+                pipe.publish(INVALIDATION_CHANNEL, key)
+            await pipe.execute()
+
+    await _run(delete)
+
+
+async def record_search_term(term: str):
+    """Count one search for `term` — see redis_client.record_search_term()."""
+    async def bump(client):
+        async with client.pipeline(transaction=False) as pipe:
+            queue_search_term(pipe, term)
+            await pipe.execute()
+
+    await _run(bump)
+
+
+# ──────────────────────────────────────────────
+# Stampede protection — see redis_client.get_or_compute()
+# ──────────────────────────────────────────────
+
+async def _compute_and_store(key: str, compute, ttl: int):
+    started = time.perf_counter()
+    value   = await compute()
+    compute_seconds[cache_metrics.key_prefix(key)] = time.perf_counter() - started
+    if value:
+        await set_cache(key, value, ttl)
+    return value
+
+
+async def _try_lock(key: str):
+    token   = uuid.uuid4().hex
+    ok, won = await _run(lambda client: client.set(lock_key(key), token, nx=True, px=LOCK_TTL_MS))
+    return token if ok and won else None
+
+
+async def _release_lock(key: str, token: str):
+    await _run(lambda client: client.eval(_RELEASE_LOCK, 1, lock_key(key), token))
+
+
+async def _wait_for_winner(key: str):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL)
+
+        async def poll(client):
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.exists(lock_key(key))
+                return await pipe.execute()
+
+        ok, result = await _run(poll)
+        if not ok:
+            return None
+        value, locked = result
+        decoded = codec.decode(value)
+        if decoded is not None:
+            return decoded
+        if not locked:
+            return None
+    return None
+
+
+async def get_or_compute(key: str, compute, ttl: int, beta: float = EARLY_BETA, depends: list = None):
+    """
+    Async twin of redis_client.get_or_compute() — the same lock keys, so
+    sync and async callers of one key rebuild it once between them.
+    `compute` is a coroutine function. Returns (value, from_cache).
+    """
+    local_cache = redis_client.local_cache
+    base        = key
+    if local_cache is not None:
+        if depends:
+            key = (local_versioned_keys([base], depends) or [None])[0]
+        hit, value = redis_client.l1_get(key) if key else (False, None)
+        if hit:
+            return value, True
+
+    async def fetch(client):
+        async with client.pipeline(transaction=False) as pipe:
+            if depends:
+                queue_versioned_get(pipe, [base], depends)
+            else:
+                pipe.get(key)
+                pipe.pttl(key)
+            return await pipe.execute()
+
+    started    = time.perf_counter()
+    ok, result = await _run(fetch)
+    elapsed    = time.perf_counter() - started
+    if not ok:
+        if depends:
+            key = fallback_versioned_keys([base], depends)[0]
+        redis_client.record_call("get", [key], elapsed, ok=False)
+        return await _compute_and_store(key, compute, ttl), False
+    if depends:
+        (key,), (result,) = read_versioned(result[0], [base], depends)
+    decoded, ttl_ms = codec.decode(result[0]), result[1]
+    redis_client.record_call("get", [key], elapsed, ok=True,
+                             sizes={key: len(result[0])} if decoded is not None else None)
+
+    if decoded is not None:
+        redis_client.redis_hits += 1
+        if not should_refresh_early(key, ttl_ms, beta):
+            if local_cache is not None and ttl_ms > 0:
+                local_cache.set(key, decoded, ttl_ms / 1000)
+            return decoded, True
+        token = await _try_lock(key)
+        if token is None:
+            return decoded, True
+        try:
+            value = await _compute_and_store(key, compute, ttl)
+            return (value, False) if value else (decoded, True)
+        finally:
+            await _release_lock(key, token)
+
+    redis_client.redis_misses += 1
+    token = await _try_lock(key)
+    if token is not None:
+        try:
+            return await _compute_and_store(key, compute, ttl), False
+        finally:
+            await _release_lock(key, token)
+
+    waited = await _wait_for_winner(key)
+    if waited is not None:
+        return waited, True
+    return await _compute_and_store(key, compute, ttl), False
+
+
+# ──────────────────────────────────────────────
+# Versioned namespaces — see redis_client
+# ──────────────────────────────────────────────
+
+async def namespace_versions(namespaces: list) -> list:
+    """Current generation of each namespace — L1 first, then one MGET."""
+    local_cache = redis_client.local_cache
+    keys        = [ns_key(ns) for ns in namespaces]
+    versions    = {}
+    if local_cache is not None:
+        for key in keys:
+            hit, value = local_cache.get(key)
+            if hit:
+                versions[key] = value
+
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        ok, values = await _run(lambda client: client.mget(missing))
+        if not ok:
+            return [redis_client.local_versions.get(ns, 0) for ns in namespaces]
+        for key, value in zip(missing, values):
+            versions[key] = int(value or 0)
+            if local_cache is not None:
+                local_cache.set(key, versions[key], L1_CACHE_TTL)
+    return [versions[key] for key in keys]
+
+
+async def versioned_key(base: str, namespaces: list) -> str:
+    return tag_key(base, namespaces, await namespace_versions(namespaces))
+
+
+async def get_versioned(bases: list, namespaces: list, extra=None):
+    """Async twin of redis_client.get_versioned() — generations and values in one round trip."""
+    local_cache = redis_client.local_cache
+    keys        = local_versioned_keys(bases, namespaces)
+    if keys is not None:
+        found = {}
+        for key in keys:
+            hit, value = redis_client.l1_get(key)
+            if hit:
+                found[key] = value
+        if len(found) == len(keys):
+            if extra:
+                await _run(lambda client: _execute_extra(client, extra))
+            return keys, found
+
+    async def fetch(client):
+        async with client.pipeline(transaction=False) as pipe:
+            queue_versioned_get(pipe, bases, namespaces)
+            if extra:
+                extra(pipe)
+            return (await pipe.execute())[0]
+
+    started   = time.perf_counter()
+    ok, reply = await _run(fetch)
+    elapsed   = time.perf_counter() - started
+    if not ok:
+        keys = fallback_versioned_keys(bases, namespaces)
+        redis_client.record_call("get", keys, elapsed, ok=False)
+        return keys, {}
+
+    keys, values = read_versioned(reply, bases, namespaces)
+    found, sizes = {}, {}
+    for key, (raw, ttl_ms) in zip(keys, values):
+        decoded = codec.decode(raw)
+        if decoded is None:
+            redis_client.redis_misses += 1
+            continue
+        redis_client.redis_hits += 1
+        found[key]  = decoded
+        sizes[key]  = len(raw)
+        if local_cache is not None and ttl_ms > 0:
+            local_cache.set(key, decoded, ttl_ms / 1000)
+    redis_client.record_call("get", keys, elapsed, ok=True, sizes=sizes)
+    return keys, found
+
+
+async def _execute_extra(client, extra):
+    async with client.pipeline(transaction=False) as pipe:
+        extra(pipe)
+        return await pipe.execute()
+
+
+async def bump_namespaces(*namespaces: str):
+    """Invalidate everything depending on `namespaces` — one pipelined INCR each."""
+    if not namespaces:
+        return
+    keys = [ns_key(ns) for ns in namespaces]
+    for ns in namespaces:
+        redis_client.local_versions[ns] = redis_client.local_versions.get(ns, 0) + 1
+    if redis_client.local_cache is not None:
+        redis_client.local_cache.delete(*keys)
+
+    async def bump(client):
+        async with client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.incr(key)
+                pipe.publish(INVALIDATION_CHANNEL, key)
+            await pipe.execute()
+
+    await _run(bump)
@@ -0,0 +1,61 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency that keeps failing, and re-probes it with backoff.
+
+    closed    → every call goes through
+    open      → calls are refused until `retry_at`
+    half-open → once `retry_at` passes, exactly one caller is let through
+                as a probe; success closes the circuit, failure re-opens it
+                with the delay doubled (up to `max_delay`)
+
+    Args:
+        base_delay : seconds the circuit stays open after the first failure
+        max_delay  : cap on the exponential backoff
+        clock      : time source, injectable for tests
+    """
+
+    CLOSED    = "closed"
+    OPEN      = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, clock=time.monotonic):
+        self.base_delay = base_delay
+        self.max_delay  = max_delay
+        self.state      = self.CLOSED
+        self.failures   = 0
+        self.opened     = 0           # how many times the circuit has opened
+        self._retry_at  = 0.0
+        self._clock     = clock
+        self._lock      = threading.Lock()
+
+    def allow(self) -> bool:
+        """May the caller try the dependency now?"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self._clock() >= self._retry_at:
+                self.state = self.HALF_OPEN   # this caller is the probe
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state    = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state != self.OPEN:
+                self.opened += 1
+            delay          = min(self.base_delay * 2 ** (self.failures - 1), self.max_delay)
+            self.state     = self.OPEN
+            self._retry_at = self._clock() + delay
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == self.CLOSED
@@ -0,0 +1,113 @@
+import json
+import os
+import zlib
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:   # optional — zlib is always available
+    lz4_frame = None
+
+# ──────────────────────────────────────────────
+# Wire format for cached values
+# ──────────────────────────────────────────────
+#
+#   byte 0   format version — values written by another version read as a
+#            miss and are recomputed, so the layout can change safely
+#   byte 1   flags: layout (low nibble) | compression (high nibble)
+#   rest     body
+#
+# Search results, top-rated lists and recommendations are lists of dicts
+# with the same keys; the columnar layout stores those keys once instead
+# of once per row.
+
+CODEC_VERSION = 1
+
+LAYOUT_JSON     = 0x01   # any JSON value
+LAYOUT_COLUMNAR = 0x02   # [[field, ...], [[value, ...], ...]]
+
+COMPRESS_NONE = 0x00
+COMPRESS_ZLIB = 0x10
+COMPRESS_LZ4  = 0x20
+
+COMPRESSORS = {"none": COMPRESS_NONE, "zlib": COMPRESS_ZLIB, "lz4": COMPRESS_LZ4}
+
+# Bodies at least this big are compressed (and kept compressed only if that helps)
+COMPRESSION  = os.environ.get("MEDIA_CACHE_COMPRESSION", "zlib")
+COMPRESS_MIN = int(os.environ.get("MEDIA_CACHE_COMPRESS_MIN", "512"))
+
+if COMPRESSION not in COMPRESSORS:
+    raise ValueError(f"Invalid cache compression '{COMPRESSION}'. Choose from: {list(COMPRESSORS)}")
+if COMPRESSION == "lz4" and lz4_frame is None:
+    raise ValueError("MEDIA_CACHE_COMPRESSION=lz4 needs the lz4 package (pip install lz4)")
+
+
+def _columns(value):
+    """The shared field names if `value` is a non-empty list of same-shaped dicts, else None."""
+    if not isinstance(value, list) or not value or not isinstance(value[0], dict):
+        return None
+    fields = list(value[0])
+    for row in value:
+        if not isinstance(row, dict) or list(row) != fields:
+            return None
+    return fields
+
+
+def _compress(kind: int, body: bytes) -> bytes:
+    if kind == COMPRESS_ZLIB:
+        return zlib.compress(body, 6)
+    return lz4_frame.compress(body)
+
+
+def _decompress(kind: int, body: bytes) -> bytes:
+    if kind == COMPRESS_NONE:
+        return body
+    if kind == COMPRESS_ZLIB:
+        return zlib.decompress(body)
+    if kind == COMPRESS_LZ4 and lz4_frame is not None:
+        return lz4_frame.decompress(body)
+    raise ValueError(f"Unsupported compression flag {kind:#x}")
+
+
+def encode(value, compression: str = None, compress_min: int = None) -> bytes:
+    """Serialize a JSON-compatible value for the cache."""
+    compression  = compression or COMPRESSION
+    compress_min = COMPRESS_MIN if compress_min is None else compress_min
+
+    fields = _columns(value)
+    if fields is not None:
+        layout = LAYOUT_COLUMNAR
+        data   = [fields, [[row[f] for f in fields] for row in value]]
+    else:
+        layout = LAYOUT_JSON
+        data   = value
+    body = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+
+    kind = COMPRESSORS[compression]
+    if kind != COMPRESS_NONE and len(body) >= compress_min:
+        packed = _compress(kind, body)
+        if len(packed) < len(body):
+            return bytes((CODEC_VERSION, layout | kind)) + packed
+    return bytes((CODEC_VERSION, layout)) + body
+
+
+def decode(data):
+    """
+    Inverse of encode(). Returns None for anything it cannot read — values
+    from another codec version, or written before there was a codec — so
+    callers treat them as a cache miss.
+    """
+    if not data or len(data) < 2 or data[0] != CODEC_VERSION:
+        return None
+    flags  = data[1]
+    layout = flags & 0x0F
+    try:
+        body = _decompress(flags & 0xF0, data[2:])
+        data = json.loads(body)
+    except (ValueError, RuntimeError, zlib.error):
+        return None
+    if layout == LAYOUT_COLUMNAR:
+        fields, rows = data
+        return [dict(zip(fields, row)) for row in rows]
+    if layout == LAYOUT_JSON:
+        return data
+    return None
@@ -0,0 +1,72 @@
+import fnmatch
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    """
+    In-process LRU cache with a per-entry expiry — the L1 tier in front of Redis.
+
+    Values are stored decoded and handed out as-is (no copy), so callers
+    must treat anything returned from the cache as read-only.
+
+    Args:
+        max_entries : entries kept before the least recently used is evicted
+        max_ttl     : upper bound on any entry's lifetime, in seconds — limits
+                      how stale a copy can get if an invalidation is missed
+        clock       : time source, injectable for tests
+    """
+
+    def __init__(self, max_entries: int, max_ttl: float, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_ttl     = max_ttl
+        self.hits        = 0
+        self.misses      = 0
+        self._clock      = clock
+        self._entries    = OrderedDict()   # key → (expires_at, value)
+        self._lock       = threading.Lock()
+
+    def get(self, key: str):
+        """Return (found, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key: str, value, ttl: float):
+        ttl = min(ttl, self.max_ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def delete_matching(self, pattern: str):
+        """Drop every key matching a Redis-style glob pattern."""
+        with self._lock:
+            for key in [k for k in self._entries if fnmatch.fnmatchcase(k, pattern)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,175 @@
+import threading
+from collections import defaultdict
+
+# ──────────────────────────────────────────────
+# Per-prefix cache metrics
+# ──────────────────────────────────────────────
+#
+# Counters are kept per (key prefix, operation) — "search", "top_rated",
+# "recommendations", ... × "get" / "set" — so a TTL that is too short for
+# one kind of result shows up on its own instead of being averaged away.
+# "hits"/"misses" are the shared tier (L2 — Redis or the SQLite file);
+# "l1_hits"/"l1_misses" count lookups in the in-process L1 in front of it.
+# Calls and latency are L2 round trips only — an L1 lookup costs none.
+
+# Upper bounds of the latency histogram buckets, in seconds (+Inf is implied)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+COUNTERS = ("hits", "misses", "l1_hits", "l1_misses", "stored", "errors", "bytes", "count", "latency_sum")
+RESULTS  = (("hits", "hit"), ("misses", "miss"), ("errors", "error"))
+
+
+def key_prefix(key: str) -> str:
+    """"search:dune@media=3" → "search" — and "facets@media=3" → "facets", never the whole key."""
+    return key.split("@", 1)[0].split(":", 1)[0]
+
+
+def bucket_field(le) -> str:
+    return f"le_{le}"
+
+
+BUCKET_FIELDS = [bucket_field(le) for le in LATENCY_BUCKETS] + [bucket_field("inf")]
+
+
+def _empty() -> dict:
+    return dict.fromkeys(COUNTERS + tuple(BUCKET_FIELDS), 0)
+
+
+class CacheMetrics:
+    """
+    Thread-safe counters for one process.
+
+    Latency buckets are stored non-cumulative (each observation lands in
+    exactly one bucket) so snapshots from several processes can simply be
+    added; exporters make them cumulative.
+    """
+
+    def __init__(self):
+        self._series = defaultdict(_empty)   # (prefix, op) → {field: value}
+        self._lock   = threading.Lock()
+
+    def record(self, prefix: str, op: str, seconds: float, hits: int = 0, misses: int = 0,
+               stored: int = 0, errors: int = 0, nbytes: int = 0):
+        """
+        One cache call for `prefix` — key counters are added, latency is
+        observed once. `errors` counts keys the call failed for.
+        """
+        bucket = next((le for le in LATENCY_BUCKETS if seconds <= le), "inf")
+        with self._lock:
+            series = self._series[(prefix, op)]
+            series["hits"]        += hits
+            series["misses"]      += misses
+            series["stored"]      += stored
+            series["errors"]      += errors
+            series["bytes"]       += nbytes
+            series["count"]       += 1
+            series["latency_sum"] += seconds
+            series[bucket_field(bucket)] += 1
+
+    def record_l1(self, prefix: str, hit: bool):
+        """One L1 lookup for `prefix` — no round trip, so no latency."""
+        with self._lock:
+            self._series[(prefix, "get")]["l1_hits" if hit else "l1_misses"] += 1
+
+    def drain(self) -> dict:
+        """Return everything recorded since the last drain and reset."""
+        with self._lock:
+            series, self._series = self._series, defaultdict(_empty)
+        return {key: dict(fields) for key, fields in series.items()}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {key: dict(fields) for key, fields in self._series.items()}
+
+
+def merge(into: dict, series: dict):
+    """Add the fields of one snapshot into another, in place."""
+    for key, fields in series.items():
+        target = into.setdefault(key, _empty())
+        for field, value in fields.items():
+            target[field] = target.get(field, 0) + value
+    return into
+
+
+# ──────────────────────────────────────────────
+# Export
+# ──────────────────────────────────────────────
+
+def _ratio(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+def _tier(hits, misses) -> tuple:
+    """(hits, misses, hit %) columns for one tier — dashes when it saw no lookups."""
+    if not hits and not misses:
+        return "-", "-", "-"
+    return int(hits), int(misses), f"{_ratio(hits, misses):.0%}"
+
+
+def format_table(series: dict) -> str:
+    lines = [
+        f"{'':<24}{' L1 (in-process) ':─^22} {' L2 (shared) ':─^58}",
+        f"{'Prefix':<18} {'Op':<4} {'Hits':>7} {'Misses':>7} {'Hit %':>6} "
+        f"{'Calls':>7} {'Hits':>7} {'Misses':>7} {'Errors':>7} {'Hit %':>6} {'Bytes':>10} {'Avg ms':>8}",
+        "─" * 107,
+    ]
+    totals = dict.fromkeys(COUNTERS, 0)
+    for (prefix, op), f in sorted(series.items()):
+        avg_ms = f["latency_sum"] / f["count"] * 1000 if f["count"] else 0.0
+        if op == "get":
+            l1 = _tier(f["l1_hits"], f["l1_misses"])
+            l2 = _tier(f["hits"], f["misses"])
+            for field in ("hits", "misses", "l1_hits", "l1_misses"):
+                totals[field] += f[field]
+        else:
+            l1 = l2 = ("-", "-", "-")
+        lines.append(
+            f"{prefix:<18} {op:<4} {l1[0]:>7} {l1[1]:>7} {l1[2]:>6} "
+            f"{int(f['count']):>7} {l2[0]:>7} {l2[1]:>7} {int(f['errors']):>7} {l2[2]:>6} "
+            f"{int(f['bytes']):>10} {avg_ms:>8.2f}"
+        )
+    lines.append("─" * 107)
+    for name, hits, misses in (("L1", "l1_hits", "l1_misses"), ("L2", "hits", "misses")):
+        h, m, ratio = _tier(totals[hits], totals[misses])
+        lines.append(f"{name + ' total':<24}hits {h}, misses {m}, hit ratio {ratio}")
+    return "\n".join(lines)
+
+
+def format_prometheus(series: dict) -> str:
+    """The Prometheus text exposition format."""
+    lines = [
+        "# HELP media_cache_requests_total Cache operations by key prefix, tier (l1 in-process, l2 shared) and result.",
+        "# TYPE media_cache_requests_total counter",
+    ]
+    for (prefix, op), f in sorted(series.items()):
+        if op == "get":
+            results = [("l1", "hit", f["l1_hits"]), ("l1", "miss", f["l1_misses"])]
+            results += [("l2", result, f[field]) for field, result in RESULTS]
+        else:
+            results = [("l2", "stored", f["stored"]), ("l2", "error", f["errors"])]
+        for tier, result, value in results:
+            labels = f'prefix="{prefix}",op="{op}",tier="{tier}",result="{result}"'
+            lines.append(f"media_cache_requests_total{{{labels}}} {int(value)}")
+
+    lines += [
+        "# HELP media_cache_bytes_total Encoded bytes read from or written to the cache.",
+        "# TYPE media_cache_bytes_total counter",
+    ]
+    for (prefix, op), f in sorted(series.items()):
+        lines.append(f'media_cache_bytes_total{{prefix="{prefix}",op="{op}"}} {int(f["bytes"])}')
+
+    lines += [
+        "# HELP media_cache_latency_seconds Cache round-trip time per call.",
+        "# TYPE media_cache_latency_seconds histogram",
+    ]
+    for (prefix, op), f in sorted(series.items()):
+        labels     = f'prefix="{prefix}",op="{op}"'
+        cumulative = 0
+        for le in LATENCY_BUCKETS + ("inf",):
+            cumulative += int(f[bucket_field(le)])
+            bound       = "+Inf" if le == "inf" else le
+            lines.append(f'media_cache_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"media_cache_latency_seconds_sum{{{labels}}} {f['latency_sum']:.6f}")
+        lines.append(f"media_cache_latency_seconds_count{{{labels}}} {int(f['count'])}")
+    return "\n".join(lines) + "\n"
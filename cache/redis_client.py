@@ -1,24 +1,104 @@
+import atexit
 import redis
-import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from cache import codec, metrics as cache_metrics
+from cache.circuit_breaker import CircuitBreaker
+from cache.local_cache import LocalCache
+from cache.sqlite_cache import SQLiteCache
 
 # ──────────────────────────────────────────────
-# Connection
+# Connection (opened lazily, guarded by a circuit breaker)
 # ──────────────────────────────────────────────
 
-try:
-    client = redis.Redis(
-        host="localhost",
-        port=6379,
+REDIS_HOST = "localhost"
+REDIS_PORT = 6379
+
+# Where cached values live:
+#   redis  → the Redis server above (default)
+#   sqlite → a side SQLite file, for single-host deployments without Redis;
+#            cached results still survive from one CLI call to the next
+CACHE_BACKENDS    = ["redis", "sqlite"]
+CACHE_BACKEND     = os.environ.get("MEDIA_CACHE_BACKEND", "redis")
+CACHE_PATH        = os.environ.get("MEDIA_CACHE_PATH", "media_cache.db")
+CACHE_MAX_ENTRIES = int(os.environ.get("MEDIA_CACHE_MAX_ENTRIES", "10000"))
+
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ValueError(f"Invalid cache backend '{CACHE_BACKEND}'. Choose from: {CACHE_BACKENDS}")
+
+# Budget for a single Redis operation, connect included. Redis is a cache —
+# when it is slow or down, falling through to SQLite is always cheaper.
+REDIS_TIMEOUT = float(os.environ.get("MEDIA_REDIS_TIMEOUT_MS", "50")) / 1000
+
+# After a failure the circuit stays open for 1s, 2s, 4s, ... up to 60s,
+# then one call is let through to re-probe the server
+breaker = CircuitBreaker(base_delay=1.0, max_delay=60.0)
+
+_client      = None
+_client_lock = threading.Lock()
+_warned      = False
+
+
+def _new_client(socket_timeout=REDIS_TIMEOUT):
+    # Constructing a client does not connect — the first command does.
+    # Values are binary (see cache/codec.py), so responses stay bytes.
+    return redis.Redis(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
         db=0,
-        decode_responses=True,
-        socket_connect_timeout=2
+        decode_responses=False,
+        socket_connect_timeout=REDIS_TIMEOUT,
+        socket_timeout=socket_timeout
     )
-    client.ping()
-    REDIS_AVAILABLE = True
-    print("✅ Redis connected successfully")
-except Exception:
-    REDIS_AVAILABLE = False
-    print("⚠️  Redis not available — running without cache")
+
+
+def get_client():
+    """The shared cache client — Redis or the SQLite file — created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if CACHE_BACKEND == "sqlite":
+                    _client = SQLiteCache(CACHE_PATH, CACHE_MAX_ENTRIES, timeout=REDIS_TIMEOUT)
+                else:
+                    _client = _new_client()
+    return _client
+
+
+def redis_available() -> bool:
+    """False while the circuit is open — Redis failed recently and is not being retried yet."""
+    return breaker.is_closed
+
+
+def _run(operation):
+    """
+    Run operation(client) unless the circuit is open.
+
+    Returns (ok, result). Connection errors and timeouts open the circuit;
+    any other error only fails this one call.
+    """
+    global _warned
+    if not breaker.allow():
+        return False, None
+    try:
+        result = operation(get_client())
+    except (redis.ConnectionError, redis.TimeoutError):
+        breaker.record_failure()
+        if not _warned:
+            _warned = True
+            print("⚠️  Redis not available — running without cache", file=sys.stderr)
+        return False, None
+    except Exception:
+        breaker.record_success()
+        return False, None
+    breaker.record_success()
+    _ensure_listener()
+    return True, result
 
 
 # ──────────────────────────────────────────────
@@ -29,60 +109,746 @@ TTL_TOP_RATED = 300   # 5 minutes
 TTL_SEARCH    = 120   # 2 minutes
 TTL_REVIEWS   = 60    # 1 minute
 TTL_RECOMMENDATIONS = 180   # 3 minutes
+TTL_SEARCH_EMPTY    = 30    # 30 seconds — searches that found nothing (typos)
+TTL_BROWSE          = 120   # 2 minutes — --browse pages and facet counts
+
+# ──────────────────────────────────────────────
+# L1 — in-process cache in front of Redis (optional)
+# ──────────────────────────────────────────────
+
+L1_CACHE_SIZE = int(os.environ.get("MEDIA_L1_CACHE_SIZE", "0"))     # entries; 0 = off
+L1_CACHE_TTL  = float(os.environ.get("MEDIA_L1_CACHE_TTL", "30"))   # max seconds per entry
+
+# delete_cache() publishes the key here so every process drops its L1 copy;
+# "*" means flush everything
+INVALIDATION_CHANNEL = "media_review:invalidate"
+INVALIDATE_ALL       = "*"
+
+# The SQLite backend has no pub/sub to carry those messages, so another
+# process's L1 could serve a deleted value for up to L1_CACHE_TTL — L1 is
+# only used in front of Redis
+if L1_CACHE_SIZE > 0 and CACHE_BACKEND != "redis":
+    print(f"⚠️  MEDIA_L1_CACHE_SIZE ignored — no L1 with the {CACHE_BACKEND} cache backend", file=sys.stderr)
+local_cache = LocalCache(L1_CACHE_SIZE, L1_CACHE_TTL) if L1_CACHE_SIZE > 0 and CACHE_BACKEND == "redis" else None
+
+# Redis-tier counters — the L1 keeps its own
+redis_hits   = 0
+redis_misses = 0
+
+
+def l1_get(key: str):
+    """local_cache.get() that also counts the lookup in the per-prefix metrics."""
+    hit, value = local_cache.get(key)
+    metrics.record_l1(cache_metrics.key_prefix(key), hit)
+    return hit, value
+
+
+_listener      = None
+_listener_lock = threading.Lock()
+
+
+def _listen_for_invalidations():
+    """Evict L1 entries as other processes delete them. Runs in a daemon thread."""
+    delay = breaker.base_delay
+    while True:
+        try:
+            # Its own connection without a read timeout — listen() blocks
+            pubsub = _new_client(socket_timeout=None).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            delay = breaker.base_delay
+            for message in pubsub.listen():
+                key = message["data"].decode()
+                if key == INVALIDATE_ALL:
+                    local_cache.clear()
+                else:
+                    local_cache.delete(key)
+        except Exception:
+            # Messages may have been missed while disconnected — drop everything
+            local_cache.clear()
+            time.sleep(delay)
+            delay = min(delay * 2, breaker.max_delay)
+
+
+def _ensure_listener():
+    """Start the invalidation listener once Redis is known to be reachable."""
+    global _listener
+    # The SQLite backend has no pub/sub — L1 entries just expire on their TTL
+    if local_cache is None or _listener is not None or CACHE_BACKEND != "redis":
+        return
+    with _listener_lock:
+        if _listener is None:
+            _listener = threading.Thread(target=_listen_for_invalidations, name="l1-invalidation", daemon=True)
+            _listener.start()
+
+
+# ──────────────────────────────────────────────
+# Metrics — per key prefix, shared across processes
+# ──────────────────────────────────────────────
+
+# Each process counts locally and adds its counters into plain
+# `cache_stats:<prefix>:<op>:<field>` keys (no TTL) every few seconds and
+# at exit, so `--cache-stats` sees the sum over every CLI call and server.
+STATS_PREFIX           = "cache_stats"
+METRICS_FLUSH_INTERVAL = 10.0
+
+metrics             = cache_metrics.CacheMetrics()
+_metrics_flushed_at = time.monotonic()
+
+
+def record_call(op: str, keys: list, seconds: float, ok: bool, sizes: dict = None):
+    """
+    Record one round trip over `keys`. `sizes` maps the keys that were found
+    (get) or written (set) to their encoded size.
+    """
+    sizes     = sizes or {}
+    by_prefix = {}
+    for key in keys:
+        by_prefix.setdefault(cache_metrics.key_prefix(key), []).append(key)
+    for prefix, group in by_prefix.items():
+        found = sum(key in sizes for key in group)
+        metrics.record(
+            prefix, op, seconds,
+            hits=found if op == "get" else 0,
+            misses=len(group) - found if ok and op == "get" else 0,
+            stored=found if op == "set" else 0,
+            errors=0 if ok else len(group),
+            nbytes=sum(sizes.get(key, 0) for key in group),
+        )
+    if time.monotonic() - _metrics_flushed_at >= METRICS_FLUSH_INTERVAL:
+        flush_metrics()
+
+
+def _stats_key(prefix: str, op: str, field: str) -> str:
+    return f"{STATS_PREFIX}:{prefix}:{op}:{field}"
+
+
+def flush_metrics():
+    """Add this process's counters into the shared ones. Dropped if the cache is unreachable."""
+    global _metrics_flushed_at
+    _metrics_flushed_at = time.monotonic()
+    series = metrics.drain()
+    if not series:
+        return
+
+    def push(client):
+        pipe = client.pipeline(transaction=False)
+        for (prefix, op), fields in series.items():
+            for field, value in fields.items():
+                if not value:
+                    continue
+                if field == "latency_sum":
+                    pipe.incrbyfloat(_stats_key(prefix, op, field), value)
+                else:
+                    pipe.incrby(_stats_key(prefix, op, field), int(value))
+        pipe.execute()
+
+    _run(push)
+
+
+atexit.register(flush_metrics)
+
+
+def load_metrics():
+    """
+    Counters summed over every process that flushed, plus this one's
+    unflushed counts. Returns (shared, series) — shared is False when the
+    cache is unreachable and only this process's counters are included.
+    """
+    def fetch(client):
+        keys   = []
+        cursor = 0
+        while True:
+            cursor, page = client.scan(cursor=cursor, match=f"{STATS_PREFIX}:*", count=500)
+            keys.extend(k.decode() if isinstance(k, bytes) else k for k in page)
+            if cursor == 0:
+                break
+        return keys, (client.mget(keys) if keys else [])
+
+    series     = {}
+    ok, result = _run(fetch)
+    if ok:
+        for key, value in zip(*result):
+            _, prefix, op, field = key.split(":", 3)
+            if value is not None:
+                cache_metrics.merge(series, {(prefix, op): {field: float(value)}})
+    return ok, cache_metrics.merge(series, metrics.snapshot())
+
 
 # ──────────────────────────────────────────────
 # Core helpers
 # ──────────────────────────────────────────────
 
 def get_cache(key: str):
-    """Get a value from Redis cache."""
-    if not REDIS_AVAILABLE:
-        return None
-    try:
-        value = client.get(key)
-        if value:
-            return json.loads(value)
-        return None
-    except Exception:
-        return None
+    """Get a value from the L1 cache, falling back to Redis."""
+    return get_many([key]).get(key)
+
+
+def get_many(keys: list) -> dict:
+    """
+    Fetch several keys — L1 first, then every remaining key in one pipelined
+    round trip. Returns {key: value} for the keys that were found.
+    """
+    global redis_hits, redis_misses
+    found   = {}
+    missing = []
+    for key in keys:
+        if local_cache is not None:
+            hit, value = l1_get(key)
+            if hit:
+                found[key] = value
+                continue
+        missing.append(key)
+    if not missing:
+        return found
+
+    def fetch(client):
+        # Fetch each remaining TTL in the same round trip so L1 copies
+        # never outlive the Redis ones
+        pipe = client.pipeline(transaction=False)
+        for key in missing:
+            pipe.get(key)
+            pipe.pttl(key)
+        return pipe.execute()
+
+    started     = time.perf_counter()
+    ok, results = _run(fetch)
+    elapsed     = time.perf_counter() - started
+    if not ok:
+        record_call("get", missing, elapsed, ok=False)
+        return found
+
+    sizes = {}
+    for key, value, ttl_ms in zip(missing, results[0::2], results[1::2]):
+        decoded = codec.decode(value)
+        if decoded is None:
+            redis_misses += 1
+            continue
+        redis_hits += 1
+        found[key] = decoded
+        sizes[key] = len(value)
+        if local_cache is not None and ttl_ms > 0:
+            local_cache.set(key, decoded, ttl_ms / 1000)
+    record_call("get", missing, elapsed, ok=True, sizes=sizes)
+    return found
 
 
 def set_cache(key: str, value, ttl: int):
-    """Store a value in Redis cache with expiry time."""
-    if not REDIS_AVAILABLE:
+    """Store a value in the L1 cache and in Redis with expiry time."""
+    set_many({key: (value, ttl)})
+
+
+def set_many(items: dict):
+    """Store {key: (value, ttl)} in the L1 cache and in Redis, one round trip."""
+    if not items:
         return
-    try:
-        client.setex(key, ttl, json.dumps(value))
-    except Exception:
-        pass
+    if local_cache is not None:
+        for key, (value, ttl) in items.items():
+            local_cache.set(key, value, ttl)
+
+    encoded = {key: (codec.encode(value), ttl) for key, (value, ttl) in items.items()}
+
+    def store(client):
+        pipe = client.pipeline(transaction=False)
+        for key, (data, ttl) in encoded.items():
+            pipe.setex(key, ttl, data)
+        pipe.execute()
+
+    started = time.perf_counter()
+    ok, _   = _run(store)
+    record_call("set", list(encoded), time.perf_counter() - started, ok=ok,
+            sizes={key: len(data) for key, (data, _) in encoded.items()} if ok else None)
 
 
 def delete_cache(key: str):
-    """Delete a specific cache key."""
-    if not REDIS_AVAILABLE:
+    """Delete a specific cache key here, in Redis and in every other process's L1."""
+    delete_many([key])
+
+
+def delete_many(keys: list):
+    """Delete several keys here, in Redis and in every other process's L1 — one round trip."""
+    keys = list(keys)
+    if not keys:
         return
-    try:
-        client.delete(key)
-    except Exception:
-        pass
+    if local_cache is not None:
+        local_cache.delete(*keys)
+
+    def delete(client):
+        # Publish even with L1 off here — other processes may have it on
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(*keys)
+        for key in keys:
+            pipe.publish(INVALIDATION_CHANNEL, key)
+        pipe.execute()
+
+    _run(delete)
+
+
+def delete_by_pattern(pattern: str, batch: int = 500) -> int:
+    """
+    Delete every key matching a glob pattern, e.g. "top_rated:*".
+
+    Walks the keyspace with SCAN (never KEYS, which blocks the server) and
+    deletes each page of matches in one pipelined round trip. Returns the
+    number of keys deleted.
+    """
+    if local_cache is not None:
+        local_cache.delete_matching(pattern)
+
+    def delete(client):
+        deleted = 0
+        cursor  = 0
+        while True:
+            cursor, keys = client.scan(cursor=cursor, match=pattern, count=batch)
+            if keys:
+                pipe = client.pipeline(transaction=False)
+                pipe.delete(*keys)
+                for key in keys:
+                    pipe.publish(INVALIDATION_CHANNEL, key)
+                deleted += pipe.execute()[0]
+            if cursor == 0:
+                return deleted
+
+    ok, deleted = _run(delete)
+    return deleted if ok else 0
 
 
 def flush_all_cache():
     """Clear entire cache — useful after bulk operations."""
-    if not REDIS_AVAILABLE:
-        return
-    try:
+    if local_cache is not None:
+        local_cache.clear()
+
+    def flush(client):
         client.flushdb()
+        client.publish(INVALIDATION_CHANNEL, INVALIDATE_ALL)
+
+    ok, _ = _run(flush)
+    if ok:
         print("🗑️  Cache cleared.")
-    except Exception:
-        pass
 
 
 def cache_exists(key: str) -> bool:
     """Check if a key exists in cache."""
-    if not REDIS_AVAILABLE:
+    ok, count = _run(lambda client: client.exists(key))
+    return ok and count > 0
+
+
+# ──────────────────────────────────────────────
+# Popular search terms — what --warm-cache precomputes
+# ──────────────────────────────────────────────
+
+SEARCH_TERMS_KEY  = "search_terms"
+SEARCH_TERMS_KEEP = 1000    # sorted set trimmed to the most searched terms
+
+
+def queue_search_term(pipe, term: str):
+    """Queue the commands that count one search for `term` (lower-cased, like the search cache key)."""
+    pipe.zincrby(SEARCH_TERMS_KEY, 1, term.lower())
+    pipe.zremrangebyrank(SEARCH_TERMS_KEY, 0, -(SEARCH_TERMS_KEEP + 1))
+
+
+def record_search_term(term: str):
+    """Count one search for `term` in its own round trip — see queue_search_term()."""
+    _run(lambda client: _execute_extra(client, lambda pipe: queue_search_term(pipe, term)))
+
+
+def top_search_terms(count: int) -> list:
+    """The `count` most searched terms, most popular first."""
+    ok, terms = _run(lambda client: client.zrevrange(SEARCH_TERMS_KEY, 0, count - 1))
+    if not ok:
+        return []
+    return [t.decode() if isinstance(t, bytes) else t for t in terms]
+
+
+# ──────────────────────────────────────────────
+# Versioned namespaces
+# ──────────────────────────────────────────────
+
+# Every cached result names the namespaces it depends on, and the current
+# generation of each is baked into its key. A write bumps a namespace with
+# one INCR — every dependent key is then simply never read again and ages
+# out on its TTL. No SCAN, no list of keys to remember.
+NS_MEDIA   = "media"       # the catalog: titles added or changed
+NS_RATINGS = "ratings"     # any review inserted or updated
+
+
+def user_namespace(user_id: int) -> str:
+    """Things derived from one user's own reviews (recommendations)."""
+    return f"user:{user_id}"
+
+
+def ns_key(namespace: str) -> str:
+    return f"ns:{namespace}"
+
+
+# Generations used while Redis is unreachable — only the L1 tier is
+# caching then, so process-local counters are enough
+local_versions = {}
+
+
+def namespace_versions(namespaces: list) -> list:
+    """Current generation of each namespace — L1 first, then one MGET."""
+    keys     = [ns_key(ns) for ns in namespaces]
+    versions = {}
+    if local_cache is not None:
+        for key in keys:
+            hit, value = local_cache.get(key)
+            if hit:
+                versions[key] = value
+
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        ok, values = _run(lambda client: client.mget(missing))
+        if not ok:
+            return [local_versions.get(ns, 0) for ns in namespaces]
+        for key, value in zip(missing, values):
+            versions[key] = int(value or 0)
+            if local_cache is not None:
+                local_cache.set(key, versions[key], L1_CACHE_TTL)
+    return [versions[key] for key in keys]
+
+
+def versioned_key(base: str, namespaces: list) -> str:
+    """
+    `base` tagged with the generation of every namespace it depends on,
+    e.g. versioned_key("top_rated:5", [NS_RATINGS]) → "top_rated:5@ratings=12".
+    """
+    return tag_key(base, namespaces, namespace_versions(namespaces))
+
+
+def versioned_keys(bases: list, namespaces: list) -> list:
+    """versioned_key() for several keys with the same dependencies — one version lookup."""
+    versions = namespace_versions(namespaces)
+    return [tag_key(base, namespaces, versions) for base in bases]
+
+
+def tag_key(base: str, namespaces: list, versions: list) -> str:
+    tags = ",".join(f"{ns}={v}" for ns, v in zip(namespaces, versions))
+    return f"{base}@{tags}"
+
+
+# Resolves versioned keys on the server, so reading a cached result costs one
+# round trip instead of an MGET for the generations and then a GET.
+# KEYS: ns:<name> per namespace. ARGV: the namespace names, then base keys.
+# Returns each generation, then value and PTTL of every tagged key.
+# The tagged keys are not declared in KEYS — fine on a single Redis server.
+_GET_VERSIONED = """-- get_versioned
+local versions, tags = {}, {}
+for i, key in ipairs(KEYS) do
+    versions[i] = tonumber(redis.call('get', key) or '0')
+    tags[i]     = ARGV[i] .. '=' .. versions[i]
+end
+local tag, out = '@' .. table.concat(tags, ','), {}
+for i = 1, #versions do out[i] = versions[i] end
+for j = #KEYS + 1, #ARGV do
+    out[#out + 1] = redis.call('get', ARGV[j] .. tag)
+    out[#out + 1] = redis.call('pttl', ARGV[j] .. tag)
+end
+return out
+"""
+
+
+def queue_versioned_get(pipe, bases: list, namespaces: list):
+    """Queue the get_versioned script on a (sync or async) pipeline."""
+    pipe.eval(_GET_VERSIONED, len(namespaces), *(ns_key(ns) for ns in namespaces), *namespaces, *bases)
+
+
+def read_versioned(reply: list, bases: list, namespaces: list):
+    """Split a get_versioned reply into (keys, [(raw value, ttl_ms)]) and keep the generations in L1."""
+    count    = len(namespaces)
+    versions = [int(v) for v in reply[:count]]
+    if local_cache is not None:
+        for ns, version in zip(namespaces, versions):
+            local_cache.set(ns_key(ns), version, L1_CACHE_TTL)
+    keys = [tag_key(base, namespaces, versions) for base in bases]
+    return keys, list(zip(reply[count::2], reply[count + 1::2]))
+
+
+def local_versioned_keys(bases: list, namespaces: list):
+    """The versioned keys from generations held in L1, or None if any is missing."""
+    if local_cache is None:
+        return None
+    versions = []
+    for ns in namespaces:
+        hit, version = local_cache.get(ns_key(ns))
+        if not hit:
+            return None
+        versions.append(version)
+    return [tag_key(base, namespaces, versions) for base in bases]
+
+
+def fallback_versioned_keys(bases: list, namespaces: list) -> list:
+    """The versioned keys from this process's own generations — for when Redis is down."""
+    versions = [local_versions.get(ns, 0) for ns in namespaces]
+    return [tag_key(base, namespaces, versions) for base in bases]
+
+
+def get_versioned(bases: list, namespaces: list, extra=None):
+    """
+    versioned_keys() and get_many() in one round trip — the script above
+    resolves the generations and reads the tagged keys on the server.
+    `extra(pipe)` queues more commands (e.g. a search counter) into the
+    same pipeline. Returns (keys, {key: value}) for the keys found.
+    """
+    global redis_hits, redis_misses
+    keys = local_versioned_keys(bases, namespaces)
+    if keys is not None:
+        found = {}
+        for key in keys:
+            hit, value = l1_get(key)
+            if hit:
+                found[key] = value
+        if len(found) == len(keys):
+            if extra:
+                _run(lambda client: _execute_extra(client, extra))
+            return keys, found
+
+    def fetch(client):
+        pipe = client.pipeline(transaction=False)
+        queue_versioned_get(pipe, bases, namespaces)
+        if extra:
+            extra(pipe)
+        return pipe.execute()[0]
+
+    started    = time.perf_counter()
+    ok, reply  = _run(fetch)
+    elapsed    = time.perf_counter() - started
+    if not ok:
+        keys = fallback_versioned_keys(bases, namespaces)
+        record_call("get", keys, elapsed, ok=False)
+        return keys, {}
+
+    keys, values = read_versioned(reply, bases, namespaces)
+    found, sizes = {}, {}
+    for key, (raw, ttl_ms) in zip(keys, values):
+        decoded = codec.decode(raw)
+        if decoded is None:
+            redis_misses += 1
+            continue
+        redis_hits   += 1
+        found[key]    = decoded
+        sizes[key]    = len(raw)
+        if local_cache is not None and ttl_ms > 0:
+            local_cache.set(key, decoded, ttl_ms / 1000)
+    record_call("get", keys, elapsed, ok=True, sizes=sizes)
+    return keys, found
+
+
+def _execute_extra(client, extra):
+    pipe = client.pipeline(transaction=False)
+    extra(pipe)
+    return pipe.execute()
+
+
+def bump_namespaces(*namespaces: str):
+    """Invalidate everything depending on `namespaces` — one pipelined INCR each."""
+    if not namespaces:
+        return
+    keys = [ns_key(ns) for ns in namespaces]
+    for ns in namespaces:
+        local_versions[ns] = local_versions.get(ns, 0) + 1
+    if local_cache is not None:
+        local_cache.delete(*keys)
+
+    def bump(client):
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+            pipe.publish(INVALIDATION_CHANNEL, key)   # other processes' L1 copies
+        pipe.execute()
+
+    _run(bump)
+
+
+# ──────────────────────────────────────────────
+# Stampede protection — single-flight + early refresh
+# ──────────────────────────────────────────────
+
+LOCK_TTL_MS  = 5000    # a crashed winner blocks recomputation at most this long
+LOCK_WAIT    = 2.0     # how long losers wait for the winner before computing anyway
+LOCK_POLL    = 0.05
+EARLY_BETA   = 1.0     # > 1 refreshes earlier, < 1 later, 0 disables
+
+# Compare-and-delete, so a winner whose lock already expired cannot
+# release the lock of the process that took over
+_RELEASE_LOCK = """-- release_lock
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Last recompute time per key prefix ("top_rated", "recommendations") — the
+# delta in the early-expiration formula. Per prefix keeps it bounded.
+compute_seconds = {}
+
+
+def lock_key(key: str) -> str:
+    return f"lock:{key}"
+
+
+def should_refresh_early(key: str, ttl_ms: int, beta: float = EARLY_BETA) -> bool:
+    """
+    Probabilistic early expiration (XFetch): refresh when
+    delta × beta × −ln(U) ≥ remaining TTL, with U uniform in (0, 1].
+
+    Callers refresh more eagerly the closer the key is to expiring and the
+    longer it takes to rebuild, so a hot key is usually recomputed by one
+    caller shortly before it expires instead of by every caller after.
+    """
+    delta = compute_seconds.get(cache_metrics.key_prefix(key))
+    if not delta or not beta or ttl_ms <= 0:
         return False
-    try:
-        return client.exists(key) > 0
-    except Exception:
-        return False
\ No newline at end of file
+    return delta * beta * -math.log(1.0 - random.random()) >= ttl_ms / 1000
+
+
+def _timed_compute(key: str, compute):
+    started = time.perf_counter()
+    value   = compute()
+    compute_seconds[cache_metrics.key_prefix(key)] = time.perf_counter() - started
+    return value
+
+
+def _compute_and_store(key: str, compute, ttl: int):
+    value = _timed_compute(key, compute)
+    if value:
+        set_cache(key, value, ttl)
+    return value
+
+
+def _try_lock(key: str):
+    """SET lock:key NX PX — returns the token when this caller won, else None."""
+    token  = uuid.uuid4().hex
+    ok, won = _run(lambda client: client.set(lock_key(key), token, nx=True, px=LOCK_TTL_MS))
+    return token if ok and won else None
+
+
+def _release_lock(key: str, token: str):
+    _run(lambda client: client.eval(_RELEASE_LOCK, 1, lock_key(key), token))
+
+
+def _wait_for_winner(key: str):
+    """Poll until the winner stores the value (return it) or gives up its lock (return None)."""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+
+        def poll(client):
+            pipe = client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.exists(lock_key(key))
+            return pipe.execute()
+
+        ok, result = _run(poll)
+        if not ok:
+            return None
+        value, locked = result
+        decoded = codec.decode(value)
+        if decoded is not None:
+            return decoded
+        if not locked:
+            return None   # winner finished without caching anything (e.g. empty result)
+    return None
+
+
+def get_or_compute(key: str, compute, ttl: int, beta: float = EARLY_BETA, depends: list = None):
+    """
+    Cache-aside read where only one caller rebuilds a missing or expiring key.
+
+    compute() is called without arguments and its result is cached only if
+    truthy, like the services already do. Returns (value, from_cache).
+    With `depends`, `key` is a base key versioned by those namespaces; the
+    generations are resolved in the same round trip as the read.
+
+    - Hit: return it — unless should_refresh_early() picks this caller, in
+      which case it takes the lock and recomputes; if someone else holds the
+      lock it serves the still-valid cached value.
+    - Miss: the caller that wins `lock:<key>` recomputes; the others wait
+      for its result and only compute themselves if it never arrives.
+    - Redis unavailable: compute directly — there is nothing to coordinate on.
+    """
+    global redis_hits, redis_misses
+    base = key
+    if local_cache is not None:
+        if depends:
+            key = (local_versioned_keys([base], depends) or [None])[0]
+        hit, value = l1_get(key) if key else (False, None)
+        if hit:
+            return value, True
+
+    def fetch(client):
+        pipe = client.pipeline(transaction=False)
+        if depends:
+            queue_versioned_get(pipe, [base], depends)
+        else:
+            pipe.get(key)
+            pipe.pttl(key)
+        return pipe.execute()
+
+    started    = time.perf_counter()
+    ok, result = _run(fetch)
+    elapsed    = time.perf_counter() - started
+    if not ok:
+        if depends:
+            key = fallback_versioned_keys([base], depends)[0]
+        record_call("get", [key], elapsed, ok=False)
+        return _compute_and_store(key, compute, ttl), False
+    if depends:
+        (key,), (result,) = read_versioned(result[0], [base], depends)
+    decoded, ttl_ms = codec.decode(result[0]), result[1]
+    record_call("get", [key], elapsed, ok=True,
+            sizes={key: len(result[0])} if decoded is not None else None)
+
+    if decoded is not None:
+        redis_hits += 1
+        if not should_refresh_early(key, ttl_ms, beta):
+            if local_cache is not None and ttl_ms > 0:
+                local_cache.set(key, decoded, ttl_ms / 1000)
+            return decoded, True
+        token = _try_lock(key)
+        if token is None:
+            return decoded, True
+        try:
+            value = _compute_and_store(key, compute, ttl)
+            # An empty recompute stores nothing — keep serving the cached value
+            return (value, False) if value else (decoded, True)
+        finally:
+            _release_lock(key, token)
+
+    redis_misses += 1
+    token = _try_lock(key)
+    if token is not None:
+        try:
+            return _compute_and_store(key, compute, ttl), False
+        finally:
+            _release_lock(key, token)
+
+    waited = _wait_for_winner(key)
+    if waited is not None:
+        return waited, True
+    return _compute_and_store(key, compute, ttl), False
+
+
+def _ratio(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss counters and hit ratio for each cache tier in this process."""
+    stats = {
+        "redis": {
+            "backend":   CACHE_BACKEND,
+            "circuit":   breaker.state,
+            "hits":      redis_hits,
+            "misses":    redis_misses,
+            "hit_ratio": _ratio(redis_hits, redis_misses),
+        }
+    }
+    if local_cache is not None:
+        stats["l1"] = {
+            "hits":      local_cache.hits,
+            "misses":    local_cache.misses,
+            "hit_ratio": _ratio(local_cache.hits, local_cache.misses),
+            "entries":   len(local_cache),
+        }
+    return stats
@@ -0,0 +1,354 @@
+import fnmatch
+import sqlite3
+import threading
+import time
+
+
+class SQLiteCache:
+    """
+    File-backed stand-in for the Redis client — a single-host cache that
+    survives between CLI invocations without a Redis server.
+
+    Implements just the commands cache/redis_client.py sends (get, pttl,
+    setex, set NX PX, delete, exists, mget, incr/incrby/incrbyfloat, scan,
+    zincrby/zrevrange/zremrangebyrank, eval, flushdb, publish, pipeline), with the same return values, so every helper there runs
+    unchanged on either backend. Entries live in one table of a side SQLite
+    database in WAL mode, which several processes can share.
+
+    publish() is a no-op: there is no pub/sub, which is why redis_client
+    turns the L1 cache off on this backend. eval() runs
+    the Python twin of each Lua script redis_client sends, picked by the
+    script's first line ("-- release_lock", "-- get_versioned").
+
+    Args:
+        path        : database file, created on first use
+        max_entries : entries with a TTL kept before those closest to
+                      expiring are evicted, down to 90% of it; counters
+                      without a TTL (the namespace generations) are never
+                      evicted. The size is tracked approximately, so the
+                      table is only counted when it may have grown past this
+        timeout     : seconds to wait for another process's write lock
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, timeout: float = 0.05):
+        self.path        = path
+        self.max_entries = max_entries
+        self.low_water   = max_entries - max_entries // 10
+        self._lock       = threading.Lock()
+        self._conn       = sqlite3.connect(path, timeout=timeout, isolation_level=None,
+                                           check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key        TEXT PRIMARY KEY,
+                value      BLOB NOT NULL,
+                expires_at REAL              -- unix time; NULL = never
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)")
+        # Upper bound on the rows in `cache` — every set counts as an insert
+        self._size = self._conn.execute("SELECT count(*) FROM cache").fetchone()[0]
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS zsets (
+                key    TEXT NOT NULL,
+                member TEXT NOT NULL,
+                score  REAL NOT NULL,
+                PRIMARY KEY (key, member)
+            )
+        """)
+
+    # ── Commands ──
+
+    def pipeline(self, transaction=False):
+        return SQLitePipeline(self)
+
+    def get(self, key):
+        return self._call("get", key)
+
+    def pttl(self, key):
+        return self._call("pttl", key)
+
+    def setex(self, key, ttl, value):
+        return self._call("setex", key, ttl, value)
+
+    def set(self, key, value, nx=False, px=None):
+        return self._call("set", key, value, nx, px)
+
+    def delete(self, *keys):
+        return self._call("delete", *keys)
+
+    def exists(self, *keys):
+        return self._call("exists", *keys)
+
+    def mget(self, keys):
+        return self._call("mget", keys)
+
+    def incr(self, key):
+        return self._call("incrby", key, 1)
+
+    def incrby(self, key, amount):
+        return self._call("incrby", key, amount)
+
+    def incrbyfloat(self, key, amount):
+        return self._call("incrbyfloat", key, amount)
+
+    def eval(self, script, numkeys, *args):
+        return self._call("eval", script, numkeys, *args)
+
+    def zincrby(self, name, amount, member):
+        return self._call("zincrby", name, amount, member)
+
+    def zrevrange(self, name, start, end):
+        return self._call("zrevrange", name, start, end)
+
+    def zremrangebyrank(self, name, start, end):
+        return self._call("zremrangebyrank", name, start, end)
+
+    def publish(self, channel, message):
+        return 0
+
+    def scan(self, cursor=0, match="*", count=10):
+        """Walks rowids, so keys deleted mid-scan never make it skip others."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, key FROM cache WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (cursor, count)
+            ).fetchall()
+        keys = [key for _, key in rows if fnmatch.fnmatchcase(key, match)]
+        return (rows[-1][0] if len(rows) == count else 0), keys
+
+    def flushdb(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.execute("DELETE FROM zsets")
+            self._size = 0
+        return True
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM cache").fetchone()[0]
+
+    # ── Execution ──
+
+    def _call(self, name, *args):
+        return self.execute([(name, args)])[0]
+
+    def execute(self, ops: list) -> list:
+        """Run [(command, args)] in one transaction and return each result."""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE" if any(_writes(op, args) for op, args in ops) else "BEGIN")
+            try:
+                now     = time.time()
+                results = [getattr(self, f"_{name}")(now, *args) for name, args in ops]
+                self._size += sum(op in _GROWS for op, _ in ops)
+                if self._size > self.max_entries:
+                    self._evict(now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return results
+
+    def _row(self, now, key):
+        row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        return row
+
+    def _store(self, key, value, expires_at):
+        self._conn.execute(
+            "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, value, expires_at)
+        )
+
+    def _get(self, now, key):
+        row = self._row(now, key)
+        return row[0] if row else None
+
+    def _pttl(self, now, key):
+        row = self._row(now, key)
+        if row is None:
+            return -2
+        if row[1] is None:
+            return -1
+        return int((row[1] - now) * 1000)
+
+    def _setex(self, now, key, ttl, value):
+        self._store(key, value, now + ttl)
+        return True
+
+    def _set(self, now, key, value, nx=False, px=None):
+        if nx and self._row(now, key) is not None:
+            return None
+        self._store(key, value, now + px / 1000 if px else None)
+        return True
+
+    def _delete(self, now, *keys):
+        # Like DEL: each key counts once, whichever table held it
+        deleted = 0
+        for key in keys:
+            existed = self._row(now, key) is not None
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            existed |= self._conn.execute("DELETE FROM zsets WHERE key = ?", (key,)).rowcount > 0
+            deleted += existed
+        return deleted
+
+    def _exists(self, now, *keys):
+        return sum(self._row(now, key) is not None for key in keys)
+
+    def _mget(self, now, keys):
+        return [self._get(now, key) for key in keys]
+
+    def _incr(self, now, key):
+        return self._incrby(now, key, 1)
+
+    def _incrby(self, now, key, amount):
+        row   = self._row(now, key)
+        value = int(row[0]) + amount if row else amount
+        self._store(key, str(value), row[1] if row else None)
+        return value
+
+    def _incrbyfloat(self, now, key, amount):
+        row   = self._row(now, key)
+        value = float(row[0]) + amount if row else float(amount)
+        self._store(key, repr(value), row[1] if row else None)
+        return str(value)
+
+    def _zincrby(self, now, name, amount, member):
+        self._conn.execute(
+            "INSERT INTO zsets (key, member, score) VALUES (?, ?, ?) "
+            "ON CONFLICT (key, member) DO UPDATE SET score = score + excluded.score",
+            (name, member, amount)
+        )
+        return self._conn.execute(
+            "SELECT score FROM zsets WHERE key = ? AND member = ?", (name, member)
+        ).fetchone()[0]
+
+    def _zrank_window(self, name, start, end):
+        """Redis-style inclusive, possibly negative [start, end] → (offset, limit)."""
+        size = self._conn.execute("SELECT count(*) FROM zsets WHERE key = ?", (name,)).fetchone()[0]
+        start, end = (start + size if start < 0 else start), (end + size if end < 0 else end)
+        return max(start, 0), max(min(end, size - 1) - max(start, 0) + 1, 0)
+
+    def _zrevrange(self, now, name, start, end):
+        offset, limit = self._zrank_window(name, start, end)
+        return [row[0] for row in self._conn.execute(
+            "SELECT member FROM zsets WHERE key = ? ORDER BY score DESC, member DESC LIMIT ? OFFSET ?",
+            (name, limit, offset)
+        )]
+
+    def _zremrangebyrank(self, now, name, start, end):
+        offset, limit = self._zrank_window(name, start, end)
+        return self._conn.execute(
+            "DELETE FROM zsets WHERE key = ? AND member IN ("
+            "  SELECT member FROM zsets WHERE key = ? ORDER BY score, member LIMIT ? OFFSET ?)",
+            (name, name, limit, offset)
+        ).rowcount
+
+    def _publish(self, now, channel, message):
+        return 0
+
+    def _eval(self, now, script, numkeys, *args):
+        keys, argv = args[:numkeys], args[numkeys:]
+        return getattr(self, f"_script_{_script_name(script)}")(now, keys, argv)
+
+    def _script_release_lock(self, now, keys, argv):
+        # Delete the lock if it still holds our token
+        if self._get(now, keys[0]) != argv[0]:
+            return 0
+        return self._delete(now, keys[0])
+
+    def _script_get_versioned(self, now, keys, argv):
+        # Namespace generations, then value and PTTL of each base key tagged with them
+        versions = [int(self._get(now, key) or 0) for key in keys]
+        tag      = "@" + ",".join(f"{ns}={v}" for ns, v in zip(argv, versions))
+        out      = list(versions)
+        for base in argv[len(keys):]:
+            out += [self._get(now, base + tag), self._pttl(now, base + tag)]
+        return out
+
+    def _evict(self, now):
+        # Only when the estimate crosses max_entries; evicting down to
+        # low_water keeps a full cache from counting on every set
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        self._size = self._conn.execute("SELECT count(*) FROM cache").fetchone()[0]
+        if self._size > self.max_entries:
+            self._size -= self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "  SELECT key FROM cache WHERE expires_at IS NOT NULL ORDER BY expires_at LIMIT ?)",
+                (self._size - self.low_water,)
+            ).rowcount
+
+
+_WRITES = {"setex", "set", "delete", "incr", "incrby", "incrbyfloat", "zincrby", "zremrangebyrank"}
+_GROWS  = {"setex", "set"}
+
+# Scripts that only read — every other eval takes the write lock
+_READ_SCRIPTS = {"get_versioned"}
+
+
+def _script_name(script: str) -> str:
+    return script.strip().split("\n", 1)[0].removeprefix("--").strip()
+
+
+def _writes(op: str, args: tuple) -> bool:
+    return op in _WRITES or (op == "eval" and _script_name(args[0]) not in _READ_SCRIPTS)
+
+
+class SQLitePipeline:
+    """Buffers commands like a Redis pipeline; execute() runs them in one transaction."""
+
+    def __init__(self, cache: SQLiteCache):
+        self.cache = cache
+        self.ops   = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.ops.append((name, args))
+            return self
+        return queue
+
+    def execute(self):
+        ops, self.ops = self.ops, []
+        return self.cache.execute(ops)
+
+
+# ──────────────────────────────────────────────
+# asyncio adapter
+# ──────────────────────────────────────────────
+
+class AsyncSQLiteCache:
+    """
+    The same store behind the redis.asyncio interface async_redis_client uses.
+
+    Commands run inline on the event loop — they are local, indexed
+    single-row statements, cheaper than a hop to a worker thread.
+    """
+
+    def __init__(self, cache: SQLiteCache):
+        self.cache = cache
+
+    def pipeline(self, transaction=False):
+        return AsyncSQLitePipeline(self.cache)
+
+    def __getattr__(self, name):
+        command = getattr(self.cache, name)
+
+        async def call(*args, **kwargs):
+            return command(*args, **kwargs)
+        return call
+
+
+class AsyncSQLitePipeline(SQLitePipeline):
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.ops = []
+
+    async def execute(self):
+        return SQLitePipeline.execute(self)
@@ -0,0 +1,40 @@
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from database.db import DATABASE_URL, get_pool_options, install_pragmas
+
+# Sync URL scheme → async driver for the same database
+ASYNC_DRIVERS = {
+    "sqlite:": "sqlite+aiosqlite:",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap a sync database URL onto its async driver (already-async URLs pass through)."""
+    for sync_prefix, async_prefix in ASYNC_DRIVERS.items():
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+def create_async_db_engine(url: str = None, profile: str = None, **pool_options):
+    """
+    Async twin of create_db_engine() — same database, same profile pragmas.
+
+    Args:
+        url          : database URL, sync or async form (defaults to DATABASE_URL)
+        profile      : one of ENGINE_PROFILES (defaults to DB_PROFILE)
+        pool_options : overrides for pool_size, max_overflow, ...
+    """
+    url     = to_async_url(url or DATABASE_URL)
+    options = {**get_pool_options(), **pool_options}
+    new_engine = create_async_engine(url, echo=False, **options)
+
+    if new_engine.dialect.name == "sqlite":
+        install_pragmas(new_engine.sync_engine, profile)
+    return new_engine
+
+
+async_engine = create_async_db_engine()
+
+# expire_on_commit=False — attributes stay readable after commit without
+# an implicit (and, under asyncio, illegal) lazy refresh
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
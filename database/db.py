@@ -1,9 +1,126 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///media_review.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///media_review.db")
+DB_PROFILE   = os.environ.get("MEDIA_DB_PROFILE", "wal")
 
-engine = create_engine(DATABASE_URL, echo=False)
+# ──────────────────────────────────────────────
+# Engine profiles (SQLite pragmas per connection)
+# ──────────────────────────────────────────────
+
+ENGINE_PROFILES = {
+    # SQLite defaults — rollback journal, readers block writers
+    "legacy": {},
+
+    # WAL with full durability — every commit is fsynced
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous":  "FULL",
+        "busy_timeout": 5000,
+    },
+
+    # WAL with fsync only at checkpoints — the recommended default
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous":  "NORMAL",
+        "mmap_size":    268435456,   # 256 MB
+        "cache_size":   -65536,      # 64 MB (negative = KiB)
+        "temp_store":   "MEMORY",
+        "busy_timeout": 5000,
+    },
+
+    # Throughput over durability — for imports and benchmarks only
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous":  "OFF",
+        "mmap_size":    1073741824,  # 1 GB
+        "cache_size":   -262144,     # 256 MB
+        "temp_store":   "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+
+# Individual pragmas can be overridden on top of the chosen profile
+PRAGMA_ENV_VARS = {
+    "journal_mode": "MEDIA_DB_JOURNAL_MODE",
+    "synchronous":  "MEDIA_DB_SYNCHRONOUS",
+    "mmap_size":    "MEDIA_DB_MMAP_SIZE",
+    "cache_size":   "MEDIA_DB_CACHE_SIZE",
+    "temp_store":   "MEDIA_DB_TEMP_STORE",
+    "busy_timeout": "MEDIA_DB_BUSY_TIMEOUT",
+}
+
+POOL_ENV_VARS = {
+    "pool_size":    "MEDIA_DB_POOL_SIZE",
+    "max_overflow": "MEDIA_DB_MAX_OVERFLOW",
+    "pool_timeout": "MEDIA_DB_POOL_TIMEOUT",
+    "pool_recycle": "MEDIA_DB_POOL_RECYCLE",
+}
+
+
+def get_profile_pragmas(profile: str) -> dict:
+    """Return the pragmas for a profile with any environment overrides applied."""
+    if profile not in ENGINE_PROFILES:
+        valid = list(ENGINE_PROFILES.keys())
+        raise ValueError(f"Invalid DB profile '{profile}'. Choose from: {valid}")
+
+    pragmas = dict(ENGINE_PROFILES[profile])
+    for pragma, env_var in PRAGMA_ENV_VARS.items():
+        value = os.environ.get(env_var)
+        if value:
+            pragmas[pragma] = value
+    return pragmas
+
+
+def get_pool_options() -> dict:
+    """Read pool parameters from the environment — only the ones that are set."""
+    options = {}
+    for option, env_var in POOL_ENV_VARS.items():
+        value = os.environ.get(env_var)
+        if value:
+            options[option] = int(value)
+    return options
+
+
+def create_db_engine(url: str = None, profile: str = None, **pool_options):
+    """
+    Build an engine whose connections all get the profile's pragmas.
+
+    Args:
+        url          : database URL (defaults to DATABASE_URL)
+        profile      : one of ENGINE_PROFILES (defaults to DB_PROFILE)
+        pool_options : overrides for pool_size, max_overflow, ...
+    """
+    url     = url or DATABASE_URL
+    options = {**get_pool_options(), **pool_options}
+    new_engine = create_engine(url, echo=False, **options)
+
+    if new_engine.dialect.name != "sqlite":
+        return new_engine
+
+    install_pragmas(new_engine, profile)
+    return new_engine
+
+
+def install_pragmas(target_engine, profile: str = None):
+    """
+    Run the profile's pragmas on every new connection of `target_engine`.
+
+    Takes a sync Engine — for an AsyncEngine pass its `.sync_engine`.
+    """
+    pragmas = get_profile_pragmas(profile or DB_PROFILE)
+
+    @event.listens_for(target_engine, "connect")
+    def _apply_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
@@ -22,6 +139,28 @@ def get_db():
 def initialize_db():
     """Create all tables if they don't exist yet."""
     from database import models  # noqa: F401 — import so Base sees the models
+    from database.fts import ensure_fts
+    from database.facets import ensure_facets
+    from services.stats_service import ensure_media_stats
     Base.metadata.create_all(bind=engine)
+    ensure_indexes()
+    ensure_fts(engine)
+    # media_stats first — a backfill also rebuilds facet_counts from it
+    ensure_media_stats(engine)
+    ensure_facets(engine)
+
 
+def ensure_indexes():
+    """
+    Add any missing indexes to tables that already exist.
 
+    create_all() only creates indexes together with a brand new table,
+    so databases created before an index was declared never get it.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except (IntegrityError, OperationalError) as e:
+                # A unique index cannot be built while duplicate rows exist
+                print(f"⚠️  Could not create index '{index.name}': {e.orig}")
@@ -0,0 +1,105 @@
+from sqlalchemy import text, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database.models import Media, MediaType, FacetCount
+
+# ──────────────────────────────────────────────
+# Facet counts — media and reviews per type, genre and decade
+# ──────────────────────────────────────────────
+#
+# facet_counts is maintained like media_stats: add_media adds its title's
+# three facet values in the same transaction, and every path that folds
+# reviews into media_stats adds the review count delta here too. Browsing
+# then reads a few dozen precomputed rows instead of a GROUP BY over media.
+
+FACETS = ("type", "genre", "decade")
+NONE   = "N/A"    # facet value for a missing genre or release year
+
+
+def decade(release_year) -> str:
+    return f"{release_year // 10 * 10}s" if release_year else NONE
+
+
+def media_facets(media_type: MediaType, genre: str, release_year: int) -> list:
+    """[(facet, value)] of one media item."""
+    return [("type", media_type.value), ("genre", genre or NONE), ("decade", decade(release_year))]
+
+
+# The same values in SQL, for a media row aliased `m`
+_TYPE_SQL   = "CASE m.media_type " + " ".join(f"WHEN '{t.name}' THEN '{t.value}'" for t in MediaType) + " END"
+_GENRE_SQL  = f"coalesce(m.genre, '{NONE}')"
+_DECADE_SQL = f"CASE WHEN m.release_year THEN (m.release_year / 10 * 10) || 's' ELSE '{NONE}' END"
+
+
+def facet_media_upsert():
+    """
+    Statement adding media to facet_counts — executed with
+    facet_media_params(), as one executemany.
+    """
+    stmt = sqlite_insert(FacetCount)
+    return stmt.on_conflict_do_update(
+        index_elements=[FacetCount.facet, FacetCount.value],
+        set_={"media_count": FacetCount.media_count + stmt.excluded.media_count},
+    )
+
+
+def facet_media_params(media_type: MediaType, genre: str, release_year: int, count: int = 1) -> list:
+    return [
+        {"facet": facet, "value": value, "media_count": count, "review_count": 0}
+        for facet, value in media_facets(media_type, genre, release_year)
+    ]
+
+
+# Executed with stats_params() — one {"media_id", "rating_count", ...} per media item
+FACET_REVIEW_UPDATE = text(f"""
+    UPDATE facet_counts SET review_count = review_count + :rating_count
+    WHERE :rating_count != 0 AND (facet, value) IN (
+        SELECT 'type',   {_TYPE_SQL}   FROM media m WHERE m.id = :media_id UNION ALL
+        SELECT 'genre',  {_GENRE_SQL}  FROM media m WHERE m.id = :media_id UNION ALL
+        SELECT 'decade', {_DECADE_SQL} FROM media m WHERE m.id = :media_id
+    )
+""")
+
+
+def rebuild_facets(conn) -> int:
+    """Recompute facet_counts from media and media_stats. Returns the number of rows."""
+    conn.execute(FacetCount.__table__.delete())
+    rows = []
+    for facet, expression in (("type", _TYPE_SQL), ("genre", _GENRE_SQL), ("decade", _DECADE_SQL)):
+        rows += [
+            {"facet": facet, "value": value, "media_count": media_count, "review_count": review_count}
+            for value, media_count, review_count in conn.execute(text(f"""
+                SELECT {expression} AS value, count(*), coalesce(sum(s.rating_count), 0)
+                FROM media m LEFT JOIN media_stats s ON s.media_id = m.id
+                GROUP BY value
+            """))
+        ]
+    if rows:
+        conn.execute(FacetCount.__table__.insert(), rows)
+    return len(rows)
+
+
+def ensure_facets(engine) -> bool:
+    """
+    Backfill facet_counts once, when it is empty but media is not — a new
+    table on an existing database. Returns True if it was rebuilt.
+    """
+    with engine.begin() as conn:
+        if conn.execute(select(FacetCount.facet).limit(1)).first() is not None:
+            return False
+        if conn.execute(select(Media.id).limit(1)).first() is None:
+            return False
+        rebuild_facets(conn)
+    return True
+
+
+def load_facets(db) -> dict:
+    """{facet: [(value, media_count, review_count)]}, most media first."""
+    facets = {facet: [] for facet in FACETS}
+    rows   = db.execute(
+        select(FacetCount.facet, FacetCount.value, FacetCount.media_count, FacetCount.review_count)
+        .where(FacetCount.media_count > 0)
+        .order_by(FacetCount.facet, FacetCount.media_count.desc(), FacetCount.value)
+    ).all()
+    for facet, value, media_count, review_count in rows:
+        facets.setdefault(facet, []).append((value, media_count, review_count))
+    return facets
@@ -0,0 +1,125 @@
+import os
+import re
+import threading
+from sqlalchemy import text, func, literal_column
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import table, column
+
+# ──────────────────────────────────────────────
+# FTS5 full-text index over media title + creator
+# ──────────────────────────────────────────────
+#
+# An external-content FTS5 table: it stores only the index and reads the
+# text from `media`, so titles are not duplicated. Triggers keep it in
+# step with every INSERT / UPDATE / DELETE on media, whichever code path
+# (ORM, bulk insert, raw SQL) made the change.
+
+FTS_TABLE = "media_fts"
+
+# Set MEDIA_SEARCH_FTS=0 to force the ILIKE scan (e.g. to compare them)
+FTS_ENABLED = os.environ.get("MEDIA_SEARCH_FTS", "1") != "0"
+
+# bm25 column weights — a hit in the title counts more than one in the creator
+TITLE_WEIGHT   = 10.0
+CREATOR_WEIGHT = 1.0
+
+_DDL = [
+    # prefix='2 3' keeps extra index entries so short "term*" queries stay fast
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, creator,
+        content='media', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON media BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, creator) VALUES (new.id, new.title, new.creator);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON media BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, creator)
+        VALUES ('delete', old.id, old.title, old.creator);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, creator ON media BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, creator)
+        VALUES ('delete', old.id, old.title, old.creator);
+        INSERT INTO {FTS_TABLE} (rowid, title, creator) VALUES (new.id, new.title, new.creator);
+    END
+    """,
+]
+
+media_fts = table(FTS_TABLE, column("rowid"))
+
+_ready      = None
+_ready_lock = threading.Lock()
+
+
+def ensure_fts(engine) -> bool:
+    """
+    Create the FTS table and its triggers if missing, and index existing
+    media the first time. Returns False — leaving search on ILIKE — when
+    the database is not SQLite or the SQLite build has no FTS5.
+    """
+    global _ready
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        existed = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE}
+        ).first() is not None
+        try:
+            for statement in _DDL:
+                conn.execute(text(statement))
+        except OperationalError as e:
+            if "fts5" not in str(e.orig).lower():
+                raise
+            print("⚠️  SQLite was built without FTS5 — search falls back to ILIKE scans")
+            _ready = False
+            return False
+        if not existed:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+    _ready = True
+    return True
+
+
+def fts_ready(engine) -> bool:
+    """Is the FTS index there to query? Checked once per process."""
+    global _ready
+    if not FTS_ENABLED or engine.dialect.name != "sqlite":
+        return False
+    if _ready is None:
+        with _ready_lock:
+            if _ready is None:
+                with engine.connect() as conn:
+                    _ready = conn.execute(
+                        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                        {"name": FTS_TABLE}
+                    ).first() is not None
+    return _ready
+
+
+def match_expression(term: str):
+    """
+    "dark kni" → '"dark"* "kni"*' — every word, as a prefix, in any order.
+    None when the term has no word characters to search for.
+    """
+    words = re.findall(r"\w+", term)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def apply_match(stmt, model, expression: str):
+    """Restrict a SELECT over `model` to FTS matches, best bm25 rank first."""
+    rank = func.bm25(literal_column(FTS_TABLE), TITLE_WEIGHT, CREATOR_WEIGHT)
+    return (
+        stmt.join(media_fts, media_fts.c.rowid == model.id)
+        .where(literal_column(FTS_TABLE).op("MATCH")(expression))
+        .order_by(rank, model.id)
+    )
@@ -1,6 +1,6 @@
 import enum
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from database.db import Base
 
@@ -29,6 +29,14 @@ class User(Base):
 
 class Media(Base):
     __tablename__ = "media"
+    __table_args__ = (
+        # add_media refuses a second (type, title) pair — enforce it in the DB too
+        Index("uq_media_type_title", "media_type", "title", unique=True),
+        Index("ix_media_genre", "genre"),
+        # --browse: type + year range, year range alone, newest first
+        Index("ix_media_type_year", "media_type", "release_year"),
+        Index("ix_media_year", "release_year"),
+    )
 
     id           = Column(Integer, primary_key=True, index=True)
     title        = Column(String(200), nullable=False)
@@ -45,8 +53,18 @@ class Media(Base):
         return f"<Media id={self.id} title={self.title} type={self.media_type.value}>"
 
 
+# --browse --creator matches case-insensitively
+Index("ix_media_creator_nocase", Media.creator.collate("NOCASE"))
+
+
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # one review per user per media item
+        Index("uq_reviews_user_media", "user_id", "media_id", unique=True),
+        # newest-first scans per media (notifications)
+        Index("ix_reviews_media_created", "media_id", "created_at"),
+    )
 
     id         = Column(Integer, primary_key=True, index=True)
     user_id    = Column(Integer, ForeignKey("users.id"),  nullable=False)
@@ -64,6 +82,9 @@ class Review(Base):
 
 class Favorite(Base):
     __tablename__ = "favorites"
+    __table_args__ = (
+        Index("uq_favorites_user_media", "user_id", "media_id", unique=True),
+    )
 
     id       = Column(Integer, primary_key=True, index=True)
     user_id  = Column(Integer, ForeignKey("users.id"),  nullable=False)
@@ -73,4 +94,50 @@ class Favorite(Base):
     media    = relationship("Media", back_populates="favorites")
 
     def __repr__(self):
-        return f"<Favorite user={self.user_id} media={self.media_id}>"
\ No newline at end of file
+        return f"<Favorite user={self.user_id} media={self.media_id}>"
+
+class MediaStats(Base):
+    """Running rating aggregate per media item — maintained on every review insert."""
+    __tablename__ = "media_stats"
+
+    media_id       = Column(Integer, ForeignKey("media.id"), primary_key=True)
+    rating_sum     = Column(Float,   nullable=False, default=0.0)
+    rating_count   = Column(Integer, nullable=False, default=0)
+    avg_rating     = Column(Float,   nullable=False, default=0.0)
+    last_review_at = Column(DateTime)
+
+    # leaderboard order: best average first, media_id as the tie-breaker
+    __table_args__ = (
+        Index("ix_media_stats_rank", avg_rating.desc(), media_id),
+        # --browse --sort reviews: most reviewed first
+        Index("ix_media_stats_count", rating_count.desc(), media_id),
+    )
+
+    media          = relationship("Media")
+
+    def __repr__(self):
+        return f"<MediaStats media={self.media_id} avg={self.avg_rating} count={self.rating_count}>"
+
+
+class FacetCount(Base):
+    """Media and reviews per facet value (type, genre, decade) — maintained on every insert."""
+    __tablename__ = "facet_counts"
+
+    facet        = Column(String(20),  primary_key=True)   # "type", "genre" or "decade"
+    value        = Column(String(100), primary_key=True)   # "movie", "Sci-Fi", "1990s", ...
+    media_count  = Column(Integer, nullable=False, default=0)
+    review_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<FacetCount {self.facet}={self.value} media={self.media_count} reviews={self.review_count}>"
+
+
+class ChangeCounter(Base):
+    """A number bumped by every write to some data — a cheap "has it changed?" check for in-process indexes."""
+    __tablename__ = "change_counters"
+
+    name  = Column(String(50), primary_key=True)   # "ratings", ...
+    value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ChangeCounter {self.name}={self.value}>"
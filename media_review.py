@@ -1,23 +1,78 @@
 import argparse
 from database.db import initialize_db
-from services.media_service import get_all_media, search_by_title
-from services.review_service import submit_review, get_top_rated, get_recommendations, bulk_submit_reviews
+from database.models import MediaType
+from services.media_service import get_all_media, search_by_title, fuzzy_search_by_title, suggest_titles
+from services.review_service import submit_review, get_top_rated, get_recommendations, bulk_submit_reviews, show_reviews
+from services.stats_service import rebuild_media_stats
+from services.import_service import import_reviews
+from services.warm_service import warm_cache
+from services.browse_service import browse_media, BROWSE_SORTS
 from patterns.observer import add_favorite, get_notifications
-from utils.auth import login, logout, get_current_user, login_required, register, change_password, cleanup_sessions
+from utils.auth import login, logout, get_current_user, login_required, admin_required, register, change_password, cleanup_sessions
+from cache.redis_client import load_metrics
+from cache.metrics import format_table, format_prometheus
 
 
 
 
 def handle_list(args):
-    get_all_media()
+    get_all_media(after_id=args.after_id, limit=args.limit)
 
 
 def handle_search(args):
-    search_by_title(args.search)
+    if args.fuzzy:
+        fuzzy_search_by_title(args.search, limit=args.limit)
+        return
+    search_by_title(args.search, limit=args.limit, offset=args.offset)
+
+
+def handle_suggest(args):
+    if args.sort == "year":
+        print("❌ --suggest sorts by reviews or rating")
+        return
+    suggest_titles(args.suggest, limit=args.limit, order=args.sort or "reviews")
+
+
+def handle_browse(args):
+    if args.offset or args.after_id is not None:
+        print("❌ --browse pages with --after VALUE:ID, as printed under the previous page")
+        return
+    browse_media(media_type=args.type, genre=args.genre, year_from=args.year_from,
+                 year_to=args.year_to, creator=args.creator, sort=args.sort or "rating",
+                 limit=args.limit, after=args.after)
 
 
 def handle_top_rated(args):
-    get_top_rated()
+    if args.after_id is not None:
+        print("❌ --top-rated pages with --after RATING:ID, as printed under the previous page")
+        return
+    get_top_rated(limit=args.limit or 5, after=args.after)
+
+
+def handle_reviews(args):
+    show_reviews(args.reviews, after_id=args.after_id, limit=args.limit)
+
+
+def handle_rebuild_stats(args):
+    rebuild_media_stats()
+
+
+def handle_warm_cache(args):
+    warm_cache(workers=args.workers)
+
+
+def handle_cache_stats(args):
+    shared, series = load_metrics()
+    if args.cache_stats == "prometheus":
+        print(format_prometheus(series), end="")
+        return
+    if not shared:
+        print("⚠️  Cache unreachable — showing this process only.")
+    if not series:
+        print("❌ No cache activity recorded yet.")
+        return
+    print("\n📊 Cache stats (all processes):\n")
+    print(format_table(series))
 
 
 def handle_login(args):
@@ -35,7 +90,17 @@ def handle_review(args, user):
 
 @login_required
 def handle_bulk_review(args, user):
-    bulk_submit_reviews(args.bulk_review, user["user_id"])
+    bulk_submit_reviews(args.bulk_review, user["user_id"],
+                        batch_size=args.batch_size, mode=args.bulk_mode,
+                        chunk_size=args.chunk_size, resume=args.resume, report_path=args.report,
+                        on_conflict=args.on_conflict)
+
+
+@admin_required
+def handle_import_reviews(args, user):
+    import_reviews(args.import_reviews, workers=args.workers,
+                   batch_size=args.batch_size, report_path=args.report,
+                   on_conflict=args.on_conflict)
 
 
 @login_required
@@ -79,6 +144,7 @@ def handle_whoami(args):
 def handle_sessions(args):
     import glob
     import json
+    import os
     import platform
 
     session_files = glob.glob(".session_*.json")
@@ -109,10 +175,36 @@ def handle_sessions(args):
 def main():
     parser = argparse.ArgumentParser(description="🎬 Media Review CLI System")
 
-    parser.add_argument("--list",      action="store_true", help="List all media")
+    parser.add_argument("--list",      action="store_true", help="List media, one page at a time")
     parser.add_argument("--top-rated", action="store_true", help="Get top rated media")
+    parser.add_argument("--reviews",   type=int,            metavar="MEDIA_ID",
+                        help="List the reviews of a media item, oldest first")
     parser.add_argument("--search",    type=str,            metavar="TITLE",
-                        help="Search media by title")
+                        help="Search media by title or creator (word prefixes, best match first)")
+    parser.add_argument("--fuzzy",     action="store_true",
+                        help="With --search: tolerate typos in the title (\"Incepton\" finds \"Inception\")")
+    parser.add_argument("--suggest",   type=str,            metavar="PREFIX",
+                        help="Autocomplete: titles with a word starting with PREFIX")
+    parser.add_argument("--browse",    action="store_true",
+                        help="Browse media by --type/--genre/--year-from/--year-to/--creator, with facet counts")
+    parser.add_argument("--type",      choices=[t.value for t in MediaType], help="--browse filter")
+    parser.add_argument("--genre",     type=str, help="--browse filter (any case)")
+    parser.add_argument("--year-from", type=int, metavar="YEAR", help="--browse filter: released in or after YEAR")
+    parser.add_argument("--year-to",   type=int, metavar="YEAR", help="--browse filter: released in or before YEAR")
+    parser.add_argument("--creator",   type=str, help="--browse filter: director or artist (any case)")
+    parser.add_argument("--sort",      choices=list(BROWSE_SORTS),
+                        help="Order: --suggest by reviews (default) or rating; "
+                             "--browse by rating (default), reviews or year")
+    parser.add_argument("--limit",     type=int, metavar="N",
+                        help="Results per page for --search (default: all), --top-rated (default 5), "
+                             "--fuzzy and --suggest (default 10), --browse and --reviews (default 20), "
+                             "--list (default 50)")
+    parser.add_argument("--offset",    type=int, default=0, metavar="N",
+                        help="Results to skip for --search (default 0)")
+    parser.add_argument("--after-id",  type=int, metavar="ID",
+                        help="Next page of --list or --reviews: the ID its previous page printed")
+    parser.add_argument("--after",     metavar="VALUE:ID",
+                        help="Next page of --top-rated or --browse: the cursor its previous page printed")
 
     parser.add_argument("--login",  nargs=2, metavar=("EMAIL", "PASSWORD"),
                         help="Login: --login <email> <password>")
@@ -124,6 +216,27 @@ def main():
                         help="Submit a review (must be logged in)")
     parser.add_argument("--bulk-review", type=str, metavar="FILE",
                         help="Bulk submit reviews from CSV (must be logged in)")
+    parser.add_argument("--import-reviews", type=str, metavar="FILE",
+                        help="Admin: import reviews for many users from CSV "
+                             "(user_id|email, media_id, rating, comment, created_at)")
+    parser.add_argument("--batch-size",  type=int, default=200, metavar="N",
+                        help="Rows committed per transaction during --bulk-review/--import-reviews (default 200)")
+    parser.add_argument("--bulk-mode",   choices=["set", "pool", "stream"], default="set",
+                        help="set: bulk-validate and insert in one transaction (default); "
+                             "pool: stream rows through a bounded queue into a group-commit writer; "
+                             "stream: commit in chunks with a resumable checkpoint")
+    parser.add_argument("--workers",     type=int, default=8, metavar="N",
+                        help="Parser processes for --import-reviews, "
+                             "concurrent queries for --warm-cache (default 8)")
+    parser.add_argument("--chunk-size",  type=int, default=1000, metavar="N",
+                        help="Rows per commit/checkpoint for --bulk-mode stream (default 1000)")
+    parser.add_argument("--resume",      action="store_true",
+                        help="Continue a --bulk-mode stream run from its last checkpoint")
+    parser.add_argument("--on-conflict", choices=["fail", "skip", "update"], default="fail",
+                        help="When a bulk/import row repeats an existing review: reject it (default), "
+                             "skip it, or update its rating")
+    parser.add_argument("--report",      type=str, metavar="FILE",
+                        help="Write per-row bulk results (or import rejects) to FILE instead of the terminal")
     parser.add_argument("--recommend",   action="store_true",
                         help="Get recommendations (must be logged in)")
     parser.add_argument("--favorite",    type=int, metavar="MEDIA_ID",
@@ -131,6 +244,15 @@ def main():
     parser.add_argument("--notification", action="store_true",
                         help="Check notifications (must be logged in)")
     parser.add_argument("--sessions", action="store_true", help="List all active terminal sessions")
+    parser.add_argument("--rebuild-stats", action="store_true",
+                        help="Backfill the media_stats leaderboard and facet counts from all reviews")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="Precompute top-rated lists, popular searches and active users' "
+                             "recommendations (uses --workers)")
+    parser.add_argument("--cache-stats", nargs="?", const="table", choices=["table", "prometheus"],
+                        metavar="FORMAT",
+                        help="Cache hits, misses, errors, bytes and latency per key prefix "
+                             "(FORMAT: table or prometheus, default table)")
     
 
     parser.add_argument(
@@ -160,8 +282,14 @@ def main():
         handle_list(args)
     elif args.search:
         handle_search(args)
+    elif args.suggest:
+        handle_suggest(args)
+    elif args.browse:
+        handle_browse(args)
     elif args.top_rated:
         handle_top_rated(args)
+    elif args.reviews:
+        handle_reviews(args)
     elif args.login:
         handle_login(args)
     elif args.logout:
@@ -170,6 +298,8 @@ def main():
         handle_review(args)
     elif args.bulk_review:
         handle_bulk_review(args)
+    elif args.import_reviews:
+        handle_import_reviews(args)
     elif args.recommend:
         handle_recommend(args)
     elif args.favorite:
@@ -187,6 +317,12 @@ def main():
         handle_change_password(args)
     elif args.sessions:
         handle_sessions(args)
+    elif args.rebuild_stats:
+        handle_rebuild_stats(args)
+    elif args.warm_cache:
+        handle_warm_cache(args)
+    elif args.cache_stats:
+        handle_cache_stats(args)
         
     else:
         parser.print_help()
@@ -1,3 +1,5 @@
+from sqlalchemy import select, func, and_
+from sqlalchemy.exc import IntegrityError
 from database.db import SessionLocal
 from database.models import Favorite, Review, Media, User
 from utils.auth import update_last_seen
@@ -57,7 +59,12 @@ def add_favorite(user_id: int, media_id: int):
 
         favorite = Favorite(user_id=user_id, media_id=media_id)
         db.add(favorite)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            print("❌ Already in favorites.")
+            return None
         print(f"✅ '{media.title}' added to {user.name}'s favorites!")
         return favorite
 
@@ -70,6 +77,46 @@ def add_favorite(user_id: int, media_id: int):
         db.close()
 
 
+def notifications_query(user_id: int, since: datetime, per_media: int = 3):
+    """
+    SELECT the newest `per_media` reviews by other users on each of
+    `user_id`'s favorites, created after `since` — in favorite order.
+
+    ROW_NUMBER() over (media_id, created_at DESC) ranks reviews per media
+    item, walking ix_reviews_media_created. Shared with the async service.
+    """
+    ranked = (
+        select(
+            Favorite.id.label("favorite_id"),
+            Review.media_id,
+            Review.user_id,
+            Review.rating,
+            Review.comment,
+            Review.created_at,
+            func.row_number().over(
+                partition_by=Review.media_id,
+                order_by=Review.created_at.desc()
+            ).label("rank"),
+        )
+        .join(Favorite, and_(Favorite.media_id == Review.media_id, Favorite.user_id == user_id))
+        .where(Review.user_id != user_id, Review.created_at > since)   # exclude own reviews
+        .subquery()
+    )
+    return (
+        select(
+            Media.title.label("media_title"),
+            func.coalesce(User.name, "Unknown").label("reviewer_name"),
+            ranked.c.rating,
+            ranked.c.comment,
+            ranked.c.created_at,
+        )
+        .join(Media, Media.id == ranked.c.media_id)
+        .outerjoin(User, User.id == ranked.c.user_id)
+        .where(ranked.c.rank <= per_media)
+        .order_by(ranked.c.favorite_id, ranked.c.rank)
+    )
+
+
 def get_notifications(logged_in_user_id: int, last_seen:str):
     """
     Show only NEW notifications since last_seen timestamp.
@@ -98,44 +145,21 @@ def get_notifications(logged_in_user_id: int, last_seen:str):
 
         print(f"\n🔔 Notifications for {user.name}:\n")
 
-        found_any = False
-
-        for fav in favorites:
-            media = db.query(Media).filter(Media.id == fav.media_id).first()
-            if not media:
-                continue
-
-            # Get latest reviews on this media (excluding user's own reviews)
-            new_reviews = (
-                db.query(Review)
-                .filter(
-                    Review.media_id == fav.media_id,
-                    Review.user_id != logged_in_user_id,
-                    Review.created_at > last_seen_dt  
-                    # exclude own reviews
-                )
-                .order_by(Review.created_at.desc())
-                .limit(3)
-                .all()
-            )
-
-            if not new_reviews:
-                continue
-
-            found_any = True
+        # One windowed query instead of a media + reviews + reviewer lookup per favorite
+        new_reviews = db.execute(notifications_query(logged_in_user_id, last_seen_dt)).all()
+        found_any   = bool(new_reviews)
 
-            # Use Observer pattern to display notifications
-            subject = ReviewSubject()
-            subject.attach(UserObserver(user.name))
+        # Use Observer pattern to display notifications
+        subject = ReviewSubject()
+        subject.attach(UserObserver(user.name))
 
-            for review in new_reviews:
-                reviewer = db.query(User).filter(User.id == review.user_id).first()
-                subject.notify_all(
-                    media_title=media.title,
-                    reviewer_name=reviewer.name if reviewer else "Unknown",
-                    rating=review.rating,
-                    comment=review.comment
-                )
+        for review in new_reviews:
+            subject.notify_all(
+                media_title=review.media_title,
+                reviewer_name=review.reviewer_name,
+                rating=review.rating,
+                comment=review.comment
+            )
 
         if not found_any:
             print(" You're all caught up! No new reviews on your favorites.")
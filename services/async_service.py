@@ -0,0 +1,155 @@
+"""
+Async counterparts of the read/submit paths, for embedding in an asyncio server.
+
+Same models, same SQL (the query builders are imported from the sync
+services) and the same Redis keys, so the sync CLI and an async server can
+run side by side on one database and one cache. Unlike the CLI functions
+these do not print: they return JSON-safe dicts and raise ValueError with
+the CLI's message when a request is invalid.
+"""
+from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError
+from database.async_db import AsyncSessionLocal
+from database.models import Review, Media, User
+from cache.async_redis_client import (
+    set_cache, get_or_compute, get_versioned, bump_namespaces,
+)
+from cache.redis_client import queue_search_term
+from cache.redis_client import TTL_SEARCH, TTL_SEARCH_EMPTY, TTL_TOP_RATED, TTL_RECOMMENDATIONS
+from services.media_service import search_query, search_key, format_media, SEARCH_DEPENDS
+from services.review_service import (
+    TOP_RATED_DEPENDS, recommendations_depends, review_writes, top_rated_key, recommendations_key,
+    top_rated_query, format_top_rated, parse_top_rated_cursor,
+    liked_genres_query, recommendations_query, format_recommendation,
+)
+from services.stats_service import media_stats_upsert, add_stats_delta, stats_params, counter_bump
+from database.facets import FACET_REVIEW_UPDATE
+from patterns.observer import notifications_query
+
+
+async def search_by_title(title: str, limit: int = None, offset: int = 0) -> list:
+    """Search media by title — cached in Redis under the sync key."""
+    (cache_key,), cached = await get_versioned([search_key(title, limit, offset)], SEARCH_DEPENDS,
+                                               extra=lambda pipe: queue_search_term(pipe, title))
+    if cache_key in cached:
+        return cached[cache_key]
+
+    async with AsyncSessionLocal() as db:
+        results = (await db.execute(search_query(title, limit, offset))).scalars().all()
+
+    formatted = [format_media(m) for m in results]
+    await set_cache(cache_key, formatted, TTL_SEARCH if formatted else TTL_SEARCH_EMPTY)
+    return formatted
+
+
+async def get_top_rated(limit: int = 5, after: str = None) -> list:
+    """Top rated media from media_stats — cached under the sync key, rebuilt by one caller at a time."""
+    cursor = parse_top_rated_cursor(after) if after is not None else None
+
+    async def load():
+        async with AsyncSessionLocal() as db:
+            results = (await db.execute(top_rated_query(limit, cursor))).all()
+        return [format_top_rated(r) for r in results]
+
+    formatted, _ = await get_or_compute(top_rated_key(limit, cursor), load, TTL_TOP_RATED,
+                                        depends=TOP_RATED_DEPENDS)
+    return formatted or []
+
+
+async def get_recommendations(user_id: int) -> list:
+    """Recommend media based on genres the user rated >= 7.0 — rebuilt by one caller at a time."""
+    async def load():
+        async with AsyncSessionLocal() as db:
+            if await db.get(User, user_id) is None:
+                raise ValueError(f"No user found with ID {user_id}")
+
+            liked_genres = [g for g in (await db.execute(liked_genres_query(user_id))).scalars() if g]
+            if not liked_genres:
+                return []
+            results = (await db.execute(recommendations_query(user_id, liked_genres))).scalars().all()
+        return [format_recommendation(m) for m in results]
+
+    formatted, _ = await get_or_compute(recommendations_key(user_id), load, TTL_RECOMMENDATIONS,
+                                        depends=recommendations_depends(user_id))
+    return formatted or []
+
+
+async def submit_review(user_id: int, media_id: int, rating: float, comment: str) -> dict:
+    """
+    Insert one review and fold it into media_stats in the same transaction.
+
+    The unique (user_id, media_id) index is the duplicate check — no
+    SELECT first, so two concurrent submits cannot both get through.
+    """
+    if not (1.0 <= rating <= 10.0):
+        raise ValueError("Rating must be between 1.0 and 10.0")
+
+    async with AsyncSessionLocal() as db:
+        user  = await db.get(User, user_id)
+        if user is None:
+            raise ValueError(f"No user found with ID {user_id}")
+        media = await db.get(Media, media_id)
+        if media is None:
+            raise ValueError(f"No media found with ID {media_id}")
+        title = media.title   # rollback expires `media`, and lazy loads cannot run here
+
+        review = Review(
+            user_id=user_id,
+            media_id=media_id,
+            rating=rating,
+            comment=comment,
+            created_at=datetime.now(timezone.utc)
+        )
+        db.add(review)
+        try:
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            raise ValueError(f"User {user_id} has already reviewed '{title}'")
+
+        deltas = {}
+        add_stats_delta(deltas, media_id, rating, 1, review.created_at)
+        params = stats_params(deltas)
+        await db.execute(media_stats_upsert(), params)
+        await db.execute(FACET_REVIEW_UPDATE, params)
+        await db.execute(counter_bump())
+        await db.commit()
+
+    # Invalidate the caches the sync path invalidates
+    await bump_namespaces(*review_writes(user_id))
+
+    return {
+        "id":         review.id,
+        "user_id":    user_id,
+        "media_id":   media_id,
+        "title":      title,
+        "rating":     rating,
+        "comment":    comment,
+        "created_at": review.created_at.isoformat(),
+    }
+
+
+async def get_notifications(user_id: int, last_seen: str) -> list:
+    """
+    New reviews on the user's favorites since `last_seen` (ISO timestamp).
+
+    Returns the same rows the CLI prints; moving last_seen forward is left
+    to the caller, since the CLI keeps it in its session file.
+    """
+    since = datetime.fromisoformat(last_seen)
+
+    async with AsyncSessionLocal() as db:
+        if await db.get(User, user_id) is None:
+            raise ValueError(f"No user found with ID {user_id}")
+        rows = (await db.execute(notifications_query(user_id, since))).all()
+
+    return [
+        {
+            "media_title":   r.media_title,
+            "reviewer_name": r.reviewer_name,
+            "rating":        r.rating,
+            "comment":       r.comment,
+            "created_at":    r.created_at.isoformat() if r.created_at else None,
+        }
+        for r in rows
+    ]
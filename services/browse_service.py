@@ -0,0 +1,231 @@
+from sqlalchemy import select, func, or_
+from database.db import SessionLocal
+from database.facets import load_facets, FACETS, NONE
+from database.models import Media, MediaType, MediaStats
+from cache.redis_client import get_or_compute, NS_MEDIA, NS_RATINGS, TTL_BROWSE
+
+# Namespaces each cached result depends on
+BROWSE_DEPENDS = [NS_MEDIA, NS_RATINGS]
+
+BROWSE_SORTS = ("rating", "reviews", "year")
+BROWSE_LIMIT = 20
+FACETS_KEY   = "facets:all"
+
+
+# ──────────────────────────────────────────────
+# Queries — keyset pages, ranked rows first
+# ──────────────────────────────────────────────
+#
+# A page walks the media that have a value to sort by — reviewed ones for
+# rating/reviews, dated ones for year — best first, then the rest by id.
+# The rating and reviews sorts start from media_stats, so unfiltered pages
+# are a walk over ix_media_stats_rank / ix_media_stats_count that stops
+# after `limit` rows, and the year sort walks ix_media_year (or
+# ix_media_type_year) backwards. Filters use ix_media_type_year,
+# ix_media_year, ix_media_genre and ix_media_creator_nocase; when SQLite
+# starts from a filter's index it sorts the rows that filter matches.
+# Each page starts at the previous page's cursor instead of skipping
+# earlier rows.
+
+# The column each sort orders by, best (highest) first
+SORT_COLUMNS = {
+    "rating":  MediaStats.avg_rating,
+    "reviews": MediaStats.rating_count,
+    "year":    Media.release_year,
+}
+
+
+def _filtered(stmt, media_type: str = None, genre: str = None, year_from: int = None,
+              year_to: int = None, creator: str = None):
+    if media_type:
+        stmt = stmt.where(Media.media_type == MediaType(media_type))
+    if genre:
+        stmt = stmt.where(Media.genre.is_(None) if genre == NONE else Media.genre == genre)
+    if year_from is not None:
+        stmt = stmt.where(Media.release_year >= year_from)
+    if year_to is not None:
+        stmt = stmt.where(Media.release_year <= year_to)
+    if creator:
+        stmt = stmt.where(Media.creator.collate("NOCASE") == creator)
+    return stmt
+
+
+def browse_query(filters: dict, sort: str = "rating", limit: int = BROWSE_LIMIT, after: tuple = None):
+    """
+    SELECT the ranked part of a page — media with their rating stats,
+    reviewed (rating/reviews) or dated (year), best first. After `after`,
+    a (value, media_id) cursor, the walk starts at that position.
+    """
+    column = SORT_COLUMNS[sort]
+    stmt   = select(Media, MediaStats.avg_rating, MediaStats.rating_count)
+    if sort == "year":
+        # Ties newest first: ix_media_year and ix_media_type_year walked backwards
+        tie  = Media.id.desc()
+        stmt = (stmt.outerjoin(MediaStats, Media.id == MediaStats.media_id)
+                .where(Media.release_year.is_not(None)))
+    else:
+        tie  = MediaStats.media_id.asc()
+        stmt = (stmt.select_from(MediaStats).join(Media, Media.id == MediaStats.media_id)
+                .where(MediaStats.rating_count > 0))
+    if after is not None:
+        # The leading range lets SQLite seek; only ties at that value are filtered
+        value, after_id = after
+        past = Media.id < after_id if sort == "year" else MediaStats.media_id > after_id
+        stmt = stmt.where(column <= value, or_(column < value, past))
+    return _filtered(stmt, **filters).order_by(column.desc(), tie).limit(limit)
+
+
+def browse_rest_query(filters: dict, sort: str = "rating", limit: int = BROWSE_LIMIT, after_id: int = 0):
+    """SELECT the media browse_query() leaves out — unreviewed or undated — by id, after `after_id`."""
+    stmt = (
+        select(Media, MediaStats.avg_rating, MediaStats.rating_count)
+        .outerjoin(MediaStats, Media.id == MediaStats.media_id)
+        .where(Media.id > after_id)
+    )
+    if sort == "year":
+        stmt = stmt.where(Media.release_year.is_(None))
+    else:
+        stmt = stmt.where(func.coalesce(MediaStats.rating_count, 0) == 0)
+    return _filtered(stmt, **filters).order_by(Media.id).limit(limit)
+
+
+def browse_page(db, filters: dict, sort: str = "rating", limit: int = BROWSE_LIMIT, after: tuple = None) -> list:
+    """
+    One page of rows: the ranked rows after `after`, topped up with the
+    rest once they run out. A cursor with value None is already in the rest.
+    """
+    rows = []
+    if after is None or after[0] is not None:
+        rows = db.execute(browse_query(filters, sort, limit, after)).all()
+    if len(rows) < limit:
+        after_id = after[1] if after is not None and after[0] is None else 0
+        rows    += db.execute(browse_rest_query(filters, sort, limit - len(rows), after_id)).all()
+    return rows
+
+
+def parse_browse_cursor(cursor: str) -> tuple:
+    """
+    "VALUE:ID" (as printed under a --browse page) → (value, media_id), with
+    value None for "-" — a cursor among the unreviewed or undated media.
+    """
+    value, _, media_id = (cursor or "").partition(":")
+    try:
+        return (None if value == "-" else float(value)), int(media_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}' — expected VALUE:ID as printed under the previous page")
+
+
+def browse_cursor(row, sort: str) -> str:
+    """The cursor for the page after `row` — its unrounded sort value (or "-") and media id."""
+    m, avg_rating, review_count = row
+    if sort == "year":
+        value = m.release_year
+    else:
+        value = (avg_rating if sort == "rating" else review_count) if review_count else None
+    return f"{'-' if value is None else repr(value)}:{m.id}"
+
+
+def format_browse(row, sort: str) -> dict:
+    m, avg_rating, review_count = row
+    return {
+        "id":           m.id,
+        "title":        m.title,
+        "media_type":   m.media_type.value,
+        "genre":        m.genre or NONE,
+        "release_year": m.release_year or NONE,
+        "avg_rating":   round(avg_rating, 2) if review_count else None,
+        "review_count": review_count or 0,
+        "cursor":       browse_cursor(row, sort),
+    }
+
+
+def browse_key(filters: dict, sort: str, limit: int, after: tuple = None) -> str:
+    """"browse:genre=sci-fi&media_type=movie&sort=rating&limit=20[&after=8.5:42]"."""
+    parts = [f"{name}={str(value).lower()}" for name, value in sorted(filters.items()) if value is not None]
+    parts += [f"sort={sort}", f"limit={limit}"]
+    if after is not None:
+        parts.append(f"after={'-' if after[0] is None else repr(after[0])}:{after[1]}")
+    return "browse:" + "&".join(parts)
+
+
+# ──────────────────────────────────────────────
+# Facets and browsing — cached in Redis
+# ──────────────────────────────────────────────
+
+def _load_facets() -> dict:
+    db = SessionLocal()
+    try:
+        return load_facets(db)
+    finally:
+        db.close()
+
+
+def get_facets() -> dict:
+    """{facet: [[value, media_count, review_count]]} from facet_counts, cached."""
+    facets, _ = get_or_compute(FACETS_KEY, _load_facets, TTL_BROWSE, depends=BROWSE_DEPENDS)
+    return facets or {facet: [] for facet in FACETS}
+
+
+def _load_browse(filters: dict, sort: str, limit: int, after: tuple) -> list:
+    db = SessionLocal()
+    try:
+        return [format_browse(r, sort) for r in browse_page(db, filters, sort, limit, after)]
+    finally:
+        db.close()
+
+
+def _print_facets(facets: dict):
+    print(f"\n📊 Facets (whole catalog — media/reviews):")
+    for facet in FACETS:
+        values = " · ".join(f"{value} {media}/{reviews}" for value, media, reviews in facets.get(facet, []))
+        print(f"   {facet:<7}: {values or '-'}")
+
+
+def browse_media(media_type: str = None, genre: str = None, year_from: int = None, year_to: int = None,
+                 creator: str = None, sort: str = "rating", limit: int = None, after: str = None):
+    """
+    Faceted browse — media matching every given filter, sorted by rating,
+    review count or year, one page at a time, followed by the catalog's
+    precomputed facet counts. With `after` (a VALUE:ID cursor), the page
+    after that position.
+    """
+    if sort not in BROWSE_SORTS:
+        print(f"❌ Invalid sort '{sort}'. Choose from: {list(BROWSE_SORTS)}")
+        return []
+    try:
+        cursor = parse_browse_cursor(after) if after is not None else None
+    except ValueError as e:
+        print(f"❌ {e}")
+        return []
+    if year_from is not None and year_to is not None and year_from > year_to:
+        print(f"❌ Year range {year_from}–{year_to} is empty.")
+        return []
+    limit  = limit or BROWSE_LIMIT
+    facets = get_facets()
+
+    # The genre index is case-sensitive — use the catalog's spelling
+    if genre:
+        genre = next((value for value, _, _ in facets.get("genre", []) if value.lower() == genre.lower()), genre)
+    filters = {"media_type": media_type, "genre": genre, "year_from": year_from,
+               "year_to": year_to, "creator": creator}
+    formatted, from_cache = get_or_compute(
+        browse_key(filters, sort, limit, cursor), lambda: _load_browse(filters, sort, limit, cursor),
+        TTL_BROWSE, depends=BROWSE_DEPENDS,
+    )
+    shown = ", ".join(f"{name}={value}" for name, value in filters.items() if value is not None)
+    if not formatted:
+        print(f"❌ No media found{' for ' + shown if shown else ''}")
+    else:
+        if from_cache:
+            print(f"\n⚡ Loaded from cache!")
+        print(f"\n🧭 Browse ({shown + ', ' if shown else ''}sort={sort}):\n")
+        print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Genre':<15} {'Year':<6} {'Rating':<7} {'Reviews'}")
+        print("-" * 85)
+        for m in formatted:
+            rating = m["avg_rating"] if m["avg_rating"] is not None else "-"
+            print(f"{m['id']:<5} {m['title']:<30} {m['media_type']:<10} {m['genre']:<15} "
+                  f"{m['release_year']:<6} {rating:<7} {m['review_count']}")
+        if len(formatted) == limit:
+            print(f"\n➡️  Next page: --after {formatted[-1]['cursor']}")
+    _print_facets(facets)
+    return formatted or []
@@ -0,0 +1,346 @@
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from sqlalchemy import select
+from database.db import SessionLocal, engine
+from database.models import Media
+from utils.snapshot import save_snapshot, load_snapshot, snapshot_path
+
+# ──────────────────────────────────────────────
+# Trigram index for typo-tolerant title search
+# ──────────────────────────────────────────────
+#
+# Titles are split into words and every distinct word is padded like
+# pg_trgm does ("  incepton ") and cut into trigrams. A misspelt word
+# still shares most trigrams with the real one — "incepton" keeps 8 of
+# the 10 of "inception" — so the trigram → words index finds candidate
+# words, edit distance confirms them, and the word → titles index turns
+# them into titles. Indexing words rather than whole titles keeps the
+# trigram lists as long as the vocabulary, not the catalog.
+
+# A word must share at least this fraction of the query word's trigrams
+FUZZY_MIN_OVERLAP = 0.4
+# ... and be within this normalized edit similarity (1 = identical)
+FUZZY_MIN_EDIT    = 0.5
+# Word similarity = this × edit similarity + the rest × trigram Jaccard
+FUZZY_EDIT_WEIGHT = 0.6
+# Title score = query words' best similarities, less for extra title words
+FUZZY_EXTRA_WEIGHT = 0.2
+FUZZY_MIN_SCORE    = 0.4
+
+FUZZY_LIMIT           = 10      # results by default
+FUZZY_WORD_CANDIDATES = 50      # words per query word that get the edit distance
+FUZZY_CANDIDATES      = 200     # titles that get fully scored
+FUZZY_SCAN_BUDGET     = 20000   # postings read beyond the minimum, to prune early
+
+# Rewrite the snapshot once this many titles were added since it was saved
+FUZZY_RESAVE_EVERY = 1000
+
+SNAPSHOT_MAGIC   = b"MRTG"
+SNAPSHOT_VERSION = 2
+
+_WORD  = re.compile(r"\w+")
+_EMPTY = array("I")
+
+
+def normalize(text: str) -> list:
+    """"The Dark Knight: Rises" → ["the", "dark", "knight", "rises"]."""
+    return _WORD.findall(text.lower())
+
+
+def trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance, also counting two swapped letters as one edit."""
+    if len(a) < len(b):
+        a, b = b, a
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            best = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if cost and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                best = min(best, before[j - 2] + 1)
+            current.append(best)
+        before, previous = previous, current
+    return previous[-1]
+
+
+def word_similarity(word: str, grams: set, other: str):
+    """Similarity of two words in 0–1, or None when they are too far apart."""
+    longest = max(len(word), len(other))
+    if abs(len(word) - len(other)) > (1 - FUZZY_MIN_EDIT) * longest:
+        return None
+    other_grams = trigrams(other)
+    overlap     = len(grams & other_grams)
+    if overlap < FUZZY_MIN_OVERLAP * len(grams):
+        return None
+    edit = 1 - edit_distance(word, other) / longest
+    if edit < FUZZY_MIN_EDIT:
+        return None
+    return FUZZY_EDIT_WEIGHT * edit + (1 - FUZZY_EDIT_WEIGHT) * overlap / len(grams | other_grams)
+
+
+def _scan(lists: list, need: int) -> tuple:
+    """
+    How many of `lists` (sorted shortest first) to read, and the count an
+    entry needs in them to possibly be in `need` lists overall. Anything in
+    `need` of n lists is in at least one of the n - need + 1 shortest; each
+    further list read within the budget raises that bar by one.
+    """
+    scan    = len(lists) - need + 1
+    scanned = sum(len(p) for p in lists[:scan])
+    while scan < len(lists) and scanned + len(lists[scan]) <= FUZZY_SCAN_BUDGET:
+        scanned += len(lists[scan])
+        scan    += 1
+    return scan, need - (len(lists) - scan)
+
+
+class TrigramIndex:
+    """
+    Title positions by word, and words by trigram.
+
+    `ids[pos]` is the media id of `titles[pos]`; `words[wid]` is a word
+    and `word_titles[wid]` the positions of the titles containing it.
+    Postings are unsigned 32-bit arrays, four bytes an entry, saved as is
+    in the snapshot file (utils/snapshot.py).
+    """
+
+    def __init__(self):
+        self.ids         = array("q")
+        self.titles      = []
+        self.words       = []
+        self.word_ids    = {}
+        self.word_titles = []
+        self.grams       = {}
+        self.max_id      = 0
+        self.unsaved     = 0       # titles added since the last save/load
+        self._sorted     = True    # ids ascending — positions found by bisect
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, rows) -> "TrigramIndex":
+        """Index (media_id, title) rows, ideally in id order."""
+        index = cls()
+        for media_id, title in rows:
+            index.add(media_id, title)
+        index.unsaved = 0
+        return index
+
+    def _position(self, media_id: int):
+        if self._sorted:
+            pos = bisect_left(self.ids, media_id)
+            return pos if pos < len(self.ids) and self.ids[pos] == media_id else None
+        try:
+            return self.ids.index(media_id)
+        except ValueError:
+            return None
+
+    def _word_id(self, word: str) -> int:
+        wid = self.word_ids.get(word)
+        if wid is None:
+            wid = self.word_ids[word] = len(self.words)
+            self.words.append(word)
+            self.word_titles.append(array("I"))
+            for gram in trigrams(word):
+                postings = self.grams.get(gram)
+                if postings is None:
+                    postings = self.grams[gram] = array("I")
+                postings.append(wid)
+        return wid
+
+    def add(self, media_id: int, title: str):
+        """Index one title; a media id seen before has its title replaced."""
+        pos = self._position(media_id) if media_id <= self.max_id else None
+        if pos is not None:
+            if self.titles[pos] == title:
+                return
+            # Words no longer used stay in the vocabulary, with no titles
+            for word in set(normalize(self.titles[pos])):
+                self.word_titles[self.word_ids[word]].remove(pos)
+            self.titles[pos] = title
+        else:
+            pos = len(self.ids)
+            self._sorted = self._sorted and media_id > self.max_id
+            self.ids.append(media_id)
+            self.titles.append(title)
+            self.max_id = max(self.max_id, media_id)
+        for word in set(normalize(title)):
+            self.word_titles[self._word_id(word)].append(pos)
+        self.unsaved += 1
+
+    def similar_words(self, word: str) -> dict:
+        """{word id: similarity} of the indexed words close to `word`."""
+        grams = trigrams(word)
+        need  = max(1, math.ceil(len(grams) * FUZZY_MIN_OVERLAP))
+        lists = sorted((self.grams.get(g, _EMPTY) for g in grams), key=len)
+        scan, at_least = _scan(lists, need)
+
+        counts = Counter()
+        for postings in lists[:scan]:
+            counts.update(postings)
+        candidates = [wid for wid, count in counts.items() if count >= at_least]
+        if len(candidates) > FUZZY_WORD_CANDIDATES:
+            candidates = heapq.nlargest(FUZZY_WORD_CANDIDATES, candidates, key=counts.__getitem__)
+
+        similar = {}
+        for wid in candidates:
+            similarity = word_similarity(word, grams, self.words[wid])
+            if similarity is not None:
+                similar[wid] = similarity
+        return similar
+
+    def search(self, query: str, limit: int = FUZZY_LIMIT) -> list:
+        """[(media_id, score)] of the titles closest to `query`, best first."""
+        words   = list(dict.fromkeys(normalize(query)))
+        similar = [self.similar_words(word) for word in words]
+        if not any(similar):
+            return []
+
+        # ── Candidates from the most selective query words ──
+        sizes = [sum(len(self.word_titles[wid]) for wid in s) for s in similar]
+        order = sorted((i for i in range(len(words)) if similar[i]), key=sizes.__getitem__)
+        partial, scanned = Counter(), 0
+        for n, i in enumerate(order):
+            if n and scanned + sizes[i] > FUZZY_SCAN_BUDGET:
+                break
+            best = {}
+            for wid, similarity in similar[i].items():
+                for pos in self.word_titles[wid]:
+                    if similarity > best.get(pos, 0):
+                        best[pos] = similarity
+            partial.update(best)
+            scanned += sizes[i]
+        candidates = heapq.nlargest(FUZZY_CANDIDATES, partial, key=partial.__getitem__)
+
+        # ── Full score: each query word's best match in the title ──
+        results = []
+        for pos in candidates:
+            title_words = {self.word_ids[w] for w in normalize(self.titles[pos])}
+            matched     = [max((s.get(wid, 0) for wid in title_words), default=0) for s in similar]
+            found       = sum(1 for m in matched if m)
+            score       = ((1 - FUZZY_EXTRA_WEIGHT) * sum(matched) / len(words) +
+                           FUZZY_EXTRA_WEIGHT * min(1, found / max(1, len(title_words))))
+            if score >= FUZZY_MIN_SCORE:
+                results.append((score, -self.ids[pos]))
+        results.sort(reverse=True)
+        return [(-neg_id, round(score, 3)) for score, neg_id in results[:limit]]
+
+    # ── Snapshot ──────────────────────────
+
+    def save(self, path: str):
+        grams = list(self.grams)
+        word_postings, gram_postings = array("I"), array("I")
+        for postings in self.word_titles:
+            word_postings.extend(postings)
+        for gram in grams:
+            gram_postings.extend(self.grams[gram])
+        header = {
+            "version": SNAPSHOT_VERSION,
+            "max_id":  self.max_id,
+            "sorted":  self._sorted,
+        }
+        save_snapshot(path, SNAPSHOT_MAGIC, header, [
+            self.ids, self.titles, self.words, grams,
+            array("I", map(len, self.word_titles)), word_postings,
+            array("I", (len(self.grams[g]) for g in grams)), gram_postings,
+        ])
+        self.unsaved = 0
+
+    @classmethod
+    def load(cls, path: str):
+        """The index saved at `path`, or None if it is missing or unreadable."""
+        loaded = load_snapshot(path, SNAPSHOT_MAGIC)
+        if loaded is None or loaded[0].get("version") != SNAPSHOT_VERSION or len(loaded[1]) != 8:
+            return None
+        header, (ids, titles, words, grams, word_lengths, word_postings,
+                 gram_lengths, gram_postings) = loaded
+        if len(ids) != len(titles) or len(word_lengths) != len(words) or len(gram_lengths) != len(grams):
+            return None
+
+        index = cls()
+        index.ids, index.titles, index.words = ids, titles, words
+        start = 0
+        for length in word_lengths:
+            index.word_titles.append(word_postings[start:start + length])
+            start += length
+        start = 0
+        for gram, length in zip(grams, gram_lengths):
+            index.grams[gram] = gram_postings[start:start + length]
+            start += length
+        index.word_ids = {word: wid for wid, word in enumerate(words)}
+        index.max_id   = header["max_id"]
+        index._sorted  = header["sorted"]
+        return index
+
+
+# ──────────────────────────────────────────────
+# The process-wide index
+# ──────────────────────────────────────────────
+
+# Set MEDIA_FUZZY_SNAPSHOT to keep the snapshot elsewhere
+SNAPSHOT_PATH = os.environ.get("MEDIA_FUZZY_SNAPSHOT") or snapshot_path(engine, "trgm")
+
+_index = None
+_lock  = threading.Lock()
+
+
+def _rows_after(media_id: int) -> list:
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(Media.id, Media.title).where(Media.id > media_id).order_by(Media.id)
+        ).all()
+    finally:
+        db.close()
+
+
+def _save(index: TrigramIndex):
+    if not SNAPSHOT_PATH:
+        return
+    try:
+        index.save(SNAPSHOT_PATH)
+    except OSError as e:
+        print(f"⚠️  Could not save fuzzy index snapshot: {e}")
+
+
+def get_index() -> TrigramIndex:
+    """
+    The index for this process: loaded from the snapshot (or built from the
+    database the first time) and caught up with media added since — by
+    this process or any other — before every search.
+    """
+    global _index
+    with _lock:
+        if _index is None:
+            _index = TrigramIndex.load(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+            if _index is None:
+                started = time.perf_counter()
+                _index  = TrigramIndex.build(_rows_after(0))
+                print(f"🔧 Built fuzzy index over {len(_index)} titles "
+                      f"in {time.perf_counter() - started:.2f}s")
+                _save(_index)
+        for media_id, title in _rows_after(_index.max_id):
+            _index.add(media_id, title)
+        if _index.unsaved >= FUZZY_RESAVE_EVERY:
+            _save(_index)
+        return _index
+
+
+def index_media(media_id: int, title: str):
+    """add_media's hook — indexes the new title if this process has the index loaded."""
+    with _lock:
+        if _index is not None:
+            _index.add(media_id, title)
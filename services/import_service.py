@@ -0,0 +1,291 @@
+import csv
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import repeat
+from cache.redis_client import bump_namespaces, user_namespace, NS_RATINGS
+from database.db import SessionLocal
+from database.models import User
+from services.review_writer import (
+    ReviewRow, stage_review_batch, stage_rows_individually, chunked,
+    INSERTED, UPDATED, SKIPPED, ON_CONFLICT_FAIL, ON_CONFLICT_MODES, REJECT_UNKNOWN_USER,
+)
+
+# Parse-stage reject reasons (validation reasons live in review_writer)
+REJECT_MISSING_FIELD = "missing_field"
+REJECT_BAD_NUMBER    = "bad_number"
+REJECT_BAD_DATE      = "bad_date"
+
+# Below this many bytes per worker, forking costs more than it saves
+MIN_RANGE_BYTES = 1 << 20   # 1 MB
+
+
+# ──────────────────────────────────────────────
+# Parse stage — runs in worker processes
+# ──────────────────────────────────────────────
+
+def _split_ranges(file_path: str, data_start: int, parts: int) -> list:
+    """Split the data section of the file into up to `parts` byte ranges."""
+    size = os.path.getsize(file_path)
+    span = size - data_start
+    if span <= 0:
+        return []
+    count = max(1, min(parts, span // MIN_RANGE_BYTES))
+    step  = span // count
+    return [
+        (data_start + i * step, size if i == count - 1 else data_start + (i + 1) * step)
+        for i in range(count)
+    ]
+
+
+def _parse_created_at(value: str):
+    created_at = datetime.fromisoformat(value)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at
+
+
+def _parse_range(file_path: str, header: list, start: int, end: int, data_start: int):
+    """
+    Parse every line that *starts* inside [start, end).
+
+    A line straddling `start` belongs to the previous range, so we first
+    skip to the next line boundary. Records must not contain embedded
+    newlines — the price of splitting a CSV by byte offset.
+
+    Returns (rows, rejects, lines_read, cpu_seconds) where rows and rejects
+    carry line numbers relative to this range (1 = first line read).
+    """
+    cpu_start = time.process_time()
+    rows      = []
+    rejects   = []
+    lines     = 0
+
+    with open(file_path, "rb") as f:
+        if start > data_start:
+            f.seek(start - 1)
+            f.readline()
+        else:
+            f.seek(start)
+        position = f.tell()
+
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            lines    += 1
+
+            values = next(csv.reader([line.decode("utf-8")]), [])
+            if not values:
+                continue
+            record = dict(zip(header, (v.strip() for v in values)))
+
+            user_id = record.get("user_id")
+            email   = record.get("email")
+            if not (user_id or email) or not record.get("media_id") or not record.get("rating"):
+                rejects.append((lines, REJECT_MISSING_FIELD, "user, media_id and rating are required"))
+                continue
+            try:
+                user_key = int(user_id) if user_id else email
+                media_id = int(record["media_id"])
+                rating   = float(record["rating"])
+            except ValueError as e:
+                rejects.append((lines, REJECT_BAD_NUMBER, str(e)))
+                continue
+            try:
+                created_at = _parse_created_at(record["created_at"]) if record.get("created_at") else None
+            except ValueError as e:
+                rejects.append((lines, REJECT_BAD_DATE, str(e)))
+                continue
+
+            rows.append((lines, user_key, media_id, rating, record.get("comment", ""), created_at))
+
+    return rows, rejects, lines, time.process_time() - cpu_start
+
+
+# ──────────────────────────────────────────────
+# Resolve + write stages — single writer in this process
+# ──────────────────────────────────────────────
+
+def _resolve_emails(db, rows: list) -> dict:
+    """Map every email referenced in `rows` to a user id with IN queries."""
+    emails = list({r[1] for r in rows if isinstance(r[1], str)})
+    ids    = {}
+    for chunk in chunked(emails):
+        ids.update(db.query(User.email, User.id).filter(User.email.in_(chunk)).all())
+    return ids
+
+
+class ImportStats:
+    """Counters and stage timings for one import run."""
+
+    def __init__(self, out=None):
+        self.read     = 0
+        self.inserted = 0
+        self.updated  = 0
+        self.skipped  = 0
+        self.rejects  = Counter()
+        self.timings  = Counter()
+        self.commits  = 0
+        self.users    = set()      # users whose ratings changed
+        self._out     = out
+
+    def reject(self, reason: str, message: str):
+        self.rejects[reason] += 1
+        if self._out:
+            print(f"[{reason}] {message}", file=self._out)
+
+    def add_results(self, rows: list, results: list):
+        for row, (outcome, message) in zip(rows, results):
+            if outcome == INSERTED:
+                self.inserted += 1
+                self.users.add(row.user_id)
+            elif outcome == UPDATED:
+                self.updated += 1
+                self.users.add(row.user_id)
+            elif outcome == SKIPPED:
+                self.skipped += 1
+            else:
+                self.reject(outcome, message)
+
+
+def _write_batch(db, rows: list, stats: ImportStats, on_conflict: str):
+    started = time.perf_counter()
+    try:
+        results = stage_review_batch(db, rows, on_conflict)
+        db.commit()
+        stats.commits += 1
+    except Exception:
+        db.rollback()
+        results = stage_rows_individually(db, rows, on_conflict)
+        stats.commits += len(rows)
+    stats.add_results(rows, results)
+    stats.timings["write"] += time.perf_counter() - started
+
+
+def import_reviews(file_path: str, workers: int = 4, batch_size: int = 1000, report_path: str = None,
+                   on_conflict: str = ON_CONFLICT_FAIL):
+    """
+    Admin import of historic reviews for many users at once.
+
+    CSV format (user_id OR email is required; comment and created_at are optional):
+        user_id|email, media_id, rating, comment, created_at
+
+    The file is split into byte ranges parsed in parallel by a process
+    pool; this process resolves emails and is the single writer, inserting
+    `batch_size` rows per transaction through the set-based batch path.
+    Rejected rows are counted by reason and, with `report_path`, listed.
+    `on_conflict` ("fail", "skip", "update") handles reviews that exist already.
+    """
+    if on_conflict not in ON_CONFLICT_MODES:
+        print(f"❌ Unknown conflict mode '{on_conflict}'. Choose from: {list(ON_CONFLICT_MODES)}")
+        return None
+
+    try:
+        with open(file_path, "rb") as f:
+            first_line = f.readline()
+    except FileNotFoundError:
+        print(f"❌ File '{file_path}' not found.")
+        return None
+
+    header = [h.strip() for h in next(csv.reader([first_line.decode("utf-8")]), [])]
+    if "media_id" not in header or "rating" not in header or not ({"user_id", "email"} & set(header)):
+        print("❌ CSV needs media_id, rating and a user_id or email column.")
+        return None
+
+    ranges = _split_ranges(file_path, len(first_line), workers * 4)
+    out    = open(report_path, "w") if report_path else None
+    stats  = ImportStats(out)
+
+    print(f"\n📂 Importing '{file_path}' — {len(ranges)} range(s) across {workers} worker process(es)")
+
+    wall_start = time.perf_counter()
+    executor   = ProcessPoolExecutor(max_workers=workers) if len(ranges) > 1 else None
+    mapper     = executor.map if executor else map
+    parsed     = mapper(
+        _parse_range,
+        repeat(file_path), repeat(header),
+        [start for start, _ in ranges], [end for _, end in ranges],
+        repeat(len(first_line)),
+    )
+
+    db        = SessionLocal()
+    pending   = []
+    line_base = 1   # the header is line 1
+    try:
+        while True:
+            waited = time.perf_counter()
+            try:
+                rows, rejects, lines, cpu = next(parsed)
+            except StopIteration:
+                break
+            stats.timings["parse_wait"] += time.perf_counter() - waited
+            stats.timings["parse_cpu"]  += cpu
+            stats.read += len(rows) + len(rejects)
+
+            for local, reason, detail in rejects:
+                stats.reject(reason, f"❌ Row {line_base + local}: {detail}")
+
+            started = time.perf_counter()
+            emails  = _resolve_emails(db, rows)
+            for local, user_key, media_id, rating, comment, created_at in rows:
+                line    = line_base + local
+                user_id = emails.get(user_key) if isinstance(user_key, str) else user_key
+                if user_id is None:
+                    stats.reject(REJECT_UNKNOWN_USER, f"❌ Row {line}: No user found with email {user_key}")
+                    continue
+                pending.append(ReviewRow(user_id, media_id, rating, comment, line - 1, created_at))
+            stats.timings["resolve"] += time.perf_counter() - started
+
+            while len(pending) >= batch_size:
+                _write_batch(db, pending[:batch_size], stats, on_conflict)
+                pending = pending[batch_size:]
+
+            line_base += lines
+
+        if pending:
+            _write_batch(db, pending, stats, on_conflict)
+
+    finally:
+        db.close()
+        if executor:
+            executor.shutdown()
+        if out:
+            out.close()
+
+    elapsed = time.perf_counter() - wall_start
+    _print_import_summary(stats, elapsed, report_path)
+
+    # Ratings changed — bump the shared namespace plus each touched user's
+    if stats.users:
+        bump_namespaces(NS_RATINGS, *(user_namespace(u) for u in sorted(stats.users)))
+    return stats
+
+
+def _print_import_summary(stats: ImportStats, elapsed: float, report_path: str):
+    rejected = sum(stats.rejects.values())
+
+    print(f"\n{'─'*44}")
+    print(f"📊 Rows read   : {stats.read}")
+    print(f"✅ Inserted    : {stats.inserted}")
+    if stats.updated:
+        print(f"🔄 Updated     : {stats.updated}")
+    if stats.skipped:
+        print(f"⏭️  Skipped     : {stats.skipped}")
+    print(f"❌ Rejected    : {rejected}")
+    for reason, count in stats.rejects.most_common():
+        print(f"     {reason:<15} {count}")
+    print(f"🧱 Commits     : {stats.commits}")
+    print(f"⏱️  Time taken  : {elapsed:.4f} seconds")
+    print(f"⚡ Rows/second : {stats.read / elapsed if elapsed else 0:.0f}")
+    print(f"\n   Stage timings")
+    print(f"     parse (waiting on workers) : {stats.timings['parse_wait']:.4f} s")
+    print(f"     parse (worker CPU, summed) : {stats.timings['parse_cpu']:.4f} s")
+    print(f"     resolve emails             : {stats.timings['resolve']:.4f} s")
+    print(f"     validate + write           : {stats.timings['write']:.4f} s")
+    print(f"{'─'*44}")
+    if report_path:
+        print(f"📝 Rejected rows written to '{report_path}'")
@@ -1,7 +1,29 @@
-from database.db import SessionLocal
+import re
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from database.db import SessionLocal, engine
+from database.fts import fts_ready, match_expression, apply_match
+from database.facets import facet_media_upsert, facet_media_params
 from database.models import Media, MediaType
 from patterns.factory import MediaFactory
-from cache.redis_client import get_cache, set_cache, TTL_SEARCH
+from services import fuzzy_index, suggest_index
+from cache.redis_client import (
+    set_cache, bump_namespaces, get_versioned, queue_search_term,
+    NS_MEDIA, TTL_SEARCH, TTL_SEARCH_EMPTY,
+)
+
+# Namespaces each cached result depends on
+SEARCH_DEPENDS = [NS_MEDIA]
+
+# A cached search for a shorter prefix of the term (at least this long) is
+# filtered in memory instead of rescanning the table
+SEARCH_REFINE_MIN = 2
+
+# How search_query() matches a term — part of the search cache key
+SEARCH_FTS   = "fts"
+SEARCH_ILIKE = "like"
+
+LIST_LIMIT = 50     # --list page size by default
 
 
 def add_media(title: str, media_type: str, genre: str, release_year: int, creator: str):
@@ -23,9 +45,20 @@ def add_media(title: str, media_type: str, genre: str, release_year: int, creato
         # Convert to DB model and save
         db_media = media_obj.to_db_model()
         db.add(db_media)
-        db.commit()
+        db.execute(facet_media_upsert(), facet_media_params(db_media.media_type, genre, release_year))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            print(f" '{title}' already exists as a {media_type}.")
+            return None
         db.refresh(db_media)
 
+        # Every cached search may now be missing this title
+        bump_namespaces(NS_MEDIA)
+        fuzzy_index.index_media(db_media.id, db_media.title)
+        suggest_index.invalidate()
+
         print(f" Added successfully!\n")
         print(media_obj.get_details())
         return db_media
@@ -42,11 +75,23 @@ def add_media(title: str, media_type: str, genre: str, release_year: int, creato
     finally:
         db.close()
 
-def get_all_media():
-    """Fetch all media items."""
+def list_query(after_id: int = None, limit: int = LIST_LIMIT):
+    """
+    SELECT one page of media by id. Keyset pagination: the page after
+    `after_id` is a primary-key seek, so deep pages cost what the first does.
+    """
+    stmt = select(Media).order_by(Media.id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.where(Media.id > after_id)
+    return stmt
+
+
+def get_all_media(after_id: int = None, limit: int = None):
+    """Fetch one page of media items, `limit` (LIST_LIMIT by default) after `after_id`."""
+    limit = limit or LIST_LIMIT
     db = SessionLocal()
     try:
-        media_list = db.query(Media).all()
+        media_list = db.scalars(list_query(after_id, limit)).all()
         if not media_list:
             print("No media found.")
             return []
@@ -56,62 +101,235 @@ def get_all_media():
         for m in media_list:
             print(f"{m.id:<5} {m.title:<30} {m.media_type.value:<10} "
                   f"{m.genre or 'N/A':<15} {m.release_year or 'N/A':<6} {m.creator or 'N/A'}")
+        if len(media_list) == limit:
+            print(f"\n➡️  Next page: --after-id {media_list[-1].id}")
         return media_list
 
     finally:
         db.close()
 
 
-def search_by_title(title: str):
-    """Search media by title — cached in Redis."""
-    cache_key = f"search:{title.lower()}"
+# ── Shared with services/async_service.py ──────
 
-    # ── Check cache first ─────────────────────
-    cached = get_cache(cache_key)
-    if cached:
-        print(f"\n⚡ Loaded from cache!\n")
-        print(f"🔍 Results for '{title}':\n")
-        print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Genre':<15} {'Year':<6} {'Creator'}")
-        print("-" * 75)
-        for m in cached:
-            print(f"{m['id']:<5} {m['title']:<30} {m['media_type']:<10} "
-                  f"{m['genre']:<15} {m['release_year']:<6} {m['creator']}")
-        return cached
+def search_query(title: str, limit: int = None, offset: int = 0):
+    """
+    SELECT for a title search. With the FTS5 index: every word of `title`
+    as a prefix of a word in the title or creator, best bm25 match first.
+    Without it: a case-insensitive substring scan of the title, by id.
+    """
+    if search_mode(title) == SEARCH_FTS:
+        stmt = apply_match(select(Media), Media, match_expression(title))
+    else:
+        stmt = select(Media).where(Media.title.ilike(f"%{title}%")).order_by(Media.id)
+    return stmt.limit(limit).offset(offset)
 
-    # ── Cache miss — query database ───────────
-    db = SessionLocal()
-    try:
-        results = db.query(Media).filter(Media.title.ilike(f"%{title}%")).all()
 
-        if not results:
+def format_media(m: Media) -> dict:
+    """Media row → the JSON-safe dict that is cached and returned by searches."""
+    return {
+        "id":           m.id,
+        "title":        m.title,
+        "media_type":   m.media_type.value,
+        "genre":        m.genre or "N/A",
+        "release_year": m.release_year or "N/A",
+        "creator":      m.creator or "N/A"
+    }
+
+
+def search_mode(title: str) -> str:
+    """SEARCH_FTS when search_query() will use the FTS index for `title`, else SEARCH_ILIKE."""
+    return SEARCH_FTS if fts_ready(engine) and match_expression(title) else SEARCH_ILIKE
+
+
+def search_key(title: str, limit: int = None, offset: int = 0) -> str:
+    # The two modes return different rows — never serve one's entry to the other
+    base = f"search:{search_mode(title)}:{title.lower()}"
+    if limit is None and not offset:
+        return base
+    return f"{base}?limit={limit}&offset={offset}"
+
+
+def _ascii_lower(text: str) -> str:
+    # SQLite's LIKE folds ASCII letters only — match it exactly
+    return text.translate(_ASCII_LOWER)
+
+
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def search_probe_terms(title: str, mode: str = SEARCH_ILIKE) -> list:
+    """
+    The term itself, then its prefixes longest first (down to SEARCH_REFINE_MIN).
+
+    ILIKE: every title containing the term contains each of its prefixes,
+    so a cached result for a prefix is a complete superset. Terms with LIKE
+    wildcards are never refined — their SQL and in-memory matches differ.
+    FTS: only a single ASCII word is refined — every title or creator with
+    a word starting with it has a word starting with each of its prefixes.
+    """
+    term = title.lower()
+    if mode == SEARCH_FTS and not _ASCII_WORD.fullmatch(term):
+        return [term]
+    if mode == SEARCH_ILIKE and ("%" in term or "_" in term):
+        return [term]
+    return [term] + [term[:n] for n in range(len(term) - 1, SEARCH_REFINE_MIN - 1, -1)]
+
+
+def refine_search(title: str, rows: list) -> list:
+    """Rows of a cached prefix search that also match `title`, like ILIKE '%title%'."""
+    needle = _ascii_lower(title)
+    return [m for m in rows if needle in _ascii_lower(m["title"])]
+
+
+_ASCII_WORD = re.compile(r"[a-z0-9]+")
+
+
+def refine_fts_search(title: str, prefix: str, rows: list):
+    """
+    Rows of a cached FTS search for `prefix` that also match the single
+    word `title`, in the order the database would return them — or None
+    when that order cannot be known in memory.
+
+    For a one-word query bm25 is a constant (the word's idf) times a
+    per-row score of its hit count and length, so the superset's order
+    carries over if every kept row has as many words starting with `title`
+    as with `prefix`. Rows with non-ASCII text are not tokenized here —
+    FTS5 folds their diacritics — so they also send the search to SQL.
+    """
+    word, kept = title.lower(), []
+    for m in rows:
+        # A missing creator is cached as "N/A" — its one-letter words never match
+        columns = [m["title"], m["creator"]]
+        if not all(text.isascii() for text in columns):
+            return None
+        words = [_ASCII_WORD.findall(text.lower()) for text in columns]
+        hits  = [sum(w.startswith(word) for w in column) for column in words]
+        if not any(hits):
+            continue
+        if hits != [sum(w.startswith(prefix) for w in column) for column in words]:
+            return None
+        kept.append(m)
+    return kept
+
+
+def _print_search(title: str, rows: list):
+    print(f"🔍 Results for '{title}':\n")
+    print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Genre':<15} {'Year':<6} {'Creator'}")
+    print("-" * 75)
+    for m in rows:
+        print(f"{m['id']:<5} {m['title']:<30} {m['media_type']:<10} "
+              f"{m['genre']:<15} {m['release_year']:<6} {m['creator']}")
+
+
+def search_by_title(title: str, limit: int = None, offset: int = 0):
+    """
+    Search media by title — cached in Redis, one page of `limit` results
+    from `offset` (all of them by default).
+
+    Empty results are cached too (for TTL_SEARCH_EMPTY). A cached search
+    for a prefix of the title is filtered in memory — the exact key and
+    every prefix key are fetched in the same round trip. With FTS only a
+    single ASCII word is refined, and only when the ranking is known to
+    carry over (see refine_fts_search); otherwise the database is queried.
+    """
+    mode = search_mode(title)
+    if limit is None and not offset:
+        terms = search_probe_terms(title, mode)
+    else:
+        terms = [title.lower()]
+    # Generations, cached pages and the search counter: one round trip
+    keys, cached = get_versioned([search_key(terms[0], limit, offset)] + [search_key(t) for t in terms[1:]],
+                                 SEARCH_DEPENDS, extra=lambda pipe: queue_search_term(pipe, title))
+
+    # ── Exact hit (possibly a cached "no results") ──
+    if keys[0] in cached:
+        formatted = cached[keys[0]]
+        if not formatted:
             print(f"❌ No media found matching '{title}'")
             return []
-
-        formatted = [
-            {
-                "id":           m.id,
-                "title":        m.title,
-                "media_type":   m.media_type.value,
-                "genre":        m.genre or "N/A",
-                "release_year": m.release_year or "N/A",
-                "creator":      m.creator or "N/A"
-            }
-            for m in results
-        ]
-
-        # ── Store in Redis ─────────────────────
-        set_cache(cache_key, formatted, TTL_SEARCH)
-
-        print(f"\n🔍 Results for '{title}':\n")
-        print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Genre':<15} {'Year':<6} {'Creator'}")
-        print("-" * 75)
-        for m in formatted:
-            print(f"{m['id']:<5} {m['title']:<30} {m['media_type']:<10} "
-                  f"{m['genre']:<15} {m['release_year']:<6} {m['creator']}")
+        print(f"\n⚡ Loaded from cache!\n")
+        _print_search(title, formatted)
         return formatted
 
+    # ── Refine a cached prefix search, else query the database ──
+    prefix, superset = next(((t, cached[k]) for t, k in zip(terms[1:], keys[1:]) if k in cached),
+                            (None, None))
+    formatted = None
+    if prefix is not None:
+        if mode == SEARCH_FTS:
+            formatted = refine_fts_search(title, prefix, superset)
+        else:
+            formatted = refine_search(title, superset)
+    if formatted is None:
+        prefix = None
+        db = SessionLocal()
+        try:
+            formatted = [format_media(m) for m in db.execute(search_query(title, limit, offset)).scalars().all()]
+        finally:
+            db.close()
+
+    # ── Store in Redis ─────────────────────
+    set_cache(keys[0], formatted, TTL_SEARCH if formatted else TTL_SEARCH_EMPTY)
+
+    if not formatted:
+        print(f"❌ No media found matching '{title}'")
+        return []
+    if prefix is not None:
+        print(f"\n⚡ Filtered from cached results for '{prefix}'!\n")
+    else:
+        print()
+    _print_search(title, formatted)
+    return formatted
+
+
+def fuzzy_search_by_title(title: str, limit: int = None):
+    """
+    Typo-tolerant title search over the in-memory trigram index —
+    "Incepton" finds "Inception". Best `limit` matches, scored 0–1.
+    """
+    matches = fuzzy_index.get_index().search(title, limit or fuzzy_index.FUZZY_LIMIT)
+    if not matches:
+        print(f"❌ No media found close to '{title}'")
+        return []
+
+    db = SessionLocal()
+    try:
+        rows = {m.id: m for m in db.execute(
+            select(Media).where(Media.id.in_([media_id for media_id, _ in matches]))
+        ).scalars()}
     finally:
         db.close()
+    # Media deleted since it was indexed simply drops out
+    formatted = [{**format_media(rows[media_id]), "score": score}
+                 for media_id, score in matches if media_id in rows]
+    if not formatted:
+        print(f"❌ No media found close to '{title}'")
+        return []
+
+    print(f"\n🔎 Closest matches for '{title}':\n")
+    print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Year':<6} {'Score'}")
+    print("-" * 60)
+    for m in formatted:
+        print(f"{m['id']:<5} {m['title']:<30} {m['media_type']:<10} {m['release_year']:<6} {m['score']:.2f}")
+    return formatted
+
+
+def suggest_titles(prefix: str, limit: int = None, order: str = "reviews"):
+    """
+    Autocomplete — the titles with a word starting with `prefix`, most
+    reviewed (or best rated) first, from the in-memory suggestion index.
+    """
+    suggestions = suggest_index.get_index().suggest(prefix, limit or suggest_index.SUGGEST_LIMIT, order)
+    if not suggestions:
+        print(f"❌ No titles start with '{prefix}'")
+        return []
+
+    print(f"\n💬 Suggestions for '{prefix}' (by {order}):\n")
+    print(f"{'ID':<5} {'Title':<30} {'Reviews':<8} {'Avg Rating'}")
+    print("-" * 56)
+    for s in suggestions:
+        print(f"{s['id']:<5} {s['title']:<30} {s['review_count']:<8} {s['avg_rating']}")
+    return suggestions
 
 
 def get_media_by_id(media_id: int):
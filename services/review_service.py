@@ -1,14 +1,37 @@
 from database.db import SessionLocal
-from database.models import Review, Media, User
-from sqlalchemy import func
+from database.models import Review, Media, User, MediaStats
+from sqlalchemy import select, or_
+from sqlalchemy.exc import IntegrityError
 import threading
 import csv
+import json
+import os
 import time
-from cache.redis_client import get_cache, set_cache, delete_cache, TTL_TOP_RATED, TTL_RECOMMENDATIONS
+from cache.redis_client import (
+    get_or_compute, bump_namespaces, user_namespace,
+    NS_MEDIA, NS_RATINGS, TTL_TOP_RATED, TTL_RECOMMENDATIONS,
+)
+from services.stats_service import record_rating
+from services.review_writer import (
+    ReviewWriter, ReviewRow, write_review_batch, write_rows_individually,
+    ON_CONFLICT_FAIL, ON_CONFLICT_MODES,
+)
 
 TTL_RECOMMENDATIONS = 180  # 3 minutes
 
-db_lock = threading.Lock()
+# Namespaces each cached result depends on, and the ones a review write bumps
+TOP_RATED_DEPENDS = [NS_RATINGS]
+
+REVIEWS_LIMIT = 20    # --reviews page size by default
+
+
+def recommendations_depends(user_id: int) -> list:
+    # new titles can be recommended; the user's own reviews pick the genres
+    return [NS_MEDIA, user_namespace(user_id)]
+
+
+def review_writes(user_id: int) -> list:
+    return [NS_RATINGS, user_namespace(user_id)]
 
 
 def submit_review(user_id: int, media_id: int, rating: float, comment: str):
@@ -48,13 +71,22 @@ def submit_review(user_id: int, media_id: int, rating: float, comment: str):
             comment=comment
         )
         db.add(review)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Another process inserted the same (user, media) pair after our check
+            db.rollback()
+            print(f"❌ User {user_id} has already reviewed '{media.title}'")
+            return None
+
+        # Keep the leaderboard aggregate in the same transaction as the review
+        record_rating(db, media_id, rating, review.created_at)
         db.commit()
         db.refresh(review)
         print(f"✅ Review submitted for '{media.title}' by {user.name} | Rating: {rating}/10")
 
-        # Invalidate top-rated cache since ratings changed
-        delete_cache("top_rated:5")
-        delete_cache(f"recommendations:{user_id}") 
+        # Every top-rated list and this user's recommendations are now stale
+        bump_namespaces(*review_writes(user_id))
 
         return review
 
@@ -67,283 +99,597 @@ def submit_review(user_id: int, media_id: int, rating: float, comment: str):
         db.close()
 
 
-def submit_review_thread(user_id: int, media_id: int, rating: float,
-                          comment: str, results: list, index: int):
-    """Thread-safe version of submit_review."""
-    db = SessionLocal()
+BULK_MODES = ("set", "pool", "stream")
+
+
+class BulkReport:
+    """
+    Prints bulk ✅/❌ rows in file order while keeping only running totals.
+
+    Rows may be reported out of order; finished rows wait in a small
+    buffer until every earlier row has been printed.
+    """
+
+    def __init__(self, out=None, start: int = 0):
+        self.success  = 0
+        self.updated  = 0
+        self.skipped  = 0
+        self.failed   = 0
+        self._next    = start
+        self._pending = {}
+        self._out     = out
+        self._lock    = threading.Lock()
+
+    @property
+    def total(self):
+        return self.success + self.updated + self.skipped + self.failed
+
+    def add(self, index: int, result: str):
+        with self._lock:
+            self._pending[index] = result
+            while self._next in self._pending:
+                self._emit(self._pending.pop(self._next))
+                self._next += 1
+
+    def _emit(self, result: str):
+        print(result, file=self._out)
+        if result.startswith("✅"):
+            self.success += 1
+        elif result.startswith("🔄"):
+            self.updated += 1
+        elif result.startswith("⏭️"):
+            self.skipped += 1
+        else:
+            self.failed += 1
+
+    def print_summary(self, elapsed: float, commits: int):
+        print(f"\n{'─'*40}")
+        print(f"✅ Successful : {self.success}")
+        if self.updated:
+            print(f"🔄 Updated    : {self.updated}")
+        if self.skipped:
+            print(f"⏭️  Skipped    : {self.skipped}")
+        print(f"❌ Failed     : {self.failed}")
+        print(f"📊 Total      : {self.total}")
+        print(f"🧱 Commits    : {commits}")
+        print(f"⏱️  Time taken : {elapsed:.4f} seconds")
+        print(f"⚡ Avg/review : {(elapsed/max(self.total, 1)*1000):.2f} ms")
+        print(f"{'─'*40}")
+
+
+def _parse_review_row(row: dict):
+    """Convert one CSV row to typed values, or report it and return None."""
     try:
-        if not (1.0 <= rating <= 10.0):
-            results[index] = f"❌ Row {index+1}: Rating must be between 1.0 and 10.0"
-            return
+        return {
+            "media_id": int(row["media_id"].strip()),
+            "rating":   float(row["rating"].strip()),
+            "comment":  row["comment"].strip()
+        }
+    except (ValueError, KeyError, AttributeError) as e:
+        print(f"⚠️  Skipping invalid row: {row} — {e}")
+        return None
 
-        user  = db.query(User).filter(User.id == user_id).first()
-        media = db.query(Media).filter(Media.id == media_id).first()
 
-        if not user:
-            results[index] = f"❌ Row {index+1}: No user found with ID {user_id}"
-            return
-        if not media:
-            results[index] = f"❌ Row {index+1}: No media found with ID {media_id}"
-            return
+def _parse_reviews(f):
+    """Yield validly-typed CSV rows one at a time; report and skip the rest."""
+    for row in csv.DictReader(f):
+        review = _parse_review_row(row)
+        if review:
+            yield review
 
-        existing = db.query(Review).filter(
-            Review.user_id == user_id,
-            Review.media_id == media_id
-        ).first()
-        if existing:
-            results[index] = f"❌ Row {index+1}: User {user_id} already reviewed '{media.title}'"
-            return
-
-        with db_lock:
-            review = Review(
-                user_id=user_id,
-                media_id=media_id,
-                rating=rating,
-                comment=comment
-            )
-            db.add(review)
+
+def _submit_with_pool(user_id: int, reviews, report: BulkReport, batch_size: int, on_conflict: str):
+    """
+    Stream rows into a single group-commit ReviewWriter.
+
+    Validation and inserts are the writer's work, done a batch at a time;
+    reading ahead is all that is left here, so one thread does it. The
+    writer's queue holds at most `in_flight` rows — submit() blocks on a
+    full queue — so memory stays flat however large the file is.
+    """
+    in_flight = batch_size * 2
+    print(f"🚀 Submitting through 1 writer "
+          f"(batches of up to {batch_size}, {in_flight} rows queued at most)...\n")
+    print("📋 Bulk Review Results:\n")
+
+    with ReviewWriter(max_batch=batch_size, on_conflict=on_conflict, max_queue=in_flight) as writer:
+        for i, review in enumerate(reviews):
+            future = writer.submit(user_id, review["media_id"], review["rating"], review["comment"], i)
+            future.add_done_callback(lambda done, i=i: report.add(i, done.result()))
+
+    return writer.batches
+
+
+def _submit_set_based(user_id: int, reviews: list, report: BulkReport, on_conflict: str):
+    """Validate every row with a few IN queries, then insert the survivors in one transaction."""
+    print(f"🚀 Validating {len(reviews)} rows in bulk and inserting in one transaction...\n")
+
+    rows = [
+        ReviewRow(user_id, r["media_id"], r["rating"], r["comment"], i)
+        for i, r in enumerate(reviews)
+    ]
+    db = SessionLocal()
+    try:
+        try:
+            results = write_review_batch(db, rows, on_conflict)
             db.commit()
-            results[index] = f"✅ Row {index+1}: Review submitted for '{media.title}' | Rating: {rating}/10"
+            commits = 1
+        except Exception:
+            # e.g. another terminal inserted one of our pairs meanwhile
+            db.rollback()
+            results = write_rows_individually(db, rows, on_conflict)
+            commits = len(rows)
+    finally:
+        db.close()
 
-    except Exception as e:
-        db.rollback()
-        results[index] = f"❌ Row {index+1}: Error — {e}"
+    print("📋 Bulk Review Results:\n")
+    for i, result in enumerate(results):
+        report.add(i, result)
+    return commits
+
+
+# ──────────────────────────────────────────────
+# Streaming ingest with checkpoints
+# ──────────────────────────────────────────────
 
+def _checkpoint_path(file_path: str) -> str:
+    return f"{file_path}.checkpoint"
+
+
+def _load_checkpoint(file_path: str, user_id: int):
+    """Return the saved position for this file and user, or None."""
+    try:
+        with open(_checkpoint_path(file_path), "r") as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if checkpoint.get("user_id") != user_id:
+        print(f"⚠️  Checkpoint belongs to user {checkpoint.get('user_id')} — starting from the top.")
+        return None
+    return checkpoint
+
+
+def _save_checkpoint(file_path: str, checkpoint: dict):
+    """Write the checkpoint atomically so a crash never leaves half a file."""
+    path = _checkpoint_path(file_path)
+    tmp  = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def _stream_records(f, offset: int):
+    """
+    Yield (row_dict, end_offset) for every CSV record after `offset`.
+
+    `f` is opened in binary mode so the byte offset where each record ends
+    is known exactly — that is what the checkpoint stores.
+    """
+    header   = next(csv.reader([f.readline().decode("utf-8")]))
+    position = max(offset, f.tell())
+    f.seek(position)
+
+    def lines():
+        nonlocal position
+        for line in iter(f.readline, b""):
+            position += len(line)
+            yield line.decode("utf-8")
+
+    for values in csv.reader(lines()):
+        if values:
+            yield dict(zip(header, values)), position
+
+
+def _commit_chunk(rows: list, report: BulkReport, on_conflict: str):
+    db = SessionLocal()
+    try:
+        try:
+            results = write_review_batch(db, rows, on_conflict)
+            db.commit()
+        except Exception:
+            db.rollback()
+            results = write_rows_individually(db, rows, on_conflict)
     finally:
         db.close()
 
+    for row, result in zip(rows, results):
+        report.add(row.index, result)
+
+
+def _submit_streaming(user_id: int, file_path: str, report: BulkReport,
+                      chunk_size: int, checkpoint: dict, on_conflict: str):
+    """
+    Read the CSV lazily and commit every `chunk_size` valid rows.
+
+    After each commit the byte offset and row number are checkpointed, so
+    a crashed run can continue with --resume. If the process dies between
+    a commit and its checkpoint, the resumed run re-reads that chunk and
+    reports its rows as already reviewed — nothing is inserted twice.
+    """
+    offset  = checkpoint["offset"] if checkpoint else 0
+    index   = checkpoint["row"]    if checkpoint else 0
+    commits = 0
+    chunk   = []
+
+    print(f"🚀 Streaming in chunks of {chunk_size} rows, checkpointing to "
+          f"'{_checkpoint_path(file_path)}'...\n")
+    print("📋 Bulk Review Results:\n")
+
+    with open(file_path, "rb") as f:
+        end = offset
+        for row, end in _stream_records(f, offset):
+            review = _parse_review_row(row)
+            if review:
+                chunk.append(ReviewRow(user_id, review["media_id"], review["rating"], review["comment"], index))
+                index += 1
+            if len(chunk) >= chunk_size:
+                _commit_chunk(chunk, report, on_conflict)
+                commits += 1
+                _save_checkpoint(file_path, {"user_id": user_id, "offset": end, "row": index})
+                chunk = []
+
+        if chunk:
+            _commit_chunk(chunk, report, on_conflict)
+            commits += 1
+
+    # Whole file ingested — a later run should start from the top again
+    if os.path.exists(_checkpoint_path(file_path)):
+        os.remove(_checkpoint_path(file_path))
+    return commits
+
+
+def bulk_submit_reviews(file_path: str, user_id: int, batch_size: int = 200,
+                        mode: str = "set", chunk_size: int = 1000,
+                        resume: bool = False, report_path: str = None,
+                        on_conflict: str = ON_CONFLICT_FAIL):
+    """Read reviews from CSV and submit them in bulk.
+
+    Modes:
+        set  : resolve users, media and existing reviews with a few IN
+               queries, then insert every valid row with one executemany
+        pool   : stream the file through a bounded queue into a single
+                 ReviewWriter that commits up to `batch_size` rows at a time
+        stream : read the file lazily, commit every `chunk_size` rows and
+                 checkpoint after each commit; `resume` continues from the
+                 last checkpoint
+
+    `on_conflict` decides what happens to a row whose (user, media) pair
+    already has a review: "fail" rejects it, "skip" leaves the existing
+    review alone and "update" overwrites its rating and comment with a
+    batched INSERT ... ON CONFLICT DO UPDATE.
+
+    Result rows go to stdout, or to `report_path` when given.
 
-def bulk_submit_reviews(file_path: str, user_id: int):
-    """Read reviews from CSV and submit concurrently using multithreading.
-    
     CSV format:
         media_id, rating, comment
     """
-    reviews = []
+    if mode not in BULK_MODES:
+        print(f"❌ Unknown bulk mode '{mode}'. Choose from: {list(BULK_MODES)}")
+        return
+    if on_conflict not in ON_CONFLICT_MODES:
+        print(f"❌ Unknown conflict mode '{on_conflict}'. Choose from: {list(ON_CONFLICT_MODES)}")
+        return
 
     try:
-        with open(file_path, "r") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    reviews.append({
-                        "media_id": int(row["media_id"].strip()),
-                        "rating":   float(row["rating"].strip()),
-                        "comment":  row["comment"].strip()
-                    })
-                except (ValueError, KeyError) as e:
-                    print(f"⚠️  Skipping invalid row: {row} — {e}")
-
+        f = open(file_path, "r")
     except FileNotFoundError:
         print(f"❌ File '{file_path}' not found.")
         return
 
-    if not reviews:
+    checkpoint = None
+    if mode == "stream":
+        checkpoint = _load_checkpoint(file_path, user_id) if resume else None
+        if resume and not checkpoint:
+            print("ℹ️  No checkpoint found — starting from the beginning.")
+        elif not resume and os.path.exists(_checkpoint_path(file_path)):
+            print("ℹ️  A checkpoint exists for this file — pass --resume to continue from it.")
+
+    with f:
+        if mode == "set":
+            reviews = list(_parse_reviews(f))
+            if not reviews:
+                print("❌ No valid reviews found in file.")
+                return
+            print(f"\n📂 Found {len(reviews)} reviews in '{file_path}'")
+        elif checkpoint:
+            print(f"\n📂 Resuming '{file_path}' after row {checkpoint['row']}")
+        else:
+            print(f"\n📂 Streaming reviews from '{file_path}'")
+
+        out    = open(report_path, "a" if checkpoint else "w") if report_path else None
+        report = BulkReport(out=out, start=checkpoint["row"] if checkpoint else 0)
+
+        # ── Start timer ───────────────────────────
+        start_time = time.perf_counter()
+        try:
+            if mode == "set":
+                commits = _submit_set_based(user_id, reviews, report, on_conflict)
+            elif mode == "pool":
+                commits = _submit_with_pool(user_id, _parse_reviews(f), report, batch_size, on_conflict)
+            else:
+                commits = _submit_streaming(user_id, file_path, report, chunk_size, checkpoint,
+                                            on_conflict)
+        finally:
+            if out:
+                out.close()
+
+    # ── Stop timer ────────────────────────────
+    elapsed = time.perf_counter() - start_time
+
+    if report_path:
+        print(f"📝 Row results written to '{report_path}'")
+    if report.total == 0:
         print("❌ No valid reviews found in file.")
         return
 
-    print(f"\n📂 Found {len(reviews)} reviews in '{file_path}'")
-    print(f"🚀 Submitting concurrently using {len(reviews)} threads...\n")
-
-    results = [None] * len(reviews)
-    threads = []
-
-    # ── Start timer ───────────────────────────
-    start_time = time.perf_counter()
-
-    for i, review in enumerate(reviews):
-        thread = threading.Thread(
-            target=submit_review_thread,
-            args=(
-                user_id,
-                review["media_id"],
-                review["rating"],
-                review["comment"],
-                results,
-                i
-            )
-        )
-        threads.append(thread)
-        thread.start()
+    report.print_summary(elapsed, commits)
 
-    for thread in threads:
-        thread.join()
+    # Ratings changed — invalidate what a single submit_review invalidates
+    if report.success or report.updated:
+        bump_namespaces(*review_writes(user_id))
 
-    # ── Stop timer ────────────────────────────
-    end_time = time.perf_counter()
-    elapsed  = end_time - start_time
 
-    # ── Print results ─────────────────────────
-    print("📋 Bulk Review Results:\n")
-    success = 0
-    failed  = 0
-    for result in results:
-        print(result)
-        if result.startswith("✅"):
-            success += 1
-        else:
-            failed += 1
+# ── Shared with services/async_service.py ──────
+
+def top_rated_key(limit: int, after: tuple = None) -> str:
+    return f"top_rated:{limit}" + (f":after={after[0]!r}:{after[1]}" if after is not None else "")
 
-    print(f"\n{'─'*40}")
-    print(f"✅ Successful : {success}")
-    print(f"❌ Failed     : {failed}")
-    print(f"📊 Total      : {len(reviews)}")
-    print(f"⏱️  Time taken : {elapsed:.4f} seconds")
-    print(f"⚡ Avg/review : {(elapsed/len(reviews)*1000):.2f} ms")
-    print(f"{'─'*40}")
 
+def parse_top_rated_cursor(cursor: str) -> tuple:
+    """
+    "RATING:ID" (as printed under a --top-rated page) → (avg_rating, media_id).
+    The exact rating travels in the cursor, so the next page starts where the
+    last one ended even if that media's rating has changed since.
+    """
+    rating, _, media_id = (cursor or "").partition(":")
+    try:
+        return float(rating), int(media_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}' — expected RATING:ID as printed under the previous page")
 
-def get_top_rated(limit: int = 5):
-    """Get top rated media — cached in Redis."""
-    cache_key = f"top_rated:{limit}"
 
-    # ── Check cache first ─────────────────────
-    cached = get_cache(cache_key)
-    if cached:
-        print(f"\n⚡ Loaded from cache!\n")
-        print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Avg Rating':<12} {'Reviews'}")
-        print("-" * 65)
-        for r in cached:
-            print(f"{r['id']:<5} {r['title']:<30} {r['media_type']:<10} "
-                  f"{r['avg_rating']:<12} {r['review_count']}")
-        return cached
-     # ── Cache miss — query database ───────────
+def top_rated_cursor(r) -> str:
+    """The cursor for the page after row `r` — its unrounded rating and media id."""
+    return f"{r.avg_rating!r}:{r.id}"
+
+
+def recommendations_key(user_id: int) -> str:
+    return f"recommendations:{user_id}"
+
+
+def top_rated_query(limit: int, after: tuple = None):
+    """
+    SELECT for the leaderboard — media_stats is kept up to date on every
+    insert, so this is an index walk over ix_media_stats_rank instead of
+    a GROUP BY on reviews. After `after` — an (avg_rating, media_id) cursor —
+    the walk starts at that position rather than skipping earlier pages.
+    """
+    stmt = (
+        select(
+            Media.id,
+            Media.title,
+            Media.media_type,
+            Media.genre,
+            Media.creator,
+            MediaStats.avg_rating.label("avg_rating"),
+            MediaStats.rating_count.label("review_count")
+        )
+        .join(MediaStats, Media.id == MediaStats.media_id)
+        .where(MediaStats.rating_count > 0)
+        .order_by(MediaStats.avg_rating.desc(), MediaStats.media_id)
+        .limit(limit)
+    )
+    if after is not None:
+        # The leading range lets SQLite seek; only ties at that rating are filtered
+        rating, media_id = after
+        stmt = stmt.where(
+            MediaStats.avg_rating <= rating,
+            or_(MediaStats.avg_rating < rating, MediaStats.media_id > media_id),
+        )
+    return stmt
+
+
+def format_top_rated(r) -> dict:
+    return {
+        "id":           r.id,
+        "title":        r.title,
+        "media_type":   r.media_type.value,
+        "genre":        r.genre,
+        "avg_rating":   round(r.avg_rating, 2),
+        "review_count": r.review_count,
+        "cursor":       top_rated_cursor(r)
+    }
+
+
+def liked_genres_query(user_id: int):
+    """SELECT the distinct genres a user rated 7.0 or higher."""
+    return (
+        select(Media.genre)
+        .join(Review, Media.id == Review.media_id)
+        .where(Review.user_id == user_id, Review.rating >= 7.0)
+        .distinct()
+    )
+
+
+def recommendations_query(user_id: int, liked_genres: list, limit: int = 5):
+    """SELECT unreviewed media in the liked genres — the exclusion is a subquery, not an id list."""
+    reviewed = select(Review.media_id).where(Review.user_id == user_id)
+    return (
+        select(Media)
+        .where(Media.genre.in_(liked_genres), Media.id.notin_(reviewed))
+        .limit(limit)
+    )
+
+
+def format_recommendation(m: Media) -> dict:
+    return {
+        "id":         m.id,
+        "title":      m.title,
+        "media_type": m.media_type.value,
+        "genre":      m.genre or "N/A",
+        "creator":    m.creator or "N/A"
+    }
+
+
+def _load_top_rated(limit: int, after: tuple = None) -> list:
+    """Cache-miss path of get_top_rated — runs in one caller at a time per key."""
     db = SessionLocal()
     try:
-        results = (
-            db.query(
-                Media.id,
-                Media.title,
-                Media.media_type,
-                Media.genre,
-                Media.creator,
-                func.avg(Review.rating).label("avg_rating"),
-                func.count(Review.id).label("review_count")
-            )
-            .join(Review, Media.id == Review.media_id)
-            .group_by(Media.id)
-            .order_by(func.avg(Review.rating).desc())
-            .limit(limit)
-            .all()
-        )
-
+        results = db.execute(top_rated_query(limit, after)).all()
         if not results:
             print("❌ No reviews found yet.")
             return []
-
-        # ── Format for display and cache ──────
-        formatted = [
-            {
-                "id":           r.id,
-                "title":        r.title,
-                "media_type":   r.media_type.value,
-                "genre":        r.genre,
-                "avg_rating":   round(r.avg_rating, 2),
-                "review_count": r.review_count
-            }
-            for r in results
-        ]
-
-         # ── Store in Redis ─────────────────────
-        set_cache(cache_key, formatted, TTL_TOP_RATED)
-
-        print(f"\n⭐ Top {limit} Rated Media:\n")
-        print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Avg Rating':<12} {'Reviews'}")
-        print("-" * 65)
-        for r in formatted:
-            print(f"{r['id']:<5} {r['title']:<30} {r['media_type']:<10} "
-                  f"{r['avg_rating']:<12} {r['review_count']}")
-        return formatted
-
+        return [format_top_rated(r) for r in results]
     finally:
         db.close()
 
 
-def get_recommendations(user_id: int):
-    """Recommend media based on genres user rated >= 7.0."""
-    cache_key = f"recommendations:{user_id}"
-    cached = get_cache(cache_key)
-    if cached:
+def get_top_rated(limit: int = 5, after: str = None):
+    """
+    Get top rated media — cached in Redis, rebuilt by one caller at a time.
+    With `after` (a RATING:ID cursor), the page after that position.
+    """
+    try:
+        cursor = parse_top_rated_cursor(after) if after is not None else None
+    except ValueError as e:
+        print(f"❌ {e}")
+        return []
+
+    formatted, from_cache = get_or_compute(
+        top_rated_key(limit, cursor), lambda: _load_top_rated(limit, cursor), TTL_TOP_RATED,
+        depends=TOP_RATED_DEPENDS,
+    )
+    if not formatted:
+        return []
+
+    if from_cache:
         print(f"\n⚡ Loaded from cache!\n")
-        print(f"💡 Recommendations (based on your top-rated genres):\n")
-        print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Genre':<15} {'Creator'}")
-        print("-" * 70)
-        for m in cached:
-            print(f"{m['id']:<5} {m['title']:<30} {m['media_type']:<10} "
-                  f"{m['genre']:<15} {m['creator']}")
-        return cached
-
+    else:
+        shown = f" after {after}" if after is not None else ""
+        print(f"\n⭐ Top {limit} Rated Media{shown}:\n")
+    print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Avg Rating':<12} {'Reviews'}")
+    print("-" * 65)
+    for r in formatted:
+        print(f"{r['id']:<5} {r['title']:<30} {r['media_type']:<10} "
+              f"{r['avg_rating']:<12} {r['review_count']}")
+    if len(formatted) == limit:
+        print(f"\n➡️  Next page: --after {formatted[-1]['cursor']}")
+    return formatted
+
+
+def _load_recommendations(user_id: int, loaded: dict) -> list:
+    """Cache-miss path of get_recommendations; puts the user's name in `loaded`."""
     db = SessionLocal()
     try:
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
             print(f"❌ No user found with ID {user_id}")
             return []
+        loaded["user_name"] = user.name
 
-        liked_genres = (
-            db.query(Media.genre)
-            .join(Review, Media.id == Review.media_id)
-            .filter(Review.user_id == user_id, Review.rating >= 7.0)
-            .distinct()
-            .all()
-        )
-        liked_genres = [g.genre for g in liked_genres if g.genre]
+        liked_genres = [g for g in db.execute(liked_genres_query(user_id)).scalars() if g]
 
         if not liked_genres:
             print(f"❌ No strong preferences found for user {user_id}. Review more media first!")
             return []
 
-        reviewed_ids = (
-            db.query(Review.media_id)
-            .filter(Review.user_id == user_id)
-            .all()
-        )
-        reviewed_ids = [r.media_id for r in reviewed_ids]
-
-        recommendations = (
-            db.query(Media)
-            .filter(
-                Media.genre.in_(liked_genres),
-                Media.id.notin_(reviewed_ids)
-            )
-            .limit(5)
-            .all()
-        )
+        recommendations = db.execute(recommendations_query(user_id, liked_genres)).scalars().all()
 
         if not recommendations:
             print("❌ No new recommendations found. Try reviewing more media!")
             return []
-        
-        formatted = [
-            {
-                "id":         m.id,
-                "title":      m.title,
-                "media_type": m.media_type.value,
-                "genre":      m.genre or "N/A",
-                "creator":    m.creator or "N/A"
-            }
-            for m in recommendations
-        ]
-
-        # ── Store in Redis ─────────────────────
-        set_cache(cache_key, formatted, TTL_RECOMMENDATIONS)
-
-        print(f"\n💡 Recommendations for {user.name} (based on your top-rated genres):\n")
-        print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Genre':<15} {'Creator'}")
-        print("-" * 70)
-        for m in recommendations:
-            print(f"{m.id:<5} {m.title:<30} {m.media_type.value:<10} "
-                  f"{m.genre or 'N/A':<15} {m.creator or 'N/A'}")
-        return recommendations
+
+        return [format_recommendation(m) for m in recommendations]
 
     finally:
         db.close()
 
 
-def get_reviews_by_media(media_id: int):
-    """Fetch all reviews for a specific media item."""
+def get_recommendations(user_id: int):
+    """Recommend media based on genres user rated >= 7.0."""
+    loaded = {}
+
+    formatted, from_cache = get_or_compute(
+        recommendations_key(user_id), lambda: _load_recommendations(user_id, loaded), TTL_RECOMMENDATIONS,
+        depends=recommendations_depends(user_id),
+    )
+    if not formatted:
+        return []
+
+    if from_cache:
+        print(f"\n⚡ Loaded from cache!\n")
+        print(f"💡 Recommendations (based on your top-rated genres):\n")
+    else:
+        # Set by the compute — unless the cached value was served after all
+        name = loaded.get("user_name", f"user {user_id}")
+        print(f"\n💡 Recommendations for {name} (based on your top-rated genres):\n")
+    print(f"{'ID':<5} {'Title':<30} {'Type':<10} {'Genre':<15} {'Creator'}")
+    print("-" * 70)
+    for m in formatted:
+        print(f"{m['id']:<5} {m['title']:<30} {m['media_type']:<10} "
+              f"{m['genre']:<15} {m['creator']}")
+    return formatted
+
+
+def reviews_query(media_id: int, after_id: int = None, limit: int = None):
+    """
+    SELECT a media item's reviews, oldest first — a walk over
+    ix_reviews_media_created. After `after_id` the walk starts at that
+    review's (created_at, id) position rather than skipping earlier pages;
+    get_reviews_by_media() checks the review belongs to `media_id` first.
+    """
+    stmt = (
+        select(Review)
+        .where(Review.media_id == media_id)
+        .order_by(Review.created_at, Review.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        created = (select(Review.created_at)
+                   .where(Review.id == after_id, Review.media_id == media_id)
+                   .scalar_subquery())
+        stmt    = stmt.where(
+            Review.created_at >= created,
+            or_(Review.created_at > created, Review.id > after_id),
+        )
+    return stmt
+
+
+def get_reviews_by_media(media_id: int, after_id: int = None, limit: int = None):
+    """
+    Fetch reviews for a specific media item — all of them, or `limit` after
+    `after_id`. Raises ValueError if `after_id` is not one of its reviews,
+    rather than returning an empty page.
+    """
     db = SessionLocal()
     try:
-        return db.query(Review).filter(Review.media_id == media_id).all()
+        if after_id is not None:
+            cursor = db.get(Review, after_id)
+            if cursor is None or cursor.media_id != media_id:
+                raise ValueError(f"Review ID {after_id} is not a review of media ID {media_id}")
+        return db.scalars(reviews_query(media_id, after_id, limit)).all()
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def show_reviews(media_id: int, after_id: int = None, limit: int = None):
+    """Print one page of a media item's reviews, oldest first, and the next cursor."""
+    limit = limit or REVIEWS_LIMIT
+    try:
+        reviews = get_reviews_by_media(media_id, after_id, limit)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return []
+    if not reviews:
+        print(f"❌ No reviews found for media ID {media_id}")
+        return []
+
+    print(f"\n📝 Reviews for media ID {media_id}:\n")
+    print(f"{'ID':<6} {'User':<6} {'Rating':<7} {'Date':<11} {'Comment'}")
+    print("-" * 65)
+    for r in reviews:
+        created = r.created_at.strftime("%Y-%m-%d") if r.created_at else "N/A"
+        print(f"{r.id:<6} {r.user_id:<6} {r.rating:<7} {created:<11} {r.comment or ''}")
+    if len(reviews) == limit:
+        print(f"\n➡️  Next page: --after-id {reviews[-1].id}")
+    return reviews
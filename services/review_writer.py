@@ -0,0 +1,298 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import NamedTuple
+from sqlalchemy import insert, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from database.db import SessionLocal
+from database.models import Review, Media, User
+from services.stats_service import add_stats_delta, apply_stats_deltas
+
+# Keep IN (...) lists under SQLite's historic bound-parameter limit (999).
+# A (user_id, media_id) IN list binds two parameters per pair.
+IN_CLAUSE_LIMIT   = 500
+PAIR_CLAUSE_LIMIT = IN_CLAUSE_LIMIT // 2
+
+
+# What to do when a (user_id, media_id) pair already has a review
+ON_CONFLICT_FAIL   = "fail"     # reject the row — the historic behaviour
+ON_CONFLICT_SKIP   = "skip"     # leave the existing review alone, report the row as skipped
+ON_CONFLICT_UPDATE = "update"   # overwrite rating and comment (INSERT ... ON CONFLICT DO UPDATE)
+ON_CONFLICT_MODES  = (ON_CONFLICT_FAIL, ON_CONFLICT_SKIP, ON_CONFLICT_UPDATE)
+
+# Row outcomes that are not rejects
+INSERTED = "inserted"
+UPDATED  = "updated"
+SKIPPED  = "skipped"
+
+# Reasons a row can be rejected — used by the import report
+REJECT_INVALID_RATING = "invalid_rating"
+REJECT_UNKNOWN_USER   = "unknown_user"
+REJECT_UNKNOWN_MEDIA  = "unknown_media"
+REJECT_DUPLICATE      = "duplicate"
+REJECT_ERROR          = "error"
+
+
+class ReviewRow(NamedTuple):
+    """One CSV row to insert — `index` is its 0-based position in the file."""
+    user_id:    int
+    media_id:   int
+    rating:     float
+    comment:    str
+    index:      int
+    created_at: datetime = None   # None → now; set by historic imports
+
+
+class ReviewRequest:
+    """A ReviewRow waiting in the writer queue, plus the Future its producer waits on."""
+
+    def __init__(self, row: ReviewRow):
+        self.row    = row
+        self.future = Future()
+
+
+class ReviewWriter:
+    """
+    Single writer thread for review inserts.
+
+    SQLite allows one writer at a time, so instead of every producer thread
+    opening its own transaction, producers call submit() and the writer
+    commits whatever has queued up as one transaction — flushing when
+    `max_batch` requests are waiting or `max_wait` seconds have passed.
+    With `max_queue`, submit() blocks once that many rows are waiting —
+    backpressure for producers faster than the writer.
+
+    Each submit() returns a Future that resolves to the same
+    "✅ Row N: ..." / "❌ Row N: ..." string the bulk report prints.
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_batch: int = 200, max_wait: float = 0.05, on_conflict: str = ON_CONFLICT_FAIL,
+                 max_queue: int = 0):
+        self.max_batch   = max_batch
+        self.max_wait    = max_wait
+        self.on_conflict = on_conflict
+        self.batches   = 0
+        self.written   = 0
+        # Bounded (max_queue > 0): submit() blocks while that many rows wait
+        self._queue    = queue.Queue(maxsize=max_queue)
+        self._thread   = threading.Thread(target=self._run, name="review-writer", daemon=True)
+
+    # ── Lifecycle ─────────────────────────────
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Flush everything still queued and stop the writer thread."""
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ── Producer side ─────────────────────────
+
+    def submit(self, user_id: int, media_id: int, rating: float, comment: str, index: int) -> Future:
+        """Queue one review insert — blocks while the queue is full. Safe to call from any thread."""
+        request = ReviewRequest(ReviewRow(user_id, media_id, rating, comment, index))
+        self._queue.put(request)
+        return request.future
+
+    # ── Writer side ───────────────────────────
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+
+            batch    = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+
+    def _flush(self, batch: list):
+        rows = [request.row for request in batch]
+        db   = SessionLocal()
+        try:
+            try:
+                results = write_review_batch(db, rows, self.on_conflict)
+                db.commit()
+            except Exception:
+                # One bad row must not sink the whole batch — retry row by row
+                db.rollback()
+                results = write_rows_individually(db, rows, self.on_conflict)
+
+            self.batches += 1
+            self.written += sum(1 for r in results if r.startswith("✅"))
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_result(f"❌ Row {request.row.index+1}: Error — {e}")
+
+        finally:
+            db.close()
+
+
+def chunked(items: list, size: int = IN_CLAUSE_LIMIT):
+    """Yield successive slices of at most `size` items — for IN (...) lists."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _review_upsert():
+    """INSERT ... ON CONFLICT (user_id, media_id) DO UPDATE — run once per batch as an executemany."""
+    stmt = sqlite_insert(Review)
+    return stmt.on_conflict_do_update(
+        index_elements=[Review.user_id, Review.media_id],
+        set_={
+            "rating":  stmt.excluded.rating,
+            "comment": stmt.excluded.comment,
+        },
+    )
+
+
+def stage_review_batch(db, batch: list, on_conflict: str = ON_CONFLICT_FAIL) -> list:
+    """
+    Validate and stage a batch of review rows in `db` without committing.
+
+    Set-based: every referenced user, media item and existing
+    (user_id, media_id) pair is resolved with a few IN queries up front,
+    rows are validated in memory and the survivors go in with a single
+    executemany — an upsert when `on_conflict` is "update", in which case
+    media_stats is adjusted by the rating delta instead of a new count.
+
+    Returns one (outcome, message) pair per row, in order. The outcome is
+    INSERTED, UPDATED, SKIPPED or one of the REJECT_* reasons.
+    """
+    user_ids  = list({r.user_id  for r in batch})
+    media_ids = list({r.media_id for r in batch})
+    pairs     = list({(r.user_id, r.media_id) for r in batch})
+
+    users  = set()
+    titles = {}
+    taken  = {}   # (user_id, media_id) → current rating
+    for chunk in chunked(user_ids):
+        users.update(row.id for row in db.query(User.id).filter(User.id.in_(chunk)))
+    for chunk in chunked(media_ids):
+        titles.update(db.query(Media.id, Media.title).filter(Media.id.in_(chunk)).all())
+    for chunk in chunked(pairs, PAIR_CLAUSE_LIMIT):
+        taken.update(
+            ((row.user_id, row.media_id), row.rating) for row in
+            db.query(Review.user_id, Review.media_id, Review.rating)
+            .filter(tuple_(Review.user_id, Review.media_id).in_(chunk))
+        )
+
+    now     = datetime.now(timezone.utc)
+    inserts = []
+    deltas  = {}
+    results = []
+
+    for r in batch:
+        row = r.index + 1
+
+        if not (1.0 <= r.rating <= 10.0):
+            results.append((REJECT_INVALID_RATING, f"❌ Row {row}: Rating must be between 1.0 and 10.0"))
+            continue
+        if r.user_id not in users:
+            results.append((REJECT_UNKNOWN_USER, f"❌ Row {row}: No user found with ID {r.user_id}"))
+            continue
+        if r.media_id not in titles:
+            results.append((REJECT_UNKNOWN_MEDIA, f"❌ Row {row}: No media found with ID {r.media_id}"))
+            continue
+
+        pair  = (r.user_id, r.media_id)
+        title = titles[r.media_id]
+        if pair in taken:
+            if on_conflict == ON_CONFLICT_SKIP:
+                results.append((SKIPPED, f"⏭️  Row {row}: Skipped — user {r.user_id} already reviewed '{title}'"))
+                continue
+            if on_conflict != ON_CONFLICT_UPDATE:
+                results.append((REJECT_DUPLICATE, f"❌ Row {row}: User {r.user_id} already reviewed '{title}'"))
+                continue
+
+            old_rating  = taken[pair]
+            taken[pair] = r.rating
+            inserts.append({
+                "user_id":  r.user_id,
+                "media_id": r.media_id,
+                "rating":   r.rating,
+                "comment":  r.comment,
+                # only used if the row vanished meanwhile — an update keeps its created_at
+                "created_at": r.created_at or now,
+            })
+            add_stats_delta(deltas, r.media_id, r.rating - old_rating, 0, None)
+            results.append((UPDATED, f"🔄 Row {row}: Rating updated for '{title}' | "
+                                     f"{old_rating}/10 → {r.rating}/10"))
+            continue
+
+        taken[pair] = r.rating
+        created_at  = r.created_at or now
+        inserts.append({
+            "user_id":    r.user_id,
+            "media_id":   r.media_id,
+            "rating":     r.rating,
+            "comment":    r.comment,
+            "created_at": created_at,
+        })
+        add_stats_delta(deltas, r.media_id, r.rating, 1, created_at)
+        results.append((INSERTED, f"✅ Row {row}: Review submitted for '{title}' | Rating: {r.rating}/10"))
+
+    if inserts:
+        stmt = _review_upsert() if on_conflict == ON_CONFLICT_UPDATE else insert(Review)
+        db.execute(stmt, inserts)
+    apply_stats_deltas(db, deltas)
+
+    return results
+
+
+def write_review_batch(db, batch: list, on_conflict: str = ON_CONFLICT_FAIL) -> list:
+    """stage_review_batch(), keeping only the message for each row."""
+    return [message for _, message in stage_review_batch(db, batch, on_conflict)]
+
+
+def stage_rows_individually(db, rows: list, on_conflict: str = ON_CONFLICT_FAIL) -> list:
+    """Fallback when a batch commit fails — commit each row on its own."""
+    results = []
+    for r in rows:
+        try:
+            results.append(stage_review_batch(db, [r], on_conflict)[0])
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            results.append((REJECT_DUPLICATE,
+                            f"❌ Row {r.index+1}: User {r.user_id} already reviewed media {r.media_id}"))
+        except Exception as e:
+            db.rollback()
+            results.append((REJECT_ERROR, f"❌ Row {r.index+1}: Error — {e}"))
+    return results
+
+
+def write_rows_individually(db, rows: list, on_conflict: str = ON_CONFLICT_FAIL) -> list:
+    """stage_rows_individually(), keeping only the message for each row."""
+    return [message for _, message in stage_rows_individually(db, rows, on_conflict)]
@@ -0,0 +1,186 @@
+from datetime import datetime
+from sqlalchemy import func, select, insert, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database.db import SessionLocal
+from database.models import Media, MediaStats, Review, ChangeCounter
+from database.facets import FACET_REVIEW_UPDATE, rebuild_facets
+from cache.redis_client import bump_namespaces, NS_RATINGS
+
+
+# ──────────────────────────────────────────────
+# Incremental maintenance
+# ──────────────────────────────────────────────
+
+def media_stats_upsert():
+    """
+    Build an UPSERT that adds rating deltas to media_stats rows.
+
+    Returned as a statement (not executed) so the sync services, the batch
+    writer and the async layer can all run it inside their own transaction.
+    Execute it with the dicts from stats_params() — one per media item,
+    which SQLAlchemy sends as a single executemany.
+    """
+    stmt      = sqlite_insert(MediaStats)
+    new_sum   = MediaStats.rating_sum   + stmt.excluded.rating_sum
+    new_count = MediaStats.rating_count + stmt.excluded.rating_count
+    return stmt.on_conflict_do_update(
+        index_elements=[MediaStats.media_id],
+        set_={
+            "rating_sum":     new_sum,
+            "rating_count":   new_count,
+            "avg_rating":     new_sum / func.max(new_count, 1),
+            "last_review_at": func.max(
+                func.coalesce(MediaStats.last_review_at, stmt.excluded.last_review_at),
+                func.coalesce(stmt.excluded.last_review_at, MediaStats.last_review_at),
+            ),
+        },
+    )
+
+
+# Bumped with every media_stats write, so a process holding rankings in
+# memory (services/suggest_index.py) can tell they moved from one row
+RATINGS_COUNTER = "ratings"
+
+
+def counter_bump(name: str = RATINGS_COUNTER):
+    """UPSERT adding one to the change counter `name`. Run it in the writing transaction."""
+    stmt = sqlite_insert(ChangeCounter).values(name=name, value=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[ChangeCounter.name],
+        set_={"value": ChangeCounter.value + 1},
+    )
+
+
+def add_stats_delta(deltas: dict, media_id: int, rating_delta: float, count_delta: int,
+                    reviewed_at: datetime):
+    """Accumulate one change into {media_id: (rating_sum, rating_count, last_review_at)}."""
+    total, count, last = deltas.get(media_id, (0.0, 0, None))
+    if reviewed_at and (last is None or reviewed_at > last):
+        last = reviewed_at
+    deltas[media_id] = (total + rating_delta, count + count_delta, last)
+
+
+def stats_params(deltas: dict) -> list:
+    """Turn accumulated deltas into media_stats_upsert() parameters."""
+    return [
+        {
+            "media_id":       media_id,
+            "rating_sum":     total,
+            "rating_count":   count,
+            "avg_rating":     total / count if count else 0.0,
+            "last_review_at": last,
+        }
+        for media_id, (total, count, last) in deltas.items()
+    ]
+
+
+def apply_stats_deltas(db, deltas: dict):
+    """Fold accumulated rating deltas into media_stats and facet_counts. Caller owns the commit."""
+    if deltas:
+        params = stats_params(deltas)
+        db.execute(media_stats_upsert(), params)
+        db.execute(FACET_REVIEW_UPDATE, params)
+        db.execute(counter_bump())
+
+
+def record_rating(db, media_id: int, rating: float, reviewed_at: datetime):
+    """Fold one new review into media_stats. Caller owns the commit."""
+    deltas = {}
+    add_stats_delta(deltas, media_id, rating, 1, reviewed_at)
+    apply_stats_deltas(db, deltas)
+
+
+# ──────────────────────────────────────────────
+# Backfill
+# ──────────────────────────────────────────────
+
+def _id_range(column, after_id: int, last_id: int = None):
+    return column > after_id if last_id is None else column.between(after_id + 1, last_id)
+
+
+def rebuild_stats_range(conn, after_id: int, last_id: int = None) -> int:
+    """
+    Replace the media_stats rows for media ids in (after_id, last_id] — or
+    every id above after_id — with aggregates of the reviews table.
+
+    Delete and insert run in the caller's transaction, so readers see the
+    old rows or the new ones, never a gap, and a concurrent review upsert
+    waits for the write lock instead of racing the insert.
+    """
+    conn.execute(delete(MediaStats).where(_id_range(MediaStats.media_id, after_id, last_id)))
+    aggregates = (
+        select(
+            Review.media_id,
+            func.sum(Review.rating),
+            func.count(Review.id),
+            func.avg(Review.rating),
+            func.max(Review.created_at),
+        )
+        .where(_id_range(Review.media_id, after_id, last_id))
+        .group_by(Review.media_id)
+    )
+    conn.execute(counter_bump())
+    return conn.execute(
+        insert(MediaStats).from_select(
+            ["media_id", "rating_sum", "rating_count", "avg_rating", "last_review_at"], aggregates
+        )
+    ).rowcount
+
+
+def ensure_media_stats(engine) -> bool:
+    """
+    Backfill media_stats once, when it is empty but reviews is not — a new
+    table on an existing database. facet_counts is rebuilt with it, since
+    its review counts come from media_stats. Returns True if it was rebuilt.
+    """
+    with engine.begin() as conn:
+        if conn.execute(select(MediaStats.media_id).limit(1)).first() is not None:
+            return False
+        if conn.execute(select(Review.id).limit(1)).first() is None:
+            return False
+        rebuild_stats_range(conn, 0)
+        rebuild_facets(conn)
+    return True
+
+
+def rebuild_media_stats(chunk_size: int = 500):
+    """
+    Recompute media_stats from the reviews table, then facet_counts.
+
+    Walks media ids in chunks of `chunk_size`, replacing each chunk's rows
+    in its own transaction, so an existing database can be backfilled
+    without one huge transaction and the leaderboard is never empty.
+    """
+    db = SessionLocal()
+    try:
+        last_id = 0
+        rebuilt = 0
+        while True:
+            ids = db.scalars(
+                select(Media.id).where(Media.id > last_id).order_by(Media.id).limit(chunk_size)
+            ).all()
+            if not ids:
+                break
+
+            rebuilt += rebuild_stats_range(db.connection(), last_id, ids[-1])
+            db.commit()
+            last_id  = ids[-1]
+            print(f"   … media up to ID {last_id} — {rebuilt} stats rows")
+
+        # Rows of media deleted since, beyond the highest id
+        db.execute(delete(MediaStats).where(MediaStats.media_id > last_id))
+        facets = rebuild_facets(db.connection())
+        db.commit()
+
+        # Cached rankings were read from the old rows
+        bump_namespaces(NS_RATINGS)
+        print(f"✅ Rebuilt media_stats for {rebuilt} media items and {facets} facet counts.")
+        return rebuilt
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error rebuilding stats: {e}")
+        return None
+
+    finally:
+        db.close()
@@ -0,0 +1,325 @@
+import heapq
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from sqlalchemy import select, func
+from database.db import SessionLocal, engine
+from database.models import Media, MediaStats, ChangeCounter
+from services.fuzzy_index import normalize
+from services.stats_service import RATINGS_COUNTER
+from utils.snapshot import save_snapshot, load_snapshot, snapshot_path
+
+# ──────────────────────────────────────────────
+# Prefix suggestions — a sorted array of title keys
+# ──────────────────────────────────────────────
+#
+# Every title is stored once per word it has, from that word to the end
+# ("the dark knight", "dark knight", "knight"), in one sorted list. The
+# titles starting with a prefix are then the contiguous range found by
+# two bisects. Short ranges are ranked on the spot; for the few prefixes
+# matching more than SUGGEST_SCAN keys ("t", "th", "the", ...) the top
+# titles are precomputed at build time. New titles are inserted into the
+# built index, like the fuzzy index's.
+
+SUGGEST_ORDERS  = ("reviews", "rating")
+SUGGEST_LIMIT   = 10      # results by default — and the length of precomputed lists
+SUGGEST_SCAN    = 512     # ranges longer than this are served from the precomputed lists
+
+# New titles are added to the index at once. Changed ratings (the ratings
+# change counter moved) rebuild it, but not more often than this (seconds)
+# — suggestions may trail new reviews by up to this long
+SUGGEST_REFRESH = 300
+# How often a long-lived process checks the database (seconds)
+SUGGEST_RECHECK = 5
+# Re-save the snapshot after this many added titles
+SUGGEST_RESAVE_EVERY = 1000
+
+SNAPSHOT_MAGIC   = b"MRSG"
+SNAPSHOT_VERSION = 3
+
+_LAST = "\U0010ffff"     # sorts after every character
+
+
+def _rank_keys(index) -> dict:
+    # Best first: the order's own measure, then the other one, then id
+    return {
+        "reviews": lambda d: (-index.review_counts[d], -index.avg_ratings[d], index.ids[d]),
+        "rating":  lambda d: (-index.avg_ratings[d], -index.review_counts[d], index.ids[d]),
+    }
+
+
+class SuggestIndex:
+    """
+    Sorted title keys for prefix lookups, ranked per order in SUGGEST_ORDERS.
+
+    `keys[i]` belongs to title `key_docs[i]`; per title there are its id,
+    text, review count and average rating. `ranks[order][doc]` is the
+    title's position in that order (0 = best) and `top[order]` maps the
+    long-range prefixes to their best titles. `db_state` is the highest
+    indexed media id and the ratings change counter the ranks were read at.
+    """
+
+    def __init__(self):
+        self.ids           = array("q")
+        self.titles        = []
+        self.review_counts = array("I")
+        self.avg_ratings   = array("d")
+        self.keys          = []
+        self.key_docs      = array("I")
+        self.ranks         = {}
+        self.top           = {}
+        self.db_state      = [0, 0]
+        self.built_at      = 0.0
+        self.unsaved       = 0       # titles added since the last build/save/load
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, rows, ratings: int = 0) -> "SuggestIndex":
+        """Index (media_id, title, review_count, avg_rating) rows, read at ratings counter `ratings`."""
+        index   = cls()
+        entries = []
+        for doc, (media_id, title, review_count, avg_rating) in enumerate(rows):
+            index.ids.append(media_id)
+            index.titles.append(title)
+            index.review_counts.append(review_count or 0)
+            index.avg_ratings.append(avg_rating or 0.0)
+            words = normalize(title)
+            entries.extend((" ".join(words[i:]), doc) for i in range(len(words)))
+        entries.sort()
+        index.keys     = [key for key, _ in entries]
+        index.key_docs = array("I", (doc for _, doc in entries))
+
+        for order, rank_key in _rank_keys(index).items():
+            ranked = sorted(range(len(index.ids)), key=rank_key)
+            ranks  = array("I", bytes(4 * len(ranked)))
+            for position, doc in enumerate(ranked):
+                ranks[doc] = position
+            index.ranks[order] = ranks
+            index.top[order]   = index._precompute(ranks, ranked)
+        index.db_state = [max(index.ids, default=0), ratings]
+        index.built_at = time.time()
+        return index
+
+    def add(self, media_id: int, title: str, review_count: int = 0, avg_rating: float = 0.0):
+        """
+        Index one new title, with an id above every indexed one. It is ranked
+        last in every order — its place while it has no reviews, as ratings
+        are positive and ties go to the lower id. A title reviewed before it
+        was added moves up at the next rebuild, like any other rating change.
+        """
+        doc = len(self.ids)
+        self.ids.append(media_id)
+        self.titles.append(title)
+        self.review_counts.append(review_count or 0)
+        self.avg_ratings.append(avg_rating or 0.0)
+        for order in SUGGEST_ORDERS:
+            self.ranks[order].append(doc)
+
+        words = normalize(title)
+        for key in (" ".join(words[i:]) for i in range(len(words))):
+            # After equal keys, as build() orders them by doc
+            i = bisect_right(self.keys, key)
+            self.keys.insert(i, key)
+            self.key_docs.insert(i, doc)
+            # A precomputed list shorter than SUGGEST_LIMIT holds every title of its range
+            for length in range(1, len(key) + 1):
+                for top in self.top.values():
+                    best = top.get(key[:length])
+                    if best is not None and len(best) < SUGGEST_LIMIT and doc not in best:
+                        best.append(doc)
+        self.db_state[0] = media_id
+        self.unsaved    += 1
+
+    def _precompute(self, ranks: array, ranked: list) -> dict:
+        """
+        {prefix: best titles} for every prefix matching more than SUGGEST_SCAN
+        keys. Prefixes are grown a character at a time, only inside ranges
+        that were already too long, so the work is a few passes over the keys.
+        """
+        key_ranks = array("I", (ranks[doc] for doc in self.key_docs))
+        top       = {}
+        ranges    = [(0, len(self.keys))]
+        length    = 1
+        while ranges:
+            longer = []
+            for lo, hi in ranges:
+                i = lo
+                while i < hi:
+                    if len(self.keys[i]) < length:
+                        i += 1
+                        continue
+                    prefix = self.keys[i][:length]
+                    j      = bisect_left(self.keys, prefix + _LAST, i, hi)
+                    if j - i > SUGGEST_SCAN:
+                        # A title can hold the prefix twice ("the the") — take extra, dedupe
+                        best = dict.fromkeys(ranked[r] for r in heapq.nsmallest(2 * SUGGEST_LIMIT, key_ranks[i:j]))
+                        top[prefix] = array("I", list(best)[:SUGGEST_LIMIT])
+                        longer.append((i, j))
+                    i = j
+            ranges  = longer
+            length += 1
+        return top
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_LIMIT, order: str = "reviews") -> list:
+        """The best `limit` titles with a word starting with `prefix`."""
+        key = " ".join(normalize(prefix))
+        if not key:
+            return []
+        lo = bisect_left(self.keys, key)
+        hi = bisect_left(self.keys, key + _LAST, lo)
+
+        docs = None
+        if hi - lo > SUGGEST_SCAN and limit <= SUGGEST_LIMIT:
+            docs = self.top[order].get(key)
+        if docs is None:
+            ranks = self.ranks[order]
+            docs  = heapq.nsmallest(limit, set(self.key_docs[lo:hi]), key=ranks.__getitem__)
+        return [
+            {
+                "id":           self.ids[doc],
+                "title":        self.titles[doc],
+                "review_count": self.review_counts[doc],
+                "avg_rating":   round(self.avg_ratings[doc], 2),
+            }
+            for doc in docs[:limit]
+        ]
+
+    # ── Snapshot ──────────────────────────
+
+    def save(self, path: str):
+        header   = {"version": SNAPSHOT_VERSION, "db_state": self.db_state, "built_at": self.built_at}
+        sections = [self.ids, self.titles, self.review_counts, self.avg_ratings, self.keys, self.key_docs]
+        for order in SUGGEST_ORDERS:
+            prefixes = list(self.top[order])
+            flat     = array("I")
+            for prefix in prefixes:
+                flat.extend(self.top[order][prefix])
+            sections += [self.ranks[order], prefixes, array("I", (len(self.top[order][p]) for p in prefixes)), flat]
+        save_snapshot(path, SNAPSHOT_MAGIC, header, sections)
+        self.unsaved = 0
+
+    @classmethod
+    def load(cls, path: str):
+        """The index saved at `path`, or None if it is missing or unreadable."""
+        loaded = load_snapshot(path, SNAPSHOT_MAGIC)
+        if loaded is None or loaded[0].get("version") != SNAPSHOT_VERSION:
+            return None
+        header, sections = loaded
+        if len(sections) != 6 + 4 * len(SUGGEST_ORDERS):
+            return None
+
+        index = cls()
+        (index.ids, index.titles, index.review_counts, index.avg_ratings,
+         index.keys, index.key_docs) = sections[:6]
+        for n, order in enumerate(SUGGEST_ORDERS):
+            ranks, prefixes, lengths, flat = sections[6 + 4 * n:10 + 4 * n]
+            top, start = {}, 0
+            for prefix, length in zip(prefixes, lengths):
+                top[prefix] = flat[start:start + length]
+                start      += length
+            index.ranks[order] = ranks
+            index.top[order]   = top
+        index.db_state = header["db_state"]
+        index.built_at = header["built_at"]
+        return index
+
+
+# ──────────────────────────────────────────────
+# The process-wide index
+# ──────────────────────────────────────────────
+
+# Set MEDIA_SUGGEST_SNAPSHOT to keep the snapshot elsewhere
+SNAPSHOT_PATH = os.environ.get("MEDIA_SUGGEST_SNAPSHOT") or snapshot_path(engine, "suggest")
+
+_index   = None
+_checked = 0.0
+_lock    = threading.Lock()
+
+
+def _load_rows(after_id: int = 0) -> list:
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(
+                Media.id,
+                Media.title,
+                func.coalesce(MediaStats.rating_count, 0),
+                func.coalesce(MediaStats.avg_rating, 0.0),
+            )
+            .outerjoin(MediaStats, Media.id == MediaStats.media_id)
+            .where(Media.id > after_id)
+            .order_by(Media.id)
+        ).all()
+    finally:
+        db.close()
+
+
+def _db_state() -> list:
+    """[highest media id, ratings change counter] — two primary-key lookups."""
+    db = SessionLocal()
+    try:
+        return list(db.execute(
+            select(
+                func.coalesce(func.max(Media.id), 0),
+                func.coalesce(
+                    select(ChangeCounter.value)
+                    .where(ChangeCounter.name == RATINGS_COUNTER)
+                    .scalar_subquery(),
+                    0,
+                ),
+            )
+        ).one())
+    finally:
+        db.close()
+
+
+def _save(index: SuggestIndex):
+    if not SNAPSHOT_PATH:
+        return
+    try:
+        index.save(SNAPSHOT_PATH)
+    except OSError as e:
+        print(f"⚠️  Could not save suggestion index snapshot: {e}")
+
+
+def get_index() -> SuggestIndex:
+    """
+    The index for this process — loaded lazily from the snapshot shared by
+    all processes, caught up with titles added since (by this process or
+    any other), and rebuilt (and re-saved) when the ratings change counter
+    moved and the index is older than SUGGEST_REFRESH. The check reads two
+    rows by primary key, with or without a cache backend.
+    """
+    global _index, _checked
+    with _lock:
+        now = time.time()
+        if _index is not None and now - _checked < SUGGEST_RECHECK:
+            return _index
+        _checked = now
+
+        max_id, ratings = _db_state()
+        if _index is None and SNAPSHOT_PATH:
+            _index = SuggestIndex.load(SNAPSHOT_PATH)
+        if _index is None or (_index.db_state[1] != ratings and now - _index.built_at >= SUGGEST_REFRESH):
+            started = time.perf_counter()
+            _index  = SuggestIndex.build(_load_rows(), ratings)
+            print(f"🔧 Built suggestion index over {len(_index)} titles "
+                  f"in {time.perf_counter() - started:.2f}s")
+            _save(_index)
+        elif max_id > _index.db_state[0]:
+            for row in _load_rows(_index.db_state[0]):
+                _index.add(*row)
+            if _index.unsaved >= SUGGEST_RESAVE_EVERY:
+                _save(_index)
+        return _index
+
+
+def invalidate():
+    """add_media's hook — the next get_index() checks the database instead of waiting for SUGGEST_RECHECK."""
+    global _checked
+    with _lock:
+        _checked = 0.0
@@ -0,0 +1,130 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, func
+from database.db import SessionLocal
+from database.models import Review
+from cache.redis_client import (
+    set_cache, versioned_key, redis_available, top_search_terms,
+    TTL_SEARCH, TTL_TOP_RATED, TTL_RECOMMENDATIONS,
+)
+from services.media_service import search_query, search_key, format_media, SEARCH_DEPENDS
+from services.review_service import (
+    TOP_RATED_DEPENDS, recommendations_depends, top_rated_key, recommendations_key,
+    top_rated_query, format_top_rated,
+    liked_genres_query, recommendations_query, format_recommendation,
+)
+
+# What --warm-cache precomputes
+WARM_TOP_RATED_LIMITS = (5, 10, 20)
+WARM_SEARCH_TERMS     = 50     # most searched terms
+WARM_ACTIVE_USERS     = 50     # users who reviewed most recently ...
+WARM_ACTIVE_DAYS      = 7      # ... within this many days
+
+
+# ──────────────────────────────────────────────
+# Loaders — the services' cache-miss queries, without the printing
+# ──────────────────────────────────────────────
+
+def _load_top_rated(limit: int) -> list:
+    db = SessionLocal()
+    try:
+        return [format_top_rated(r) for r in db.execute(top_rated_query(limit)).all()]
+    finally:
+        db.close()
+
+
+def _load_search(term: str) -> list:
+    db = SessionLocal()
+    try:
+        return [format_media(m) for m in db.execute(search_query(term)).scalars().all()]
+    finally:
+        db.close()
+
+
+def _load_recommendations(user_id: int) -> list:
+    db = SessionLocal()
+    try:
+        liked_genres = [g for g in db.execute(liked_genres_query(user_id)).scalars() if g]
+        if not liked_genres:
+            return []
+        results = db.execute(recommendations_query(user_id, liked_genres)).scalars().all()
+        return [format_recommendation(m) for m in results]
+    finally:
+        db.close()
+
+
+def active_user_ids(limit: int = WARM_ACTIVE_USERS, days: int = WARM_ACTIVE_DAYS) -> list:
+    """Users with a review in the last `days` days, most recent first."""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    db    = SessionLocal()
+    try:
+        last_review = func.max(Review.created_at)
+        return list(db.execute(
+            select(Review.user_id)
+            .where(Review.created_at >= since)
+            .group_by(Review.user_id)
+            .order_by(last_review.desc())
+            .limit(limit)
+        ).scalars())
+    finally:
+        db.close()
+
+
+# ──────────────────────────────────────────────
+# Warm-up
+# ──────────────────────────────────────────────
+
+def _warm_one(job) -> bool:
+    """Compute one result and store it under the current versioned key. True if stored."""
+    kind, base_key, depends, load, arg, ttl = job
+    value = load(arg)
+    if not value:
+        return False
+    set_cache(versioned_key(base_key, depends), value, ttl)
+    return True
+
+
+def warm_cache(workers: int = 8, search_terms: int = WARM_SEARCH_TERMS,
+               active_users: int = WARM_ACTIVE_USERS, days: int = WARM_ACTIVE_DAYS) -> dict:
+    """
+    Precompute the hottest results — after a deploy, a flush or a Redis restart.
+
+    Stores top-rated lists for WARM_TOP_RATED_LIMITS, the `search_terms`
+    most searched terms and recommendations for the `active_users` users
+    who reviewed most recently, running at most `workers` queries at once.
+    Results are written unconditionally, so warming also refreshes keys
+    that are already cached. Returns {kind: keys stored}.
+    """
+    jobs = [("top_rated", top_rated_key(limit), TOP_RATED_DEPENDS, _load_top_rated, limit, TTL_TOP_RATED)
+            for limit in WARM_TOP_RATED_LIMITS]
+    jobs += [("search", search_key(term), SEARCH_DEPENDS, _load_search, term, TTL_SEARCH)
+             for term in top_search_terms(search_terms)]
+    jobs += [("recommendations", recommendations_key(user_id), recommendations_depends(user_id),
+              _load_recommendations, user_id, TTL_RECOMMENDATIONS)
+             for user_id in active_user_ids(active_users, days)]
+
+    stored = dict.fromkeys(["top_rated", "search", "recommendations"], 0)
+    # Reading the search terms already tried the cache
+    if not redis_available():
+        print("⚠️  Cache unreachable — nothing to warm.")
+        return stored
+
+    print(f"\n🔥 Warming cache: {len(jobs)} results, {workers} workers...")
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for job, ok in zip(jobs, pool.map(_warm_one, jobs)):
+                stored[job[0]] += ok
+    except Exception as e:
+        print(f"❌ Error warming cache: {e}")
+        return stored
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{'─'*44}")
+    print(f"🏆 Top-rated lists : {stored['top_rated']}")
+    print(f"🔍 Search terms    : {stored['search']}")
+    print(f"💡 Recommendations : {stored['recommendations']}")
+    print(f"{'─'*44}")
+    print(f"✅ Populated {sum(stored.values())} keys in {elapsed:.2f}s")
+    return stored
@@ -1,7 +1,10 @@
 import pytest
 import os
 from database.db import initialize_db, SessionLocal
-from database.models import User, Media, Review, Favorite
+from database.models import User, Media, Review, Favorite, MediaStats
+from cache import redis_client
+from cache.circuit_breaker import CircuitBreaker
+from cache.sqlite_cache import SQLiteCache
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -11,6 +14,17 @@ def setup_test_db():
     yield
 
 
+@pytest.fixture
+def sqlite_backend(tmp_path, monkeypatch):
+    """A working cache for the test — the SQLite backend in a temp file, no Redis needed."""
+    store = SQLiteCache(str(tmp_path / "cache.db"), max_entries=1000)
+    monkeypatch.setattr(redis_client, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(redis_client, "_client", store)
+    monkeypatch.setattr(redis_client, "breaker", CircuitBreaker())
+    monkeypatch.setattr(redis_client, "local_cache", None)
+    return store
+
+
 @pytest.fixture
 def db():
     """Provide a DB session and rollback after each test."""
@@ -75,6 +89,7 @@ def test_media(db):
     yield media
     db.query(Review).filter(Review.media_id == media.id).delete(synchronize_session=False)
     db.query(Favorite).filter(Favorite.media_id == media.id).delete(synchronize_session=False)
+    db.query(MediaStats).filter(MediaStats.media_id == media.id).delete(synchronize_session=False)
     db.delete(media)
     db.commit()
 
@@ -96,6 +111,7 @@ def test_media_2(db):
     yield media
     db.query(Review).filter(Review.media_id == media.id).delete(synchronize_session=False)
     db.query(Favorite).filter(Favorite.media_id == media.id).delete(synchronize_session=False)
+    db.query(MediaStats).filter(MediaStats.media_id == media.id).delete(synchronize_session=False)
     db.delete(media)
     db.commit()
 
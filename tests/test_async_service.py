@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from database.async_db import async_engine, to_async_url
+from database.models import MediaStats
+from patterns.observer import add_favorite
+from services import async_service
+
+
+def run(coro):
+    """Run one coroutine on a fresh loop, then drop its pooled connections."""
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(_main())
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///media_review.db") == "sqlite+aiosqlite:///media_review.db"
+    assert to_async_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+def test_async_search_by_title(test_media):
+    results = run(async_service.search_by_title("Test Media Fixture"))
+    assert any(r["id"] == test_media.id for r in results)
+
+
+def test_async_search_no_results():
+    assert run(async_service.search_by_title("zzznonexistentzzz")) == []
+
+
+def test_async_submit_review_updates_stats(db, test_user, test_media):
+    review = run(async_service.submit_review(test_user.id, test_media.id, 9.0, "Async!"))
+    assert review["rating"] == 9.0
+    assert review["title"] == test_media.title
+
+    stats = db.query(MediaStats).filter(MediaStats.media_id == test_media.id).one()
+    assert stats.rating_count == 1
+    assert stats.avg_rating == 9.0
+
+    top = run(async_service.get_top_rated(limit=1000))
+    assert any(r["id"] == test_media.id and r["review_count"] == 1 for r in top)
+
+
+def test_async_submit_review_duplicate(test_user, test_media, test_review):
+    with pytest.raises(ValueError, match="already reviewed"):
+        run(async_service.submit_review(test_user.id, test_media.id, 7.0, "Again"))
+
+
+def test_async_submit_review_invalid_rating(test_user, test_media):
+    with pytest.raises(ValueError, match="Rating must be between"):
+        run(async_service.submit_review(test_user.id, test_media.id, 11.0, "Bad"))
+
+
+def test_async_submit_review_unknown_media(test_user):
+    with pytest.raises(ValueError, match="No media found"):
+        run(async_service.submit_review(test_user.id, 999999, 7.0, "Bad"))
+
+
+def test_async_recommendations(test_user, test_media, test_media_2, test_review):
+    # test_review rates an Action title 8.5, test_media_2 is unreviewed Action
+    results = run(async_service.get_recommendations(test_user.id))
+    ids     = [r["id"] for r in results]
+    assert test_media.id not in ids
+    assert all(r["genre"] == "Action" for r in results)
+
+
+def test_async_recommendations_unknown_user():
+    with pytest.raises(ValueError, match="No user found"):
+        run(async_service.get_recommendations(999999))
+
+
+def test_async_notifications(test_user, test_user_2, test_media):
+    add_favorite(test_user.id, test_media.id)
+    run(async_service.submit_review(test_user_2.id, test_media.id, 6.5, "From user 2"))
+
+    rows = run(async_service.get_notifications(test_user.id, "2000-01-01T00:00:00"))
+    assert len(rows) == 1
+    assert rows[0]["reviewer_name"] == "Test User 2"
+    assert rows[0]["media_title"] == test_media.title
+
+    # the reviewer does not get notified about their own review
+    assert run(async_service.get_notifications(test_user_2.id, "2000-01-01T00:00:00")) == []
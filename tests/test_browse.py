@@ -0,0 +1,120 @@
+import pytest
+from sqlalchemy import text
+from database.db import SessionLocal, engine
+from database.facets import decade, media_facets, load_facets, rebuild_facets, ensure_facets, NONE
+from database.models import Media, MediaType, Review, MediaStats
+from services.browse_service import (
+    browse_query, browse_page, browse_media, browse_key, format_browse, parse_browse_cursor,
+)
+from services.media_service import add_media
+from services.review_service import submit_review
+
+
+def facet_row(facet, value):
+    db = SessionLocal()
+    try:
+        return next((row for row in load_facets(db)[facet] if row[0] == value), (value, 0, 0))
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def browse_media_item():
+    """A media item added through add_media; facet counts rebuilt after."""
+    media = add_media("Test Browse Media", "web_show", "Browsegenre", 1987, "Browse Creator")
+    yield media
+    db = SessionLocal()
+    db.query(Review).filter(Review.media_id == media.id).delete(synchronize_session=False)
+    db.query(MediaStats).filter(MediaStats.media_id == media.id).delete(synchronize_session=False)
+    db.query(Media).filter(Media.id == media.id).delete(synchronize_session=False)
+    rebuild_facets(db.connection())
+    db.commit()
+    db.close()
+
+
+def test_media_facets():
+    assert decade(1987) == "1980s" and decade(2000) == "2000s" and decade(None) == NONE
+    assert media_facets(MediaType.SONG, None, None) == [("type", "song"), ("genre", NONE), ("decade", NONE)]
+
+
+def test_browse_page_combines_filters(db, test_media, test_media_2):
+    rows = browse_page(db, {"creator": "test director"})
+    assert [r[0].id for r in rows] == [test_media.id]
+
+    rows = browse_page(db, {"media_type": "song", "genre": "Action", "year_from": 2021, "year_to": 2021})
+    assert test_media_2.id in [r[0].id for r in rows]
+    assert test_media.id not in [r[0].id for r in rows]
+
+
+def test_browse_page_sorts_unreviewed_last(sqlite_backend, db, test_user, test_media, test_media_2):
+    submit_review(test_user.id, test_media_2.id, 7.0, "Browse me")
+    filters = {"genre": "Action", "year_from": 2021, "year_to": 2022}
+    ids = [r[0].id for r in browse_page(db, filters, "rating")]
+    assert ids.index(test_media_2.id) < ids.index(test_media.id)
+
+    ids = [r[0].id for r in browse_page(db, filters, "year")]
+    assert ids.index(test_media.id) < ids.index(test_media_2.id)
+
+
+def test_browse_cursor_pages_through_reviewed_then_unreviewed(sqlite_backend, db, test_user, test_media, test_media_2):
+    submit_review(test_user.id, test_media_2.id, 7.0, "Browse me")
+    filters = {"genre": "Action", "year_from": 2021, "year_to": 2022}
+    for sort in ("rating", "reviews", "year"):
+        whole = [r[0].id for r in browse_page(db, filters, sort, limit=100)]
+        paged, after = [], None
+        while True:
+            page = [format_browse(r, sort) for r in browse_page(db, filters, sort, limit=1, after=after)]
+            if not page:
+                break
+            paged += [m["id"] for m in page]
+            after  = parse_browse_cursor(page[-1]["cursor"])
+        assert paged == whole
+
+    # The reviewed title's cursor is in the ranked part; the unreviewed one's is not
+    rows = browse_page(db, filters, "rating", limit=100)
+    cursors = {r[0].id: format_browse(r, "rating")["cursor"] for r in rows}
+    assert cursors[test_media_2.id] == f"7.0:{test_media_2.id}" and cursors[test_media.id] == f"-:{test_media.id}"
+    with pytest.raises(ValueError):
+        parse_browse_cursor("7.0")
+
+
+@pytest.mark.parametrize("sort, index", [("rating", "ix_media_stats_rank"), ("reviews", "ix_media_stats_count")])
+def test_browse_query_walks_the_stats_index(db, sort, index):
+    stmt = browse_query({}, sort, after=(5.0, 1)).compile(engine, compile_kwargs={"literal_binds": True})
+    plan = " | ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {stmt}")))
+    assert index in plan and "TEMP B-TREE" not in plan
+
+
+def test_facet_counts_follow_media_and_reviews(sqlite_backend, test_user, browse_media_item):
+    assert facet_row("genre", "Browsegenre")[1:] == (1, 0)
+    assert facet_row("decade", "1980s")[1] >= 1
+
+    submit_review(test_user.id, browse_media_item.id, 9.0, "Counted")
+    assert facet_row("genre", "Browsegenre")[1:] == (1, 1)
+
+    # A full rebuild agrees with the incrementally maintained counts
+    db = SessionLocal()
+    try:
+        rebuild_facets(db.connection())
+        assert [row for row in load_facets(db)["genre"] if row[0] == "Browsegenre"] == [("Browsegenre", 1, 1)]
+    finally:
+        db.rollback()
+        db.close()
+
+
+def test_ensure_facets_only_backfills_an_empty_table():
+    assert ensure_facets(engine) is False
+
+
+def test_browse_media(sqlite_backend, test_media, browse_media_item):
+    results = browse_media(genre="browsegenre", sort="reviews")
+    assert [m["id"] for m in results] == [browse_media_item.id]
+    assert results[0]["genre"] == "Browsegenre" and results[0]["avg_rating"] is None
+
+    assert browse_media(year_from=2000, year_to=1990) == []
+    assert browse_media(sort="title") == []
+    assert browse_media(after="nonsense") == []
+    assert browse_key({"genre": "Sci-Fi", "creator": None}, "rating", 20) == \
+        "browse:genre=sci-fi&sort=rating&limit=20"
+    assert browse_key({}, "year", 20, (1999.0, 7)) == "browse:sort=year&limit=20&after=1999.0:7"
+    assert browse_key({}, "rating", 20, (None, 7)) == "browse:sort=rating&limit=20&after=-:7"
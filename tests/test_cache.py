@@ -0,0 +1,642 @@
+import asyncio
+import fnmatch
+import pytest
+import redis
+from cache import codec, redis_client, async_redis_client, sqlite_cache
+from cache import metrics as cache_metrics
+from cache.circuit_breaker import CircuitBreaker
+from cache.local_cache import LocalCache
+from cache.sqlite_cache import SQLiteCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def l1(monkeypatch):
+    """Turn the L1 tier on with the Redis circuit open, so only the local layer is exercised."""
+    cache   = LocalCache(max_entries=3, max_ttl=30)
+    tripped = CircuitBreaker(base_delay=3600)
+    tripped.record_failure()
+    monkeypatch.setattr(redis_client, "local_cache", cache)
+    monkeypatch.setattr(redis_client, "breaker", tripped)
+    return cache
+
+
+class DownClient:
+    """Stands in for a Redis client whose server is unreachable."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        raise redis.ConnectionError("connection refused")
+
+    def pipeline(self, transaction=False):
+        self.calls += 1
+        raise redis.ConnectionError("connection refused")
+
+
+def test_local_cache_lru_eviction():
+    cache = LocalCache(max_entries=2, max_ttl=60)
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    cache.get("a")                # "b" is now least recently used
+    cache.set("c", 3, 60)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+
+
+def test_local_cache_expiry_is_capped_by_max_ttl():
+    clock = FakeClock()
+    cache = LocalCache(max_entries=10, max_ttl=5, clock=clock)
+    cache.set("short", "x", 2)
+    cache.set("long", "y", 300)   # capped to 5 seconds
+    clock.now = 3
+    assert cache.get("short") == (False, None)
+    assert cache.get("long") == (True, "y")
+    clock.now = 6
+    assert cache.get("long") == (False, None)
+
+
+def test_local_cache_counts_hits_and_misses():
+    cache = LocalCache(max_entries=10, max_ttl=60)
+    cache.set("k", 1, 60)
+    cache.get("k")
+    cache.get("k")
+    cache.get("missing")
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_get_cache_served_from_l1(l1):
+    redis_client.set_cache("top_rated:5", [{"id": 1}], redis_client.TTL_TOP_RATED)
+    assert redis_client.get_cache("top_rated:5") == [{"id": 1}]
+    assert redis_client.get_cache_stats()["l1"]["hits"] == 1
+
+
+def test_delete_cache_evicts_l1(l1):
+    redis_client.set_cache("search:x", ["x"], redis_client.TTL_SEARCH)
+    redis_client.delete_cache("search:x")
+    assert redis_client.get_cache("search:x") is None
+
+
+def test_flush_all_cache_clears_l1(l1):
+    redis_client.set_cache("search:x", ["x"], redis_client.TTL_SEARCH)
+    redis_client.flush_all_cache()
+    assert len(l1) == 0
+
+
+def test_cache_stats_without_l1(monkeypatch):
+    monkeypatch.setattr(redis_client, "local_cache", None)
+    stats = redis_client.get_cache_stats()
+    assert "l1" not in stats
+    assert set(stats["redis"]) == {"backend", "circuit", "hits", "misses", "hit_ratio"}
+
+
+def test_circuit_breaker_backoff_and_probe():
+    clock   = FakeClock()
+    breaker = CircuitBreaker(base_delay=1, max_delay=4, clock=clock)
+    assert breaker.allow()
+
+    breaker.record_failure()                 # open for 1s
+    assert not breaker.allow()
+    clock.now = 1
+    assert breaker.allow()                   # the probe
+    assert not breaker.allow()               # only one probe at a time
+
+    breaker.record_failure()                 # probe failed — open for 2s
+    clock.now = 2.5
+    assert not breaker.allow()
+    clock.now = 3
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.is_closed and breaker.allow()
+
+
+def test_circuit_breaker_delay_is_capped():
+    clock   = FakeClock()
+    breaker = CircuitBreaker(base_delay=1, max_delay=4, clock=clock)
+    for _ in range(10):
+        breaker.record_failure()
+    clock.now = 4
+    assert breaker.allow()
+
+
+def test_redis_down_opens_circuit_and_skips_calls(monkeypatch):
+    client = DownClient()
+    monkeypatch.setattr(redis_client, "_client", client)
+    monkeypatch.setattr(redis_client, "breaker", CircuitBreaker(base_delay=3600))
+    monkeypatch.setattr(redis_client, "local_cache", None)
+
+    assert redis_client.get_cache("top_rated:5") is None
+    assert not redis_client.redis_available()
+    assert redis_client.get_cache("top_rated:5") is None
+    redis_client.set_cache("top_rated:5", [], 60)
+    assert client.calls == 1                 # later calls never reached the client
+
+
+class FakeRedis:
+    """Just enough of a Redis client (dict-backed, pipelines included) for the batch helpers."""
+
+    def __init__(self):
+        self.data      = {}
+        self.ttls      = {}
+        self.published = []
+        self.pipelines = 0
+
+    def pipeline(self, transaction=False):
+        self.pipelines += 1
+        return FakePipeline(self)
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key], self.ttls[key] = value, (px or 0) / 1000
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def scan(self, cursor=0, match="*", count=10):
+        # Like real SCAN, deleting keys mid-iteration must not skip any
+        if cursor == 0:
+            self._scan = sorted(k for k in self.data if fnmatch.fnmatchcase(k, match))
+        page = self._scan[cursor:cursor + count]
+        nxt  = cursor + count
+        return (nxt if nxt < len(self._scan) else 0), page
+
+
+class FakePipeline:
+    def __init__(self, redis_):
+        self.redis = redis_
+        self.ops   = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.ops.append((name, args))
+
+    def execute(self):
+        r, results = self.redis, []
+        for name, args in self.ops:
+            if name == "get":
+                results.append(r.data.get(args[0]))
+            elif name == "pttl":
+                results.append(r.ttls.get(args[0], -2) * 1000)
+            elif name == "setex":
+                r.data[args[0]], r.ttls[args[0]] = args[2], args[1]
+                results.append(True)
+            elif name == "delete":
+                results.append(sum(r.data.pop(k, None) is not None for k in args))
+            elif name == "incr":
+                r.data[args[0]] = str(int(r.data.get(args[0], 0)) + 1)
+                results.append(int(r.data[args[0]]))
+            elif name == "exists":
+                results.append(int(args[0] in r.data))
+            elif name == "publish":
+                r.published.append(args[1])
+                results.append(0)
+        return results
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(redis_client, "_client", fake)
+    monkeypatch.setattr(redis_client, "breaker", CircuitBreaker())
+    monkeypatch.setattr(redis_client, "local_cache", None)
+    return fake
+
+
+def test_set_many_and_get_many_one_round_trip_each(fake_redis):
+    redis_client.set_many({"a": ([1], 60), "b": ({"x": 2}, 30)})
+    assert fake_redis.ttls == {"a": 60, "b": 30}
+    assert redis_client.get_many(["a", "b", "missing"]) == {"a": [1], "b": {"x": 2}}
+    assert fake_redis.pipelines == 2
+
+
+def test_delete_many_publishes_invalidations(fake_redis):
+    redis_client.set_many({"a": (1, 60), "b": (2, 60), "c": (3, 60)})
+    redis_client.delete_many(["a", "b"])
+    assert set(fake_redis.data) == {"c"}
+    assert fake_redis.published == ["a", "b"]
+
+
+def test_delete_by_pattern_scans_every_page(fake_redis):
+    redis_client.set_many({f"search:{i}": (i, 60) for i in range(7)})
+    redis_client.set_many({"top_rated:5": ([], 60)})
+    assert redis_client.delete_by_pattern("search:*", batch=3) == 7
+    assert set(fake_redis.data) == {"top_rated:5"}
+
+
+def test_delete_by_pattern_evicts_l1(l1):
+    redis_client.set_cache("search:a", ["a"], 60)
+    redis_client.set_cache("top_rated:5", [], 60)
+    redis_client.delete_by_pattern("search:*")
+    assert redis_client.get_cache("search:a") is None
+    assert redis_client.get_cache("top_rated:5") == []
+
+
+class Counter:
+    """compute() stand-in that counts how often it ran."""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_get_or_compute_miss_then_hit(fake_redis):
+    compute = Counter([{"id": 1}])
+    assert redis_client.get_or_compute("top_rated:5", compute, 60) == ([{"id": 1}], False)
+    assert redis_client.get_or_compute("top_rated:5", compute, 60) == ([{"id": 1}], True)
+    assert compute.calls == 1
+    assert "lock:top_rated:5" not in fake_redis.data      # lock released
+
+
+def test_get_or_compute_loser_waits_then_computes(fake_redis, monkeypatch):
+    monkeypatch.setattr(redis_client, "LOCK_WAIT", 0.1)
+    monkeypatch.setattr(redis_client, "LOCK_POLL", 0.01)
+    fake_redis.set("lock:top_rated:5", "someone-else", nx=True, px=5000)
+    compute = Counter([1])
+    # the winner never delivers — after LOCK_WAIT the loser computes itself
+    assert redis_client.get_or_compute("top_rated:5", compute, 60) == ([1], False)
+    assert compute.calls == 1
+
+
+def test_get_or_compute_empty_result_is_not_cached(fake_redis):
+    compute = Counter([])
+    redis_client.get_or_compute("recommendations:1", compute, 60)
+    redis_client.get_or_compute("recommendations:1", compute, 60)
+    assert compute.calls == 2
+    assert "recommendations:1" not in fake_redis.data
+
+
+def test_get_or_compute_refreshes_early(fake_redis, monkeypatch):
+    redis_client.set_cache("top_rated:5", ["old"], 1)
+    monkeypatch.setitem(redis_client.compute_seconds, "top_rated", 1000.0)
+    compute = Counter(["new"])
+    assert redis_client.get_or_compute("top_rated:5", compute, 60) == (["new"], False)
+
+
+def test_get_or_compute_serves_stale_while_another_refreshes(fake_redis, monkeypatch):
+    redis_client.set_cache("top_rated:5", ["old"], 1)
+    monkeypatch.setitem(redis_client.compute_seconds, "top_rated", 1000.0)
+    fake_redis.set("lock:top_rated:5", "someone-else", nx=True, px=5000)
+    compute = Counter(["new"])
+    assert redis_client.get_or_compute("top_rated:5", compute, 60) == (["old"], True)
+    assert compute.calls == 0
+
+
+def test_get_or_compute_keeps_serving_when_the_refresh_is_empty(fake_redis, monkeypatch):
+    redis_client.set_cache("top_rated:5", ["old"], 1)
+    monkeypatch.setitem(redis_client.compute_seconds, "top_rated", 1000.0)
+    compute = Counter([])
+    assert redis_client.get_or_compute("top_rated:5", compute, 60) == (["old"], True)
+    assert compute.calls == 1
+
+
+def test_should_refresh_early_needs_a_measured_delta(monkeypatch):
+    monkeypatch.setattr(redis_client, "compute_seconds", {})
+    assert not redis_client.should_refresh_early("top_rated:5", 10)
+    redis_client.compute_seconds["top_rated"] = 1000.0
+    assert redis_client.should_refresh_early("top_rated:5", 10)
+    assert not redis_client.should_refresh_early("top_rated:5", 10, beta=0)
+
+
+def test_get_or_compute_without_redis(l1):
+    compute = Counter([1])
+    assert redis_client.get_or_compute("top_rated:5", compute, 60) == ([1], False)
+    assert redis_client.get_or_compute("top_rated:5", compute, 60) == ([1], True)   # from L1
+
+
+# ── Versioned namespaces ──
+
+def test_versioned_key_tags_every_namespace(fake_redis):
+    fake_redis.data["ns:ratings"] = "12"
+    key = redis_client.versioned_key("recommendations:7", ["ratings", "user:7"])
+    assert key == "recommendations:7@ratings=12,user:7=0"
+
+
+def test_bump_namespaces_moves_dependent_keys(fake_redis):
+    before = redis_client.versioned_key("top_rated:5", [redis_client.NS_RATINGS])
+    redis_client.set_cache(before, [1], 60)
+    redis_client.bump_namespaces(redis_client.NS_RATINGS)
+    after = redis_client.versioned_key("top_rated:5", [redis_client.NS_RATINGS])
+    assert after != before
+    assert redis_client.get_cache(after) is None
+    assert "ns:ratings" in fake_redis.published
+
+
+def test_bump_namespaces_only_touches_its_own(fake_redis):
+    search = redis_client.versioned_key("search:dune", [redis_client.NS_MEDIA])
+    redis_client.bump_namespaces(redis_client.NS_RATINGS, redis_client.user_namespace(3))
+    assert redis_client.versioned_key("search:dune", [redis_client.NS_MEDIA]) == search
+
+
+def test_namespace_versions_fall_back_when_redis_is_down(l1, monkeypatch):
+    monkeypatch.setattr(redis_client, "local_versions", {})
+    before = redis_client.versioned_key("search:dune", [redis_client.NS_MEDIA])
+    redis_client.bump_namespaces(redis_client.NS_MEDIA)
+    assert redis_client.versioned_key("search:dune", [redis_client.NS_MEDIA]) != before
+
+
+# ── SQLite backend ──
+
+def test_sqlite_cache_survives_a_new_process(sqlite_backend):
+    redis_client.set_cache("top_rated:5", [{"title": "Dune"}], 60)
+    reopened = SQLiteCache(sqlite_backend.path)
+    assert codec.decode(reopened.get("top_rated:5")) == [{"title": "Dune"}]
+    assert 0 < reopened.pttl("top_rated:5") <= 60000
+
+
+def test_sqlite_cache_expires_entries(sqlite_backend, monkeypatch):
+    clock = FakeClock()
+    clock.now = 1000.0
+    monkeypatch.setattr(sqlite_cache.time, "time", clock)
+    sqlite_backend.setex("search:dune", 10, "[1]")
+    clock.now += 11
+    assert sqlite_backend.get("search:dune") is None
+    assert sqlite_backend.pttl("search:dune") == -2
+
+
+def test_sqlite_cache_evicts_soonest_expiring_but_keeps_counters(tmp_path):
+    store = SQLiteCache(str(tmp_path / "cache.db"), max_entries=3)
+    store.incr("ns:ratings")
+    for ttl in (30, 10, 20, 40):
+        store.setex(f"k{ttl}", ttl, "1")
+    assert len(store) == 3
+    assert store.get("ns:ratings") == "1"
+    assert store.get("k10") is None and store.get("k20") is None
+    assert store.get("k40") == "1"
+
+
+def test_sqlite_cache_delete_counts_each_key_once(sqlite_backend):
+    sqlite_backend.setex("both", 60, "1")
+    sqlite_backend.zincrby("both", 1, "member")
+    sqlite_backend.zincrby("zset", 1, "member")
+    assert sqlite_backend.delete("both", "zset", "missing", "both") == 2
+
+
+def test_sqlite_cache_counts_rows_only_when_it_may_be_full(tmp_path):
+    store      = SQLiteCache(str(tmp_path / "cache.db"), max_entries=20)
+    statements = []
+    store._conn.set_trace_callback(statements.append)
+    for i in range(20):
+        store.setex(f"k{i}", 60 + i, "1")
+    assert not any("count(*)" in sql for sql in statements)
+
+    store.setex("k20", 80, "1")                 # 21 > 20: count once, evict down to 18
+    assert sum("count(*)" in sql for sql in statements) == 1
+    assert len(store) == 18 and store.get("k0") is None and store.get("k20") == "1"
+
+
+def test_sqlite_backend_runs_every_helper(sqlite_backend):
+    redis_client.set_many({"recommendations:1": ([1], 60), "recommendations:2": ([2], 60)})
+    assert redis_client.get_many(["recommendations:1", "x"]) == {"recommendations:1": [1]}
+    assert redis_client.delete_by_pattern("recommendations:*", batch=1) == 2
+
+    before = redis_client.versioned_key("top_rated:5", [redis_client.NS_RATINGS])
+    redis_client.bump_namespaces(redis_client.NS_RATINGS)
+    assert redis_client.versioned_key("top_rated:5", [redis_client.NS_RATINGS]) != before
+
+    compute = Counter([1])
+    assert redis_client.get_or_compute("top_rated:5", compute, 60) == ([1], False)
+    assert redis_client.get_or_compute("top_rated:5", compute, 60) == ([1], True)
+    assert not sqlite_backend.exists("lock:top_rated:5")
+
+
+def test_get_versioned_reads_generations_and_values_in_one_round_trip(sqlite_backend, monkeypatch):
+    trips   = []
+    execute = sqlite_backend.execute
+    monkeypatch.setattr(sqlite_backend, "execute", lambda ops: trips.append(ops) or execute(ops))
+
+    redis_client.bump_namespaces(redis_client.NS_MEDIA)
+    key = redis_client.versioned_key("search:dune", [redis_client.NS_MEDIA])
+    redis_client.set_cache(key, [1], 60)
+    trips.clear()
+
+    keys, found = redis_client.get_versioned(["search:dune", "search:du"], [redis_client.NS_MEDIA],
+                                             extra=lambda pipe: redis_client.queue_search_term(pipe, "Dune"))
+    assert len(trips) == 1
+    assert keys[0] == key and found == {key: [1]}
+    assert redis_client.top_search_terms(1) == ["dune"]
+
+    trips.clear()
+    assert redis_client.get_or_compute("search:dune", Counter([2]), 60,
+                                       depends=[redis_client.NS_MEDIA]) == ([1], True)
+    assert len(trips) == 1
+
+
+def test_async_client_shares_the_sqlite_store(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(async_redis_client, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(async_redis_client, "_client", None)
+
+    async def roundtrip():
+        await async_redis_client.set_cache("search:dune", [1], 60)
+        return await async_redis_client.get_cache("search:dune")
+
+    assert asyncio.run(roundtrip()) == [1]
+    assert redis_client.get_cache("search:dune") == [1]
+
+
+def test_async_client_is_kept_per_live_loop(monkeypatch):
+    monkeypatch.setattr(async_redis_client, "CACHE_BACKEND", "redis")
+    monkeypatch.setattr(async_redis_client, "_clients", {})
+
+    async def client():
+        return async_redis_client.get_client()
+
+    first = asyncio.run(client())
+
+    async def second():
+        current = async_redis_client.get_client()
+        assert current is async_redis_client.get_client() and current is not first
+        # The first loop is closed — its client is gone, not kept forever
+        assert list(async_redis_client._clients.values()) == [current]
+        await async_redis_client.aclose()
+        assert async_redis_client._clients == {}
+
+    asyncio.run(second())
+
+
+def test_async_run_starts_the_invalidation_listener(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(async_redis_client, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(async_redis_client, "_client", None)
+    started = []
+    monkeypatch.setattr(redis_client, "_ensure_listener", lambda: started.append(True))
+
+    asyncio.run(async_redis_client.get_cache("search:dune"))
+    assert started
+
+
+def test_async_get_or_compute_shares_sync_keys_and_locks(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(async_redis_client, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(async_redis_client, "_client", None)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return [{"id": 1}]
+
+    async def twice():
+        first  = await async_redis_client.get_or_compute("top_rated:5", compute, 60)
+        second = await async_redis_client.get_or_compute("top_rated:5", compute, 60)
+        return first, second
+
+    assert asyncio.run(twice()) == (([{"id": 1}], False), ([{"id": 1}], True))
+    assert len(calls) == 1
+    assert redis_client.get_or_compute("top_rated:5", lambda: [2], 60) == ([{"id": 1}], True)
+    assert sqlite_backend.get("lock:top_rated:5") is None
+
+
+def test_async_get_or_compute_loser_gets_the_winners_value(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(async_redis_client, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(async_redis_client, "_client", None)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return ["built once"]
+
+    async def together():
+        return await asyncio.gather(*(async_redis_client.get_or_compute("top_rated:9", compute, 60)
+                                      for _ in range(5)))
+
+    results = asyncio.run(together())
+    assert [value for value, _ in results] == [["built once"]] * 5
+    assert len(calls) == 1
+
+
+# ── Codec ──
+
+ROWS = [
+    {"id": i, "title": f"Title {i} — é", "genre": "Drama", "avg_rating": 7.5, "creator": None}
+    for i in range(50)
+]
+
+
+def test_codec_stores_row_lists_columnar():
+    data = codec.encode(ROWS, compression="none")
+    assert data[:2] == bytes((codec.CODEC_VERSION, codec.LAYOUT_COLUMNAR))
+    assert data.count(b'"genre"') == 1
+    assert codec.decode(data) == ROWS
+
+
+def test_codec_falls_back_to_json_for_mixed_shapes():
+    value = [{"a": 1}, {"b": 2}, 3]
+    data  = codec.encode(value)
+    assert data[1] & 0x0F == codec.LAYOUT_JSON
+    assert codec.decode(data) == value
+
+
+def test_codec_compresses_only_above_threshold():
+    big   = codec.encode(ROWS, compression="zlib", compress_min=512)
+    small = codec.encode(ROWS[:1], compression="zlib", compress_min=512)
+    assert big[1] & 0xF0 == codec.COMPRESS_ZLIB
+    assert small[1] & 0xF0 == codec.COMPRESS_NONE
+    assert codec.decode(big) == ROWS
+
+
+def test_codec_reads_other_versions_as_a_miss():
+    assert codec.decode(b'[{"title": "legacy json"}]') is None
+    assert codec.decode(bytes((codec.CODEC_VERSION + 1, codec.LAYOUT_JSON)) + b"[1]") is None
+    assert codec.decode(None) is None
+
+
+# ── Metrics ──
+
+@pytest.fixture
+def fresh_metrics(monkeypatch):
+    fresh = cache_metrics.CacheMetrics()
+    monkeypatch.setattr(redis_client, "metrics", fresh)
+    return fresh
+
+
+def test_metrics_count_per_prefix(fake_redis, fresh_metrics):
+    redis_client.set_many({"search:a@media=0": ([1], 60), "top_rated:5@ratings=0": ([2], 60)})
+    redis_client.get_many(["search:a@media=0", "search:b@media=0"])
+    series = fresh_metrics.snapshot()
+    assert series[("search", "get")]["hits"] == 1
+    assert series[("search", "get")]["misses"] == 1
+    assert series[("search", "get")]["count"] == 1          # one round trip
+    assert series[("search", "set")]["stored"] == 1
+    assert series[("search", "get")]["bytes"] == series[("search", "set")]["bytes"] > 0
+    assert ("top_rated", "set") in series
+
+
+def test_metrics_prefix_ignores_the_version_tag():
+    # Otherwise every generation of a colon-less key would be its own series
+    assert cache_metrics.key_prefix("facets@media=3,ratings=7") == "facets"
+    assert cache_metrics.key_prefix("facets:all@media=3,ratings=7") == "facets"
+    assert cache_metrics.key_prefix("search:a@b@media=0") == "search"
+
+
+def test_metrics_count_errors_separately_from_misses(l1, fresh_metrics):
+    redis_client.get_cache("search:zzz")
+    series = fresh_metrics.snapshot()[("search", "get")]
+    assert (series["errors"], series["misses"]) == (1, 0)
+
+
+def test_metrics_aggregate_across_processes(sqlite_backend, fresh_metrics):
+    redis_client.get_cache("search:a")
+    redis_client.flush_metrics()                 # first process exits
+    redis_client.get_cache("search:b")           # second one has not flushed yet
+    shared, series = redis_client.load_metrics()
+    assert shared
+    assert series[("search", "get")]["misses"] == 2
+    assert series[("search", "get")]["count"] == 2
+
+
+def test_metrics_count_l1_and_l2_separately(fake_redis, fresh_metrics, monkeypatch):
+    l1 = LocalCache(max_entries=3, max_ttl=30)
+    monkeypatch.setattr(redis_client, "local_cache", l1)
+    monkeypatch.setattr(redis_client, "_ensure_listener", lambda: None)   # no real pub/sub here
+    redis_client.set_cache("search:a@media=0", [1], 60)
+    redis_client.get_cache("search:a@media=0")                       # L1 hit
+    redis_client.get_cache("search:b@media=0")                       # L1 miss, L2 miss
+    l1.delete("search:a@media=0")
+    redis_client.get_cache("search:a@media=0")                       # L1 miss, L2 hit
+    series = fresh_metrics.snapshot()[("search", "get")]
+    assert (series["l1_hits"], series["l1_misses"]) == (1, 2)
+    assert (series["hits"], series["misses"], series["count"]) == (1, 1, 2)
+
+    table = cache_metrics.format_table(fresh_metrics.snapshot())
+    totals = [" ".join(line.split()) for line in table.splitlines()[-2:]]
+    assert totals == ["L1 total hits 1, misses 2, hit ratio 33%", "L2 total hits 1, misses 1, hit ratio 50%"]
+    text = cache_metrics.format_prometheus(fresh_metrics.snapshot())
+    assert 'media_cache_requests_total{prefix="search",op="get",tier="l1",result="hit"} 1' in text
+    assert 'media_cache_requests_total{prefix="search",op="get",tier="l1",result="miss"} 2' in text
+
+
+def test_prometheus_histogram_is_cumulative():
+    m = cache_metrics.CacheMetrics()
+    m.record("search", "get", 0.0004, hits=1)
+    m.record("search", "get", 0.03, misses=1)
+    text = cache_metrics.format_prometheus(m.snapshot())
+    assert 'media_cache_requests_total{prefix="search",op="get",tier="l2",result="hit"} 1' in text
+    assert 'media_cache_latency_seconds_bucket{prefix="search",op="get",le="0.0005"} 1' in text
+    assert 'media_cache_latency_seconds_bucket{prefix="search",op="get",le="+Inf"} 2' in text
+    assert 'media_cache_latency_seconds_count{prefix="search",op="get"} 2' in text
+
+
+def test_top_search_terms_ranks_by_count(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(redis_client, "SEARCH_TERMS_KEEP", 2)
+    for term in ["Dune", "dune", "alien", "dune", "alien", "zzz"]:
+        redis_client.record_search_term(term)
+    assert redis_client.top_search_terms(5) == ["dune", "alien"]     # "zzz" trimmed
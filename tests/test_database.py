@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import text
+from database.db import create_db_engine, get_profile_pragmas
+
+
+def test_wal_profile_applies_pragmas(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'wal.db'}", "wal")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1   # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    engine.dispose()
+
+
+def test_legacy_profile_keeps_sqlite_defaults(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'legacy.db'}", "legacy")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    engine.dispose()
+
+
+def test_pragma_env_override(monkeypatch):
+    monkeypatch.setenv("MEDIA_DB_BUSY_TIMEOUT", "1234")
+    assert get_profile_pragmas("wal")["busy_timeout"] == "1234"
+
+
+def test_invalid_profile():
+    with pytest.raises(ValueError):
+        get_profile_pragmas("turbo")
+
+
+def test_pool_options_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("MEDIA_DB_POOL_SIZE", "3")
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}", "wal")
+    assert engine.pool.size() == 3
+    engine.dispose()
@@ -0,0 +1,92 @@
+import pytest
+from services import fuzzy_index
+from services.fuzzy_index import TrigramIndex, trigrams, edit_distance, normalize
+from services.media_service import add_media, fuzzy_search_by_title
+from tests.test_media import cleanup_media
+
+TITLES = [
+    (1, "Inception"),
+    (2, "Interstellar"),
+    (3, "The Dark Knight"),
+    (4, "Inception: The Cobol Job"),
+    (5, "Insomnia"),
+]
+
+
+@pytest.fixture
+def fuzzy_snapshot(tmp_path, monkeypatch):
+    """A fresh process-wide index whose snapshot lives in a temp file."""
+    path = str(tmp_path / "media.trgm")
+    monkeypatch.setattr(fuzzy_index, "SNAPSHOT_PATH", path)
+    monkeypatch.setattr(fuzzy_index, "_index", None)
+    return path
+
+
+def test_trigrams_pad_the_word():
+    assert normalize("Up! The Movie") == ["up", "the", "movie"]
+    assert trigrams("up") == {"  u", " up", "up "}
+
+
+def test_edit_distance_counts_swaps_once():
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("tokuni", "toukni") == 1
+    assert edit_distance("", "ab") == 2
+
+
+def test_fuzzy_index_tolerates_typos():
+    index = TrigramIndex.build(TITLES)
+    assert index.search("Incepton")[0][0] == 1
+    assert index.search("Intersteller")[0][0] == 2
+    assert index.search("dark nite")[0][0] == 3
+    assert index.search("incepton cobol")[0][0] == 4
+    assert index.search("zzzz") == []
+    assert index.search("!!") == []
+
+
+def test_fuzzy_index_replaces_title_of_known_id():
+    index = TrigramIndex.build(TITLES)
+    index.add(5, "Memento")
+    assert 5 not in [media_id for media_id, _ in index.search("Insomnia")]
+    assert index.search("Momento")[0][0] == 5
+    assert len(index) == len(TITLES)
+
+
+def test_fuzzy_snapshot_round_trip(tmp_path):
+    path  = str(tmp_path / "index.trgm")
+    index = TrigramIndex.build(TITLES)
+    index.save(path)
+    loaded = TrigramIndex.load(path)
+    assert loaded.max_id == 5 and loaded.titles == index.titles
+    assert loaded.search("Intersteller") == index.search("Intersteller")
+
+
+def test_fuzzy_snapshot_unreadable_is_ignored(tmp_path):
+    path = tmp_path / "index.trgm"
+    assert TrigramIndex.load(str(path)) is None
+    path.write_bytes(b"MRTG garbage")
+    assert TrigramIndex.load(str(path)) is None
+
+
+def test_fuzzy_search_by_title(fuzzy_snapshot, test_media):
+    results = fuzzy_search_by_title("Tset Media Fixtur")
+    assert results[0]["id"] == test_media.id
+    assert 0 < results[0]["score"] <= 1
+    assert fuzzy_index.TrigramIndex.load(fuzzy_snapshot) is not None
+
+
+def test_fuzzy_index_follows_add_media(fuzzy_snapshot):
+    fuzzy_index.get_index()
+    media = add_media("Test Fuzzy Quixotic Film", "movie", "Drama", 2020, "Director")
+    try:
+        assert fuzzy_index._index.max_id == media.id
+        assert fuzzy_search_by_title("Quixotik Film")[0]["id"] == media.id
+    finally:
+        cleanup_media("Test Fuzzy Quixotic Film")
+
+
+def test_fuzzy_index_catches_up_from_stale_snapshot(fuzzy_snapshot, test_media):
+    # A snapshot that predates test_media, as if another process added it
+    stale = TrigramIndex.build([(media_id, title) for media_id, title in fuzzy_index._rows_after(0)
+                                if media_id < test_media.id])
+    stale.save(fuzzy_snapshot)
+    assert fuzzy_index.get_index().max_id >= test_media.id
@@ -0,0 +1,63 @@
+import pytest
+from services import import_service
+from services.import_service import import_reviews
+from database.models import Review
+
+
+@pytest.fixture
+def small_ranges(monkeypatch):
+    """Force several byte ranges so the process pool path is exercised on a tiny file."""
+    monkeypatch.setattr(import_service, "MIN_RANGE_BYTES", 16)
+
+
+def test_import_reviews_multiple_users(db, tmp_path, small_ranges, test_user, test_user_2, test_media, test_media_2):
+    csv_file = tmp_path / "import.csv"
+    csv_file.write_text(
+        "user_id,email,media_id,rating,comment,created_at\n"
+        f"{test_user.id},,{test_media.id},8.0,from id,2019-05-01T10:00:00\n"
+        f",{test_user_2.email},{test_media.id},6.0,from email,\n"
+        f",{test_user_2.email},{test_media_2.id},9.5,second,2020-01-01\n"
+        f"{test_user.id},,{test_media.id},7.0,duplicate,\n"
+        f",nobody@nowhere.com,{test_media.id},5.0,ghost,\n"
+        f"{test_user.id},,{test_media_2.id},abc,bad rating,\n"
+        f"{test_user.id},,{test_media_2.id},7.0,bad date,yesterday\n"
+        f"{test_user.id},,99999,7.0,ghost media,\n"
+    )
+    report = tmp_path / "rejects.txt"
+    stats  = import_reviews(str(csv_file), workers=2, batch_size=2, report_path=str(report))
+
+    assert stats.read     == 8
+    assert stats.inserted == 3
+    assert stats.rejects  == {
+        "duplicate": 1, "unknown_user": 1, "bad_number": 1, "bad_date": 1, "unknown_media": 1,
+    }
+    assert "Row 9" in report.read_text()   # ghost media is on line 9 (header is line 1)
+
+    historic = db.query(Review).filter(
+        Review.user_id == test_user.id, Review.media_id == test_media.id
+    ).first()
+    assert historic.created_at.year == 2019
+
+
+def test_import_reviews_requires_user_column(tmp_path, capsys):
+    csv_file = tmp_path / "bad.csv"
+    csv_file.write_text("media_id,rating\n1,5.0\n")
+    assert import_reviews(str(csv_file)) is None
+    assert "user_id or email" in capsys.readouterr().out
+
+
+def test_split_ranges_cover_file(tmp_path, small_ranges):
+    csv_file = tmp_path / "ranges.csv"
+    csv_file.write_text("user_id,media_id,rating\n" + "1,1,5.0\n" * 50)
+    ranges = import_service._split_ranges(str(csv_file), 24, 4)
+    assert ranges[0][0] == 24
+    assert ranges[-1][1] == csv_file.stat().st_size
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+def test_admin_required(monkeypatch):
+    from utils.auth import is_admin
+    monkeypatch.setenv("MEDIA_ADMIN_EMAILS", "root@example.com, Boss@Example.com")
+    assert is_admin({"email": "boss@example.com"})
+    assert not is_admin({"email": "user@example.com"})
+    assert not is_admin(None)
@@ -1,7 +1,11 @@
 import pytest
-from services.media_service import add_media, get_all_media, search_by_title, get_media_by_id
+from services.media_service import (
+    add_media, get_all_media, search_by_title, get_media_by_id, search_probe_terms,
+    search_key, refine_fts_search, SEARCH_FTS,
+)
+from database import fts
 from database.db import SessionLocal
-from database.models import Media, Review, Favorite
+from database.models import Media, Review, Favorite, MediaStats
 
 
 def cleanup_media(title):
@@ -10,6 +14,7 @@ def cleanup_media(title):
     if media:
         db.query(Review).filter(Review.media_id == media.id).delete(synchronize_session=False)
         db.query(Favorite).filter(Favorite.media_id == media.id).delete(synchronize_session=False)
+        db.query(MediaStats).filter(MediaStats.media_id == media.id).delete(synchronize_session=False)
         db.delete(media)
         db.commit()
     db.close()
@@ -78,4 +83,118 @@ def test_get_media_by_id_not_found():
 
 def test_get_all_media_returns_list():
     results = get_all_media()
-    assert isinstance(results, list)
\ No newline at end of file
+    assert isinstance(results, list)
+
+
+def test_get_all_media_pages_by_cursor(test_media, test_media_2, capsys):
+    first  = get_all_media(limit=1, after_id=test_media.id - 1)
+    second = get_all_media(limit=1, after_id=first[-1].id)
+    assert [m.id for m in first + second] == [test_media.id, test_media_2.id]
+    assert f"--after-id {test_media_2.id}" in capsys.readouterr().out
+
+def test_lookup_indexes_exist():
+    from sqlalchemy import inspect
+    from database.db import engine
+    inspector = inspect(engine)
+    assert "uq_media_type_title"     in {i["name"] for i in inspector.get_indexes("media")}
+    assert "uq_reviews_user_media"   in {i["name"] for i in inspector.get_indexes("reviews")}
+    assert "uq_favorites_user_media" in {i["name"] for i in inspector.get_indexes("favorites")}
+
+
+# ── Search caching ──
+
+def test_search_empty_result_is_cached(sqlite_backend):
+    assert search_by_title("xyznonexistent999abc") == []
+    _, keys = sqlite_backend.scan(0, "search:*:xyznonexistent999abc@*", 1000)
+    assert len(keys) == 1
+    assert 0 < sqlite_backend.pttl(keys[0]) <= 30000
+    assert search_by_title("xyznonexistent999abc") == []
+
+
+@pytest.fixture
+def ilike_search(monkeypatch):
+    monkeypatch.setattr(fts, "FTS_ENABLED", False)
+
+
+def test_search_refines_cached_prefix(sqlite_backend, ilike_search, test_media, test_media_2, capsys):
+    broad = search_by_title("Test Media Fix")
+    capsys.readouterr()
+    assert search_by_title("test media fixture 2") == [m for m in broad if m["id"] == test_media_2.id]
+    assert "Filtered from cached results for 'test media fix'" in capsys.readouterr().out
+
+
+def test_search_refinement_sees_new_media(sqlite_backend, ilike_search, test_media):
+    search_by_title("Test Media Fix")
+    add_media("Test Media Fixture Late", "movie", "Drama", 2024, "Someone")
+    try:
+        assert "Test Media Fixture Late" in [m["title"] for m in search_by_title("Test Media Fixture")]
+    finally:
+        cleanup_media("Test Media Fixture Late")
+
+
+def test_search_probe_terms():
+    assert search_probe_terms("Dune") == ["dune", "dun", "du"]
+    assert search_probe_terms("a_b") == ["a_b"]
+    assert search_probe_terms("Dune", SEARCH_FTS) == ["dune", "dun", "du"]
+    assert search_probe_terms("dark kni", SEARCH_FTS) == ["dark kni"]
+
+
+def test_search_key_depends_on_the_mode(ilike_search):
+    assert search_key("Dune") == "search:like:dune"
+    assert search_key("Dune", 10, 20) == "search:like:dune?limit=10&offset=20"
+
+
+def test_fts_search_refines_a_cached_single_word_prefix(sqlite_backend, test_media, test_media_2, capsys):
+    assert search_key("Fixtu").startswith("search:fts:")
+    broad = search_by_title("Fixtu")
+    capsys.readouterr()
+    assert search_by_title("Fixture") == broad
+    assert "Filtered from cached results for 'fixtu'" in capsys.readouterr().out
+
+
+def test_refine_fts_search_keeps_bm25_order_or_gives_up():
+    row = lambda i, title, creator="N/A": {"id": i, "title": title, "creator": creator}
+    rows = [row(1, "Dune Part Two"), row(2, "Arrival", "Dune Fan"), row(3, "Dunkirk")]
+    assert [m["id"] for m in refine_fts_search("dune", "dun", rows)] == [1, 2]
+
+    # "dun" hits row 1 twice but "dune" once — its rank may change
+    rows[0] = row(1, "Dunkirk Dune")
+    assert refine_fts_search("dune", "dun", rows) is None
+    # Diacritics are folded by FTS5, not here
+    assert refine_fts_search("dune", "dun", [row(4, "Dün")]) is None
+
+
+
+# ── Full-text search ──
+
+def test_fts_matches_word_prefixes_in_any_order(test_media):
+    assert [m["id"] for m in search_by_title("fixt medi")] == [test_media.id]
+
+
+def test_fts_ranks_title_hits_above_creator_hits(db, test_media, test_media_2):
+    test_media_2.title, test_media_2.creator = "Unrelated Song Zqx", "Test Media Fixture"
+    db.commit()                                  # the update trigger re-indexes it
+    ids = [m["id"] for m in search_by_title("test media fixture")]
+    assert ids == [test_media.id, test_media_2.id]
+
+
+def test_fts_index_follows_inserts_and_deletes():
+    add_media("Zqxfts Temporary", "movie", "Drama", 2024, "Someone")
+    assert [m["title"] for m in search_by_title("zqxfts")] == ["Zqxfts Temporary"]
+    cleanup_media("Zqxfts Temporary")
+    assert search_by_title("zqxfts") == []
+
+
+def test_search_pages_with_limit_and_offset(test_media, test_media_2):
+    everything = search_by_title("Test Media Fixture")
+    assert search_by_title("Test Media Fixture", limit=1, offset=1) == everything[1:2]
+
+
+def test_search_without_fts_falls_back_to_ilike(ilike_search, test_media):
+    # a substring in the middle of a word only matches on the ILIKE path
+    assert [m["id"] for m in search_by_title("edia Fixtur")] == [test_media.id]
+
+
+def test_match_expression():
+    assert fts.match_expression("Dark  kni!") == '"Dark"* "kni"*'
+    assert fts.match_expression("!!") is None
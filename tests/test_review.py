@@ -1,7 +1,7 @@
 import pytest
 from services.review_service import (
     submit_review, get_top_rated,
-    get_recommendations, get_reviews_by_media
+    get_recommendations, get_reviews_by_media, show_reviews
 )
 
 
@@ -74,4 +74,281 @@ def test_get_reviews_by_media(test_review, test_media):
 
 def test_get_reviews_by_media_no_reviews():
     reviews = get_reviews_by_media(99999)
-    assert reviews == []
\ No newline at end of file
+    assert reviews == []
+
+def test_duplicate_review_rejected_by_database(db, test_review):
+    """The unique (user_id, media_id) index blocks duplicates even without the service check."""
+    from sqlalchemy.exc import IntegrityError
+    from database.models import Review
+    db.add(Review(user_id=test_review.user_id, media_id=test_review.media_id, rating=5.0))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+
+def test_submit_review_updates_media_stats(db, test_user, test_user_2, test_media):
+    from database.models import MediaStats
+    submit_review(test_user.id,   test_media.id, 8.0, "Good")
+    submit_review(test_user_2.id, test_media.id, 6.0, "Okay")
+    stats = db.query(MediaStats).filter(MediaStats.media_id == test_media.id).first()
+    assert stats.rating_count == 2
+    assert stats.rating_sum   == 14.0
+    assert stats.avg_rating   == 7.0
+    assert stats.last_review_at is not None
+
+
+def test_get_top_rated_reads_media_stats(test_user, test_media):
+    submit_review(test_user.id, test_media.id, 10.0, "Perfect")
+    from cache.redis_client import delete_cache
+    delete_cache("top_rated:500")
+    results = get_top_rated(limit=500)
+    assert test_media.id in [r["id"] for r in results]
+
+
+def test_get_top_rated_pages_by_cursor(sqlite_backend, test_user, test_media, test_media_2):
+    submit_review(test_user.id, test_media.id, 9.0, "Page me")
+    submit_review(test_user.id, test_media_2.id, 9.0, "Tie")
+    full   = [r["id"] for r in get_top_rated(limit=500)]
+    pages  = []
+    after  = None
+    while True:
+        page = get_top_rated(limit=3, after=after)
+        if not page:
+            break
+        pages += [r["id"] for r in page]
+        after  = page[-1]["cursor"]
+    assert pages == full
+
+
+def test_get_top_rated_cursor_survives_a_rating_change(sqlite_backend, test_user, test_user_2,
+                                                       test_media, test_media_2):
+    submit_review(test_user.id, test_media.id, 9.5, "Boundary")
+    first = get_top_rated(limit=500)
+    ids   = [r["id"] for r in first]
+    at    = ids.index(test_media.id)
+    after = first[at]["cursor"]
+
+    # The boundary row's rating drops; the next page still starts where the last one ended
+    submit_review(test_user_2.id, test_media.id, 1.0, "Moved")
+    rest = [r["id"] for r in get_top_rated(limit=500, after=after)]
+    assert [i for i in rest if i != test_media.id] == ids[at + 1:]
+
+
+def test_get_top_rated_rejects_a_malformed_cursor(capsys):
+    assert get_top_rated(after="77") == []
+    assert "Invalid cursor '77'" in capsys.readouterr().out
+
+
+def test_get_reviews_by_media_pages_by_cursor(test_user, test_user_2, test_media):
+    submit_review(test_user.id, test_media.id, 7.0, "First")
+    submit_review(test_user_2.id, test_media.id, 8.0, "Second")
+    everything = get_reviews_by_media(test_media.id)
+    first      = get_reviews_by_media(test_media.id, limit=1)
+    second     = get_reviews_by_media(test_media.id, after_id=first[-1].id, limit=1)
+    assert [r.id for r in first + second] == [r.id for r in everything]
+    assert get_reviews_by_media(test_media.id, after_id=second[-1].id, limit=1) == []
+
+
+def test_get_reviews_by_media_rejects_a_foreign_or_missing_cursor(test_review, test_media, test_media_2, capsys):
+    with pytest.raises(ValueError, match="not a review of media"):
+        get_reviews_by_media(test_media_2.id, after_id=test_review.id)
+    with pytest.raises(ValueError, match="not a review of media"):
+        get_reviews_by_media(test_media.id, after_id=10**9)
+
+    assert show_reviews(test_media_2.id, after_id=test_review.id) == []
+    assert f"Review ID {test_review.id} is not a review of media ID {test_media_2.id}" in capsys.readouterr().out
+
+
+def test_rebuild_media_stats_matches_reviews(db, test_review, test_media):
+    from database.models import MediaStats
+    from services.stats_service import rebuild_media_stats
+    rebuild_media_stats(chunk_size=7)
+    stats = db.query(MediaStats).filter(MediaStats.media_id == test_media.id).first()
+    assert stats.rating_count == 1
+    assert stats.avg_rating   == test_review.rating
+
+
+def test_rebuild_media_stats_replaces_drifted_rows(db, test_review, test_media):
+    from database.models import MediaStats
+    from services.stats_service import rebuild_media_stats
+    db.query(MediaStats).filter(MediaStats.media_id == test_media.id).update(
+        {"rating_sum": 99.0, "rating_count": 9, "avg_rating": 11.0}
+    )
+    db.commit()
+    rebuild_media_stats(chunk_size=7)
+    db.expire_all()
+    stats = db.query(MediaStats).filter(MediaStats.media_id == test_media.id).first()
+    assert (stats.rating_count, stats.avg_rating) == (1, test_review.rating)
+
+
+def test_ensure_media_stats_backfills_an_existing_database(tmp_path):
+    from sqlalchemy import select
+    from database.db import Base, create_db_engine
+    from database.facets import load_facets
+    from database.models import Media, MediaType, Review, User, MediaStats
+    from services.stats_service import ensure_media_stats
+    from sqlalchemy.orm import Session
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'old.db'}", "wal")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add_all([User(id=1, name="Old", email="old1@test.com", password="x"),
+                         User(id=2, name="Old", email="old2@test.com", password="x")])
+        session.add(Media(id=1, title="Old Movie", media_type=MediaType.MOVIE, genre="Drama"))
+        session.add_all([Review(user_id=1, media_id=1, rating=6.0), Review(user_id=2, media_id=1, rating=8.0)])
+        session.commit()
+
+    assert ensure_media_stats(engine) is True
+    assert ensure_media_stats(engine) is False
+    with Session(engine) as session:
+        stats = session.scalars(select(MediaStats)).one()
+        assert (stats.rating_count, stats.avg_rating) == (2, 7.0)
+        assert ("Drama", 1, 2) in load_facets(session)["genre"]
+
+
+
+def test_review_writer_groups_commits(test_user, test_media, test_media_2):
+    import threading
+    from services.review_writer import ReviewWriter
+    rows    = [(test_media.id, 8.0), (test_media_2.id, 7.0), (test_media.id, 6.0), (99999, 5.0), (test_media.id, 11.0)]
+    results = [None] * len(rows)
+
+    with ReviewWriter(max_batch=50, max_wait=0.2) as writer:
+        def produce(i, media_id, rating):
+            results[i] = writer.submit(test_user.id, media_id, rating, "batch", i).result()
+        threads = [threading.Thread(target=produce, args=(i, m, r)) for i, (m, r) in enumerate(rows)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert writer.batches < len(rows)
+    assert sum(r.startswith("✅") for r in results) == 2
+    assert "already reviewed" in results[2] or "already reviewed" in results[0]
+    assert results[3] == "❌ Row 4: No media found with ID 99999"
+    assert results[4] == "❌ Row 5: Rating must be between 1.0 and 10.0"
+
+
+def test_review_writer_bounded_queue_applies_backpressure(test_user, test_media, test_media_2):
+    from services.review_writer import ReviewWriter
+    with ReviewWriter(max_batch=1, max_wait=0.01, max_queue=1) as writer:
+        futures = [writer.submit(test_user.id, media_id, 7.0, "bounded", i)
+                   for i, media_id in enumerate([test_media.id, test_media_2.id, 99999])]
+        assert writer._queue.maxsize == 1
+    results = [f.result() for f in futures]
+    assert sum(r.startswith("✅") for r in results) == 2
+    assert results[2] == "❌ Row 3: No media found with ID 99999"
+
+
+@pytest.mark.parametrize("mode", ["set", "pool"])
+def test_bulk_submit_reviews(mode, tmp_path, capsys, test_user, test_media, test_media_2, test_review):
+    from services.review_service import bulk_submit_reviews
+    csv_file = tmp_path / "bulk.csv"
+    csv_file.write_text(
+        "media_id,rating,comment\n"
+        f"{test_media_2.id},8.5,Great\n"
+        f"{test_media.id},9.0,Again\n"
+        "99999,7.0,Ghost\n"
+    )
+    bulk_submit_reviews(str(csv_file), test_user.id, mode=mode)
+    out = capsys.readouterr().out
+    assert f"✅ Row 1: Review submitted for '{test_media_2.title}' | Rating: 8.5/10" in out
+    assert f"❌ Row 2: User {test_user.id} already reviewed '{test_media.title}'" in out
+    assert "❌ Row 3: No media found with ID 99999" in out
+    assert "✅ Successful : 1" in out
+
+
+def test_write_review_batch_rejects_in_file_duplicates(db, test_user, test_media):
+    from services.review_writer import ReviewRow, write_review_batch
+    rows = [
+        ReviewRow(test_user.id, test_media.id, 7.0, "first",  0),
+        ReviewRow(test_user.id, test_media.id, 9.0, "second", 1),
+    ]
+    results = write_review_batch(db, rows)
+    db.commit()
+    assert results[0].startswith("✅ Row 1")
+    assert results[1] == f"❌ Row 2: User {test_user.id} already reviewed '{test_media.title}'"
+
+
+def test_stage_review_batch_stays_under_the_historic_parameter_limit(db, test_review, test_user, test_media):
+    import sqlite3
+    from services.review_writer import ReviewRow, stage_review_batch, SKIPPED
+    # SQLite before 3.32 allowed 999 bound parameters per statement
+    db.connection().connection.driver_connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    rows = [ReviewRow(test_user.id, 10**9 + i, 7.0, "", i) for i in range(600)]
+    rows.append(ReviewRow(test_user.id, test_media.id, 9.0, "again", 600))
+    try:
+        results = stage_review_batch(db, rows, on_conflict="skip")
+    finally:
+        db.rollback()
+        db.connection().connection.driver_connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 32766)
+    assert len(results) == 601 and results[-1][0] == SKIPPED
+
+
+def test_bulk_stream_resumes_from_checkpoint(tmp_path, capsys, test_user, test_media, test_media_2):
+    import json
+    from services.review_service import bulk_submit_reviews
+    csv_file = tmp_path / "stream.csv"
+    csv_file.write_text(
+        "media_id,rating,comment\n"
+        f"{test_media.id},8.0,\"first, with comma\"\n"
+        f"{test_media_2.id},6.5,second\n"
+    )
+    # Pretend a previous run committed row 1 and crashed
+    first_line_end = len("media_id,rating,comment\n") + len(f"{test_media.id},8.0,\"first, with comma\"\n")
+    (tmp_path / "stream.csv.checkpoint").write_text(
+        json.dumps({"user_id": test_user.id, "offset": first_line_end, "row": 1})
+    )
+    report_file = tmp_path / "report.txt"
+    bulk_submit_reviews(str(csv_file), test_user.id, mode="stream", chunk_size=1,
+                        resume=True, report_path=str(report_file))
+
+    out = capsys.readouterr().out
+    assert "Resuming" in out
+    assert "✅ Successful : 1" in out
+    assert report_file.read_text().strip() == (
+        f"✅ Row 2: Review submitted for '{test_media_2.title}' | Rating: 6.5/10"
+    )
+    assert not (tmp_path / "stream.csv.checkpoint").exists()
+
+
+def test_bulk_stream_writes_checkpoints(tmp_path, monkeypatch, test_user, test_media, test_media_2):
+    from services import review_service
+    saved = []
+    monkeypatch.setattr(review_service, "_save_checkpoint", lambda path, cp: saved.append(cp))
+    csv_file = tmp_path / "chunks.csv"
+    csv_file.write_text(
+        "media_id,rating,comment\n"
+        f"{test_media.id},8.0,a\n"
+        "not-a-number,5.0,b\n"
+        f"{test_media_2.id},7.0,c\n"
+    )
+    review_service.bulk_submit_reviews(str(csv_file), test_user.id, mode="stream", chunk_size=1)
+    assert [cp["row"] for cp in saved] == [1, 2]
+    assert saved[-1]["offset"] == csv_file.stat().st_size
+
+
+@pytest.mark.parametrize("on_conflict", ["skip", "update"])
+def test_bulk_on_conflict(on_conflict, db, tmp_path, capsys, test_user, test_media, test_review):
+    from database.models import MediaStats, Review
+    from services.review_service import bulk_submit_reviews
+    from services.stats_service import rebuild_media_stats
+    rebuild_media_stats()
+    csv_file = tmp_path / "resync.csv"
+    csv_file.write_text(f"media_id,rating,comment\n{test_media.id},4.5,changed my mind\n")
+
+    bulk_submit_reviews(str(csv_file), test_user.id, on_conflict=on_conflict)
+    out = capsys.readouterr().out
+    db.expire_all()
+    review = db.query(Review).filter(Review.id == test_review.id).first()
+    stats  = db.query(MediaStats).filter(MediaStats.media_id == test_media.id).first()
+
+    if on_conflict == "skip":
+        assert "⏭️  Skipped    : 1" in out
+        assert review.rating == 8.5
+        assert stats.avg_rating == 8.5
+    else:
+        assert "🔄 Updated    : 1" in out
+        assert review.rating  == 4.5
+        assert review.comment == "changed my mind"
+        assert stats.rating_count == 1
+        assert stats.avg_rating   == 4.5
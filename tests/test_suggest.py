@@ -0,0 +1,129 @@
+import pytest
+from services import suggest_index
+from services.suggest_index import SuggestIndex
+from database.db import SessionLocal
+from database.facets import rebuild_facets
+from database.models import Media
+from services.media_service import suggest_titles, add_media
+from services.review_service import submit_review
+from services.stats_service import counter_bump
+
+ROWS = [
+    (1, "Inception",          3, 9.2),
+    (2, "Interstellar",       4, 8.3),
+    (3, "The Dark Knight",    2, 9.5),
+    (4, "Into the Wild",      0, 0.0),
+    (5, "The Incredibles",    1, 7.0),
+]
+
+
+def ids(results):
+    return [r["id"] for r in results]
+
+
+@pytest.fixture
+def suggest_snapshot(tmp_path, monkeypatch):
+    """A fresh process-wide index whose snapshot lives in a temp file."""
+    path = str(tmp_path / "media.suggest")
+    monkeypatch.setattr(suggest_index, "SNAPSHOT_PATH", path)
+    monkeypatch.setattr(suggest_index, "_index", None)
+    monkeypatch.setattr(suggest_index, "_checked", 0.0)
+    monkeypatch.setattr(suggest_index, "SUGGEST_RECHECK", 0)
+    return path
+
+
+def test_suggest_ranks_by_reviews_or_rating():
+    index = SuggestIndex.build(ROWS)
+    assert ids(index.suggest("in")) == [2, 1, 5, 4]
+    assert ids(index.suggest("in", order="rating")) == [1, 2, 5, 4]
+    assert ids(index.suggest("in", limit=2)) == [2, 1]
+
+
+def test_suggest_matches_any_word_start():
+    index = SuggestIndex.build(ROWS)
+    assert ids(index.suggest("kni")) == [3]
+    assert ids(index.suggest("THE d")) == [3]
+    assert ids(index.suggest("the")) == [3, 5, 4]
+    assert index.suggest("zz") == [] and index.suggest("  ") == []
+
+
+def test_suggest_precomputed_lists_match_a_full_scan(monkeypatch):
+    monkeypatch.setattr(suggest_index, "SUGGEST_SCAN", 1)
+    monkeypatch.setattr(suggest_index, "SUGGEST_LIMIT", 2)
+    index = SuggestIndex.build(ROWS)
+    assert "in" in index.top["reviews"] and "t" in index.top["rating"]
+    for prefix in ("i", "in", "t", "th", "the"):
+        for order in ("reviews", "rating"):
+            served = index.suggest(prefix, limit=2, order=order)
+            ranks  = index.ranks[order]
+            lo     = index.keys.index(next(k for k in index.keys if k.startswith(prefix)))
+            docs   = sorted({index.key_docs[i] for i in range(lo, len(index.keys))
+                             if index.keys[i].startswith(prefix)}, key=ranks.__getitem__)
+            assert ids(served) == [index.ids[d] for d in docs[:2]]
+
+
+def test_suggest_added_titles_match_a_fresh_build(monkeypatch):
+    monkeypatch.setattr(suggest_index, "SUGGEST_SCAN", 1)
+    monkeypatch.setattr(suggest_index, "SUGGEST_LIMIT", 2)
+    added = [(6, "The Invisible Man", 0, 0.0), (7, "Inside Out", 0, 0.0)]
+    index = SuggestIndex.build(ROWS)
+    for row in added:
+        index.add(*row)
+    fresh = SuggestIndex.build(ROWS + added)
+
+    assert index.keys == fresh.keys and index.key_docs == fresh.key_docs
+    assert index.ranks == fresh.ranks and index.db_state == [7, 0] and index.unsaved == 2
+    for prefix in ("i", "in", "ins", "t", "the", "man"):
+        for order in ("reviews", "rating"):
+            assert index.suggest(prefix, limit=2, order=order) == fresh.suggest(prefix, limit=2, order=order)
+
+
+def test_suggest_snapshot_round_trip(tmp_path):
+    path  = str(tmp_path / "index.suggest")
+    index = SuggestIndex.build(ROWS, ratings=4)
+    index.save(path)
+    loaded = SuggestIndex.load(path)
+    assert loaded.db_state == [5, 4] and loaded.keys == index.keys
+    assert loaded.top == index.top
+    assert loaded.suggest("in", order="rating") == index.suggest("in", order="rating")
+    assert SuggestIndex.load(str(tmp_path / "missing")) is None
+
+
+def test_suggest_titles_uses_review_stats(suggest_snapshot, test_user, test_media):
+    before = suggest_index._db_state()[1]
+    submit_review(test_user.id, test_media.id, 8.0, "Suggest me")
+    assert suggest_index._db_state()[1] == before + 1
+    results = suggest_titles("Test Media Fix")
+    assert results[0]["id"] == test_media.id
+    assert results[0]["review_count"] >= 1
+    assert SuggestIndex.load(suggest_snapshot) is not None
+
+
+def test_suggest_index_rebuilds_when_ratings_move_on(suggest_snapshot, monkeypatch):
+    first = suggest_index.get_index()
+    assert suggest_index.get_index() is first
+
+    # What every media_stats write does — no cache backend involved
+    db = SessionLocal()
+    db.execute(counter_bump())
+    db.commit()
+    db.close()
+    assert suggest_index.get_index() is first           # younger than SUGGEST_REFRESH
+    monkeypatch.setattr(suggest_index, "SUGGEST_REFRESH", 0)
+    assert suggest_index.get_index() is not first
+
+
+def test_suggest_index_adds_new_titles_without_a_rebuild(sqlite_backend, suggest_snapshot, monkeypatch):
+    monkeypatch.setattr(suggest_index, "SUGGEST_RECHECK", 60)
+    first = suggest_index.get_index()
+
+    media = add_media("Zyxwv Suggest Fresh", "movie", "Drama", 2001, "Someone")
+    try:
+        assert ids(suggest_titles("zyxwv")) == [media.id]
+        assert suggest_index.get_index() is first and first.db_state[0] == media.id
+    finally:
+        db = SessionLocal()
+        db.query(Media).filter(Media.id == media.id).delete(synchronize_session=False)
+        rebuild_facets(db.connection())
+        db.commit()
+        db.close()
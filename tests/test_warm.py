@@ -0,0 +1,33 @@
+from cache import redis_client
+from cache.redis_client import get_cache, versioned_key, record_search_term
+from services.media_service import search_key, SEARCH_DEPENDS
+from services.review_service import recommendations_key, recommendations_depends
+from services.warm_service import warm_cache, active_user_ids
+
+
+def test_active_user_ids_includes_recent_reviewer(test_review):
+    assert test_review.user_id in active_user_ids(limit=1000, days=1)
+
+
+def test_warm_cache_populates_hot_keys(sqlite_backend, test_review, test_media):
+    record_search_term(test_media.title)
+    stored = warm_cache(workers=2)
+    assert stored["top_rated"] == 3
+    assert stored["search"] >= 1
+
+    cached = get_cache(versioned_key(search_key(test_media.title), SEARCH_DEPENDS))
+    assert [m["id"] for m in cached] == [test_media.id]
+
+
+def test_warm_cache_precomputes_recent_reviewers_recommendations(sqlite_backend, test_review):
+    # The fixture user reviewed last, so is first in line
+    warm_cache(workers=2, active_users=1)
+    key = versioned_key(recommendations_key(test_review.user_id), recommendations_depends(test_review.user_id))
+    assert get_cache(key)
+
+
+def test_warm_cache_without_cache_does_nothing(monkeypatch, capsys):
+    monkeypatch.setattr(redis_client, "breaker", redis_client.CircuitBreaker())
+    redis_client.breaker.record_failure()
+    assert sum(warm_cache().values()) == 0
+    assert "nothing to warm" in capsys.readouterr().out
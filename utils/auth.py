@@ -147,6 +147,36 @@ def login_required(func):
     return wrapper
 
 
+def is_admin(user: dict) -> bool:
+    """
+    Admins are configured by email in MEDIA_ADMIN_EMAILS (comma-separated)
+    — there is no role column, so the list lives with the deployment.
+    """
+    admins = {
+        email.strip().lower()
+        for email in os.environ.get("MEDIA_ADMIN_EMAILS", "").split(",")
+        if email.strip()
+    }
+    return bool(user) and user.get("email", "").lower() in admins
+
+
+def admin_required(func):
+    """
+    Decorator — like login_required, but the user must also be an admin.
+    """
+    def wrapper(args):
+        user = get_current_user()
+        if not user:
+            print("❌ You must be logged in to do this.")
+            print("   Login    : python media_review.py --login <email> <password>")
+            return
+        if not is_admin(user):
+            print("❌ Admins only. Add your email to MEDIA_ADMIN_EMAILS to allow this.")
+            return
+        return func(args, user)
+    return wrapper
+
+
 def change_password(user_id: int, old_password: str, new_password: str):
     """Change password for logged in user."""
     db = SessionLocal()
@@ -0,0 +1,93 @@
+import json
+import os
+import struct
+import sys
+from array import array
+
+# ──────────────────────────────────────────────
+# Binary snapshots of in-memory indexes
+# ──────────────────────────────────────────────
+#
+# MAGIC | JSON header length (uint32 LE) | JSON header | sections.
+#
+# A section is an array — written as raw machine words — or a list of
+# strings, written as UTF-8 joined by NUL. Loading is then a few large
+# reads rather than millions of objects unpickled. The header records
+# each section's type and size, and the byte order they were written in.
+
+
+def snapshot_path(engine, suffix: str):
+    """Next to a file-backed SQLite database: media_review.db → media_review.db.<suffix>."""
+    database = engine.url.database
+    if engine.dialect.name != "sqlite" or not database or database == ":memory:":
+        return None
+    return f"{database}.{suffix}"
+
+
+def save_snapshot(path: str, magic: bytes, header: dict, sections: list):
+    """Write `header` and `sections` to `path` atomically (via a temp file)."""
+    layout = []
+    blobs  = []
+    for section in sections:
+        if isinstance(section, array):
+            layout.append(["array", section.typecode, len(section)])
+            blobs.append(section)
+        else:
+            text = "\x00".join(s.replace("\x00", "") for s in section).encode()
+            layout.append(["text", len(section), len(text)])
+            blobs.append(text)
+    meta = json.dumps({**header, "byteorder": sys.byteorder, "sections": layout}).encode()
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(magic)
+        f.write(struct.pack("<I", len(meta)))
+        f.write(meta)
+        for blob in blobs:
+            if isinstance(blob, array):
+                blob.tofile(f)
+            else:
+                f.write(blob)
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: str, magic: bytes):
+    """(header, sections) saved at `path`, or None if it is missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            data = memoryview(f.read())
+    except OSError:
+        return None
+    try:
+        if bytes(data[:len(magic)]) != magic:
+            return None
+        offset = len(magic)
+        (meta_len,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        header  = json.loads(bytes(data[offset:offset + meta_len]))
+        offset += meta_len
+        swap    = header["byteorder"] != sys.byteorder
+
+        sections = []
+        for kind, a, b in header["sections"]:
+            if kind == "array":
+                values = array(a)
+                size   = b * values.itemsize
+                values.frombytes(data[offset:offset + size])
+                if len(values) != b:
+                    return None
+                if swap:
+                    values.byteswap()
+            else:
+                size   = b
+                text   = bytes(data[offset:offset + size]).decode()
+                values = text.split("\x00") if a else []
+                if len(values) != a:
+                    return None
+            sections.append(values)
+            offset += size
+        if offset != len(data):
+            return None
+        return header, sections
+    except (ValueError, KeyError, TypeError, struct.error):
+        return None